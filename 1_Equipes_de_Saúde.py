@@ -4,7 +4,7 @@ from utils.translations import TRADUCOES
 from utils.formatting import format_currency
 from utils.interface import style_metric_cards, metric_card 
 # from calculos.calculos_equipes import calcular_metricas_equipes # Comentado temporariamente
-from utils.data import load_data_from_json
+from utils.data import load_pagamentos_dataframe
 
 # Constantes
 CORES_CLASSIFICACAO = {
@@ -41,21 +41,7 @@ def pagina_equipes_saude():
     style_metric_cards()
     st.title("Painel Detalhado de Equipes de Saúde")
 
-    dados_api = load_data_from_json()
-    if not dados_api:
-        st.warning("Dados da API não encontrados. Por favor, consulte os dados na página principal primeiro.")
-        return
-
-    # Extração dos dados
-    dados_pagamentos = dados_api.get("pagamentos", [])
-
-    if not dados_pagamentos:
-        st.error("Nenhum dado encontrado para pagamentos.")
-        return
-
-    df = pd.DataFrame(dados_pagamentos)
-
-    # Conversão de tipos
+    # Colunas utilizadas pela página
     colunas_esf = {
         'quantitativas': [
             'qtEsfCredenciado', 'qtEsfHomologado', 'qtEsfTotalPgto',
@@ -78,19 +64,34 @@ def pagina_equipes_saude():
         ]
     }
 
+    colunas_gerais = ['qtPopulacao', 'nuAnoRefPopulacaoIbge', 'dsFaixaIndiceEquidadeEsfEap',
+                      'dsClassificacaoVinculoEsfEap', 'dsClassificacaoQualidadeEsfEap']
+
+    # Carrega apenas as colunas necessárias (tipadas quando vêm do armazenamento colunar)
+    df = load_pagamentos_dataframe(
+        colunas_gerais + [col for grupo in (colunas_esf, colunas_eap) for lista in grupo.values() for col in lista]
+    )
+
+    if df.empty:
+        st.warning("Dados da API não encontrados. Por favor, consulte os dados na página principal primeiro.")
+        return
+
     def converter_colunas(df_conv, colunas_conv): # Renomeado df para df_conv para evitar sombreamento
         for col in colunas_conv['quantitativas']:
             if col in df_conv.columns:
                 df_conv[col] = pd.to_numeric(df_conv[col], errors='coerce').fillna(0).astype(int)
 
         for col in colunas_conv['monetarias']:
-            if col in df_conv.columns:
+            if col in df_conv.columns and df_conv[col].dtype == object:
+                # Apenas valores em texto no formato brasileiro precisam de conversão
                 df_conv[col] = (
                     df_conv[col].astype(str)
                     .str.replace('.', '', regex=False)
                     .str.replace(',', '.', regex=False)
                     .astype(float)
                 )
+            elif col in df_conv.columns:
+                df_conv[col] = df_conv[col].astype(float).fillna(0.0)
         return df_conv
 
     df = converter_colunas(df, colunas_esf)
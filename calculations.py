@@ -6,6 +6,7 @@ import pandas as pd
 import json
 # Importando as funções utilitárias do pacote utils
 from utils import currency_to_float, format_currency
+from utils.tariffs import TabelasTarifas
 
 # Importações de componentes após as funções utilitárias
 from components.scenarios_analysis import display_scenarios_analysis
@@ -60,6 +61,16 @@ try:
 except (FileNotFoundError, json.JSONDecodeError) as e:
     st.error(f"Erro ao carregar config.json: {e}")
     QUALITY_VALUES = {}
+    CONFIG_DATA = {}
+
+# Tarifas compiladas uma única vez em tabelas numéricas
+TARIFAS = TabelasTarifas(CONFIG_DATA, VINCULO_VALUES)
+
+def informar_tarifa_invalida(service: str, tabela: str) -> None:
+    """Exibe um erro se a tarifa do serviço estiver ausente ou inválida no config.json (calculada como 0)."""
+    erro = TARIFAS.erro(service, tabela)
+    if erro:
+        st.error(f"Valor inválido para {service} no config.json: {erro}.")
 
 def get_estrato(ied: str | None = None) -> str:
     """
@@ -78,10 +89,6 @@ def get_estrato(ied: str | None = None) -> str:
 
 def calculate_fixed_component(selected_services, edited_values, edited_implantacao_quantity, edited_implantacao_values, config_data):
     """Calcula o componente fixo."""
-    fixed_component_values = config_data["fixed_component_values"]
-    implantacao_values = config_data["implantacao_values"]
-    data = config_data["data"]
-    
     fixed_table = []
     
     # Construindo a tabela do componente fixo
@@ -93,17 +100,11 @@ def calculate_fixed_component(selected_services, edited_values, edited_implantac
                 # Obter o IED da session_state
                 ied = st.session_state.get('ied', None)
                 estrato = get_estrato(ied)
-
-                if estrato in fixed_component_values:
-                    valor = currency_to_float(fixed_component_values[estrato][service])
-                else:
-                    valor = 0
+                informar_tarifa_invalida(service, "fixo")
+                valor = TARIFAS.valor_fixo(service, estrato)
             elif service in ["eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]:
-                try:
-                    valor = currency_to_float(data[service]['valor'])
-                except (ValueError, KeyError):
-                    st.error(f"Valor inválido para {service} no config.json.")
-                    valor = 0
+                informar_tarifa_invalida(service, "valor")
+                valor = TARIFAS.valor_servico(service)
             else:
                 valor = 0
 
@@ -120,16 +121,8 @@ def calculate_fixed_component(selected_services, edited_values, edited_implantac
             if service in edited_implantacao_values:
                 valor_implantacao = edited_implantacao_values[service]
             else:
-                if service in implantacao_values:
-                    valor_implantacao = currency_to_float(implantacao_values.get(service, "R$ 0,00"))
-                elif service == "eMULTI Ampl.":
-                    valor_implantacao = currency_to_float(implantacao_values.get("eMulti Ampliada", "R$ 0,00"))
-                elif service == "eMULTI Compl.":
-                    valor_implantacao = currency_to_float(implantacao_values.get("eMulti Complementar", "R$ 0,00"))
-                elif service == "eMULTI Estrat.":
-                    valor_implantacao = currency_to_float(implantacao_values.get("eMulti Estratégica", "R$ 0,00"))
-                else:
-                    valor_implantacao = 0
+                informar_tarifa_invalida(service, "implantacao")
+                valor_implantacao = TARIFAS.valor_implantacao(service)
 
             if service in edited_implantacao_quantity:
                 quantity_implantacao = edited_implantacao_quantity[service]
@@ -172,7 +165,8 @@ def calculate_vinculo_component(selected_services, edited_values, vinculo):
                 if service in edited_values:
                     value = edited_values[service]
                 else:
-                    value = quality_levels[vinculo]
+                    informar_tarifa_invalida(service, "vinculo")
+                    value = TARIFAS.valor_vinculo(service, vinculo)
                 total_value = value * quantity
                 vinculo_table.append([service, vinculo, format_currency(value), quantity, format_currency(total_value)])
     
@@ -213,7 +207,8 @@ def calculate_quality_component(selected_services, edited_values, classificacao,
                 if service in edited_values:
                     value = edited_values[service]
                 else:
-                    value = quality_levels[classificacao]
+                    informar_tarifa_invalida(service, "qualidade")
+                    value = TARIFAS.valor_qualidade(service, classificacao)
                     
                 total_value = value * quantity
                 quality_table.append([service, classificacao, format_currency(value), quantity, format_currency(total_value)])
@@ -256,12 +251,9 @@ def calculate_implantacao_manutencao(selected_services, edited_values, config_da
     for service in implantacao_manutencao_services:
         quantity = selected_services.get(service, 0)
         if quantity > 0:
-            # Buscar valor unitário de config.json
-            try:
-                valor = currency_to_float(data[service]['valor'])
-            except (ValueError, KeyError):
-                st.error(f"Valor inválido para {service} no config.json.")
-                valor = 0
+            # Valor unitário de config.json
+            informar_tarifa_invalida(service, "valor")
+            valor = TARIFAS.valor_servico(service)
 
             # Verifica se o valor foi editado
             if service in edited_values:
@@ -302,12 +294,9 @@ def calculate_saude_bucal_component(selected_services, edited_values, config_dat
     for service in saude_bucal_services:
         quantity = selected_services.get(service, 0)
         if quantity > 0:
-            try:
-                # Usar somente os valores de data[service]['valor'], nunca quality_values
-                valor = currency_to_float(data[service]['valor'])
-            except (ValueError, KeyError) as e:
-                st.error(f"Erro ao obter valor para {service}: {e}")
-                valor = 0
+            # Usar somente os valores de data[service]['valor'], nunca quality_values
+            informar_tarifa_invalida(service, "valor")
+            valor = TARIFAS.valor_servico(service)
             
             # Verifica se o valor foi editado pelo usuário
             if service in edited_values:
@@ -382,6 +371,7 @@ def calculate_per_capita():
 
 def calculate_results(selected_services, edited_values, edited_implantacao_values, edited_implantacao_quantity, classificacao, vinculo):
     """Calcula e exibe os resultados."""
+    global TARIFAS
     # Utilizar os dados já carregados globalmente para evitar múltiplas leituras do mesmo arquivo
     try:
         config_data = CONFIG_DATA.copy() if CONFIG_DATA else {}
@@ -391,6 +381,7 @@ def calculate_results(selected_services, edited_values, edited_implantacao_value
             st.warning("Tentando carregar config.json novamente...")
             with open("config.json", "r", encoding="utf-8") as f:
                 config_data = json.load(f)
+            TARIFAS = TabelasTarifas(config_data, VINCULO_VALUES)
     except (FileNotFoundError, json.JSONDecodeError, AttributeError) as e:
         st.error(f"Erro ao carregar config.json: {e}")
         config_data = {"quality_values": {}, "data": {}, "updated_categories": {}, "fixed_component_values": {}, "implantacao_values": {}}
@@ -442,13 +433,8 @@ def calculate_results(selected_services, edited_values, edited_implantacao_value
             quantity_implantacao = edited_implantacao_quantity.get(service, 0)
             if quantity_implantacao > 0:
                 valor_implantacao = edited_implantacao_values.get(service, 0)
-                if valor_implantacao == 0:  # Se não foi editado, tenta pegar do config.json
-                    try:
-                        implantacao_values = config_data.get("implantacao_values", {})
-                        valor_implantacao_str = implantacao_values.get(service, "R$ 0,00")
-                        valor_implantacao = currency_to_float(valor_implantacao_str)
-                    except (ValueError, KeyError):
-                        valor_implantacao = 0
+                if valor_implantacao == 0:  # Se não foi editado, usa o valor do config.json
+                    valor_implantacao = TARIFAS.valor_implantacao(service)
                 total_incentivo_aps += valor_implantacao * quantity_implantacao
     
     # CÁLCULO DO INCENTIVO FINANCEIRO DA APS - EMULTI
@@ -458,14 +444,12 @@ def calculate_results(selected_services, edited_values, edited_implantacao_value
         if quantity > 0:
             try:
                 # Valor de custeio mensal
-                valor = currency_to_float(config_data["data"][service]['valor'])
+                valor = TARIFAS.valor_servico(service)
                 if service in edited_values:
                     valor = edited_values[service]
                     
                 # Valor de qualidade
-                valor_qualidade = 0
-                if service in config_data["quality_values"]:
-                    valor_qualidade = config_data["quality_values"][service].get(classificacao, 0)
+                valor_qualidade = TARIFAS.valor_qualidade(service, classificacao)
                 
                 # Valor de implantação
                 quantity_implantacao = edited_implantacao_quantity.get(service, 0)
@@ -474,20 +458,7 @@ def calculate_results(selected_services, edited_values, edited_implantacao_value
                     if service in edited_implantacao_values:
                         valor_implantacao = edited_implantacao_values[service]
                     else:
-                        implantacao_key = ""
-                        if service == "eMULTI Ampl.":
-                            implantacao_key = "eMulti Ampliada"
-                        elif service == "eMULTI Compl.":
-                            implantacao_key = "eMulti Complementar"
-                        elif service == "eMULTI Estrat.":
-                            implantacao_key = "eMulti Estratégica"
-                        
-                        if implantacao_key:
-                            try:
-                                valor_implantacao_str = config_data["implantacao_values"].get(implantacao_key, "R$ 0,00")
-                                valor_implantacao = currency_to_float(valor_implantacao_str)
-                            except (ValueError, KeyError):
-                                valor_implantacao = 0
+                        valor_implantacao = TARIFAS.valor_implantacao(service)
 
                 # Soma tudo
                 total_incentivo_emulti += valor * quantity  # Custeio mensal
@@ -0,0 +1,38 @@
+"""
+Componente de busca de municípios por nome ou código IBGE.
+"""
+import streamlit as st
+from typing import Optional
+from utils.municipios import Municipio, get_municipio_index
+
+def render_busca_municipio(key: str = "busca_municipio") -> Optional[Municipio]:
+    """
+    Caixa de busca única, sem precisar escolher a UF antes.
+
+    Aceita nomes sem acentos ("sao jose"), partes de nomes e prefixos do
+    código IBGE.
+
+    Returns:
+        Optional[Municipio]: Município escolhido, ou None se a busca estiver vazia
+    """
+    termo = st.text_input(
+        "Buscar município",
+        value=st.session_state.get(key, ""),
+        placeholder="Nome ou código IBGE (ex.: sao jose, 261160)",
+        key=f"{key}_input"
+    )
+    st.session_state[key] = termo
+    if not termo.strip():
+        return None
+
+    resultados = get_municipio_index().buscar(termo)
+    if not resultados:
+        st.warning("Nenhum município encontrado para a busca.")
+        return None
+
+    return st.selectbox(
+        "Resultados da busca",
+        options=resultados,
+        format_func=lambda m: f"{m.nome} - {m.uf} ({m.codigo})",
+        key=f"{key}_resultado"
+    )
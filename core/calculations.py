@@ -4,17 +4,41 @@ Sistema de cálculos da Calculadora PAP.
 Este módulo contém as classes responsáveis pelos cálculos dos componentes do PAP.
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
-from .models import ServiceSelection, CalculationResults, ConfigManager
+from .models import ServiceSelection, CalculationResults, BatchResults, ConfigManager
 from utils.formatting import format_currency # CORRIGIDO: Import absoluto
 
+# Grupos de serviço usados nos subtotais do incentivo APS
+GRUPO_ESF_EAP = "esf_eap"
+GRUPO_EMULTI = "emulti"
+
+SERVICOS_ESF_EAP = ["eSF", "eAP 30h", "eAP 20h"]
+SERVICOS_EMULTI = ["eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]
+
+GRUPOS_SERVICO = {
+    **{service: GRUPO_ESF_EAP for service in SERVICOS_ESF_EAP},
+    **{service: GRUPO_EMULTI for service in SERVICOS_EMULTI},
+}
+
+SUFIXO_IMPLANTACAO = " (Implantação)"
+
+# Valor per capita anual por habitante
+VALOR_PER_CAPITA_ANUAL = 5.95
+
 
 class PAPCalculator:
-    """Calculadora principal do PAP."""
+    """
+    Calculadora principal do PAP.
+
+    As tabelas de resultado são numéricas (valores unitários e totais em
+    float); a formatação em moeda fica a cargo da camada de exibição.
+    """
     
     def __init__(self):
         self.config = ConfigManager() 
+        self.tarifas = self.config.tarifas
     
     def calculate_fixed_component(self, service_selection: ServiceSelection, ied: str) -> Tuple[float, List[List]]:
         """Calcula o componente fixo do PAP (apenas custeio de eSF, eAP, eMulti)."""
@@ -23,21 +47,14 @@ class PAPCalculator:
         
         estrato = self._get_estrato(ied)
         
-        fixed_services = ["eSF", "eAP 30h", "eAP 20h", "eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]
-        
-        for service in fixed_services:
+        for service in SERVICOS_ESF_EAP + SERVICOS_EMULTI:
             quantity = service_selection.services.get(service, 0)
             if quantity > 0:
                 valor = self._get_service_fixed_value(service, estrato, service_selection.edited_values)
                 service_total = valor * quantity
                 total_value += service_total
                 
-                fixed_table.append([
-                    service, 
-                    format_currency(valor), 
-                    quantity, 
-                    format_currency(service_total)
-                ])
+                fixed_table.append([service, valor, quantity, service_total])
         
         # A implantação de eSF/eAP/eMulti foi movida para um componente separado.
         return total_value, fixed_table
@@ -66,18 +83,12 @@ class PAPCalculator:
                         # Assume que edited_values armazena o valor numérico float
                         value = service_selection.edited_values[service]
                     else:
-                        value = quality_levels[vinculo]
+                        value = self.tarifas.valor_vinculo(service, vinculo)
                     
                     service_total = value * quantity
                     total_value += service_total
                     
-                    vinculo_table.append([
-                        service, 
-                        vinculo, 
-                        format_currency(value), 
-                        quantity, 
-                        format_currency(service_total)
-                    ])
+                    vinculo_table.append([service, vinculo, value, quantity, service_total])
         
         return total_value, vinculo_table
     
@@ -95,18 +106,12 @@ class PAPCalculator:
                     if service in service_selection.edited_values:
                         value = service_selection.edited_values[service]
                     else:
-                        value = quality_levels[classificacao] # Assume que isso já é float
+                        value = self.tarifas.valor_qualidade(service, classificacao)
                     
                     service_total = value * quantity
                     total_value += service_total
                     
-                    quality_table.append([
-                        service, 
-                        classificacao, 
-                        format_currency(value), 
-                        quantity, 
-                        format_currency(service_total)
-                    ])
+                    quality_table.append([service, classificacao, value, quantity, service_total])
         
         return total_value, quality_table
     
@@ -116,7 +121,7 @@ class PAPCalculator:
         total_value = 0
         
         saude_bucal_services = self.config.updated_categories.get('Saúde Bucal', [])
-        servicos_pap_principais = ["eSF", "eAP 30h", "eAP 20h", "eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]
+        servicos_pap_principais = SERVICOS_ESF_EAP + SERVICOS_EMULTI
         
         for service, service_data_config in self.config.data.items():
             if (service not in self.config.quality_values and
@@ -130,12 +135,7 @@ class PAPCalculator:
                     service_total = valor * quantity
                     total_value += service_total
                     
-                    outros_programas_table.append([ # RENOMEADO
-                        service, 
-                        quantity, 
-                        format_currency(valor), 
-                        format_currency(service_total)
-                    ])
+                    outros_programas_table.append([service, quantity, valor, service_total]) # RENOMEADO
         
         return total_value, outros_programas_table # RENOMEADO
 
@@ -156,37 +156,27 @@ class PAPCalculator:
                 if service in service_selection.edited_values:
                     valor = service_selection.edited_values[service] # Assume float
                 else:
-                    service_info = self.config.get_service_info(service)
-                    valor_str = service_info.get('valor')
-                    if valor_str == 'Sem cálculo' or valor_str is None:
-                        valor = 0.0
-                    else:
-                        valor = self._parse_currency_string(valor_str)
+                    valor = self.tarifas.valor_servico(service)
                 
                 service_total = valor * quantity
                 total_value += service_total
                 
-                saude_bucal_table.append([
-                    service, 
-                    quantity, 
-                    format_currency(valor), 
-                    format_currency(service_total)
-                ])
+                saude_bucal_table.append([service, quantity, valor, service_total])
         
         return total_value, saude_bucal_table
 
     def calculate_per_capita_component(self, populacao: int) -> Tuple[float, List[List]]:
         """Calcula o componente per capita."""
         # Valor per capita conforme calculations.py (raiz)
-        valor_per_capita_anual_base = 5.95 
+        valor_per_capita_anual_base = VALOR_PER_CAPITA_ANUAL
         # O cálculo em calculations.py (raiz) divide por 12, então o valor base é anual.
         # Para consistência, vamos manter o cálculo mensal aqui.
         total_per_capita_mensal = (valor_per_capita_anual_base * populacao) / 12
         
         per_capita_table_data = [
-            ['Valor per capita (anual por habitante)', format_currency(valor_per_capita_anual_base), '', ''],
+            ['Valor per capita (anual por habitante)', valor_per_capita_anual_base, '', ''],
             ['População Considerada', populacao, '', ''],
-            ['Total Per Capita (Mensal)', '', '', format_currency(total_per_capita_mensal)]
+            ['Total Per Capita (Mensal)', '', '', total_per_capita_mensal]
         ]
         
         return total_per_capita_mensal, per_capita_table_data
@@ -229,47 +219,136 @@ class PAPCalculator:
         
         results.calculate_total_geral()
         
-        results.total_incentivo_aps_esf_eap = 0
-        for row in results.fixed_table:
-            service_name = row[0]
-            if service_name in ["eSF", "eAP 30h", "eAP 20h"]:
-                results.total_incentivo_aps_esf_eap += self._parse_currency_string(row[3])
-        
-        # Adicionar implantação de eSF/eAP ao subtotal
-        for row in results.core_implantacao_table:
-            service_name = row[0] # Ex: "eSF (Implantação)"
-            if any(s in service_name for s in ["eSF", "eAP 30h", "eAP 20h"]):
-                 results.total_incentivo_aps_esf_eap += self._parse_currency_string(row[3])
-
-        for row in results.quality_table:
-            service_name = row[0]
-            if service_name in ["eSF", "eAP 30h", "eAP 20h"]:
-                results.total_incentivo_aps_esf_eap += self._parse_currency_string(row[4])
-        
-        for row in results.vinculo_table:
-            service_name = row[0]
-            if service_name in ["eSF", "eAP 30h", "eAP 20h"]:
-                results.total_incentivo_aps_esf_eap += self._parse_currency_string(row[4])
-
-        results.total_incentivo_aps_emulti = 0
-        for row in results.fixed_table:
-            service_name = row[0]
-            if service_name in ["eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]:
-                results.total_incentivo_aps_emulti += self._parse_currency_string(row[3])
-
-        # Adicionar implantação de eMulti ao subtotal
-        for row in results.core_implantacao_table:
-            service_name = row[0] # Ex: "eMULTI Ampl. (Implantação)"
-            if any(s in service_name for s in ["eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]):
-                results.total_incentivo_aps_emulti += self._parse_currency_string(row[3])
-
-        for row in results.quality_table:
-            service_name = row[0]
-            if service_name in ["eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]:
-                results.total_incentivo_aps_emulti += self._parse_currency_string(row[4])
+        # Subtotais do incentivo APS, somados direto das colunas numéricas das tabelas
+        results.subtotais_grupo = self._subtotais_por_grupo([
+            (results.fixed_table, 3),
+            (results.core_implantacao_table, 3),
+            (results.quality_table, 4),
+            (results.vinculo_table, 4),
+        ])
+        results.total_incentivo_aps_esf_eap = results.subtotais_grupo.get(GRUPO_ESF_EAP, 0.0)
+        results.total_incentivo_aps_emulti = results.subtotais_grupo.get(GRUPO_EMULTI, 0.0)
         
         return results
 
+    def calculate_batch(self, quantidades: np.ndarray, servicos: Sequence[str],
+                        estratos: Sequence, classificacoes: Sequence[str], vinculos: Sequence[str],
+                        populacoes: Sequence[int], implantacao: Optional[np.ndarray] = None) -> BatchResults:
+        """
+        Calcula todos os componentes do PAP para vários municípios de uma vez.
+
+        Equivale a chamar calculate_all_components para cada município, sem
+        valores editados, mas com operações vetoriais sobre as tabelas de
+        tarifas: recalcular o país inteiro leva milissegundos.
+
+        Args:
+            quantidades: Matriz municípios × serviços com as quantidades de custeio
+            servicos: Nomes dos serviços, na ordem das colunas
+            estratos: Estrato de cada município (1 a 4, "3" ou "ESTRATO 3")
+            classificacoes: Classificação de qualidade de cada município
+            vinculos: Classificação de vínculo de cada município
+            populacoes: População de cada município
+            implantacao: Matriz municípios × serviços com as quantidades de implantação
+
+        Returns:
+            BatchResults: Vetores com os componentes, subtotais e total de cada município
+
+        Raises:
+            ValueError: Se as dimensões forem incompatíveis ou houver estrato inválido
+        """
+        quantidades = np.asarray(quantidades, dtype=float)
+        if quantidades.ndim != 2 or quantidades.shape[1] != len(servicos):
+            raise ValueError("A matriz de quantidades deve ter uma coluna por serviço.")
+        municipios = quantidades.shape[0]
+        for nome, vetor in (("estratos", estratos), ("classificacoes", classificacoes),
+                            ("vinculos", vinculos), ("populacoes", populacoes)):
+            if len(vetor) != municipios:
+                raise ValueError(f"O vetor de {nome} deve ter um valor por município.")
+        implantacao = np.zeros_like(quantidades) if implantacao is None else np.asarray(implantacao, dtype=float)
+        if implantacao.shape != quantidades.shape:
+            raise ValueError("A matriz de implantação deve ter o mesmo formato da matriz de quantidades.")
+
+        tarifas = self.tarifas
+        indice_estrato = self._indices_lote([str(e)[-1] for e in estratos], tarifas.indice_estrato)
+        if (indice_estrato < 0).any():
+            raise ValueError("IED ausente ou inválido. Não é possível determinar o estrato.")
+        indice_classificacao = self._indices_lote(classificacoes, tarifas.indice_classificacao)
+        indice_vinculo = self._indices_lote(vinculos, tarifas.indice_classificacao)
+
+        # Tarifas e máscaras de componente por coluna (serviços desconhecidos valem 0)
+        linhas = np.array([tarifas.indice_servico.get(s, -1) for s in servicos], dtype=int)
+        conhecidos = linhas >= 0
+
+        def colunas(tabela: np.ndarray) -> np.ndarray:
+            resultado = np.zeros((len(servicos),) + tabela.shape[1:])
+            resultado[conhecidos] = tabela[linhas[conhecidos]]
+            return resultado
+
+        def tarifa_por_municipio(tabela: np.ndarray, indices: np.ndarray) -> np.ndarray:
+            # (serviços × níveis) -> (municípios × serviços); o índice -1 cai na linha de zeros
+            return np.vstack([tabela.T, np.zeros(len(servicos))])[indices]
+
+        grupos = np.array([GRUPOS_SERVICO.get(s, "") for s in servicos])
+        esf_eap = (grupos == GRUPO_ESF_EAP).astype(float)
+        emulti = (grupos == GRUPO_EMULTI).astype(float)
+        principais = grupos != ""
+        saude_bucal = np.isin(servicos, self.config.updated_categories.get('Saúde Bucal', []))
+        outros_programas = np.array([
+            s in self.config.data and s not in self.config.quality_values
+            and self.config.data[s].get('valor') != 'Sem cálculo'
+            for s in servicos
+        ]) & ~saude_bucal & ~principais
+
+        # Componentes por município × serviço; as máscaras entram nas tarifas antes da expansão
+        fixo = quantidades * tarifa_por_municipio(colunas(tarifas.fixo) * principais[:, None], indice_estrato)
+        vinculo = quantidades * tarifa_por_municipio(colunas(tarifas.vinculo), indice_vinculo)
+        qualidade = quantidades * tarifa_por_municipio(colunas(tarifas.qualidade), indice_classificacao)
+        core_implantacao = np.where(quantidades > 0, implantacao, 0.0) * (colunas(tarifas.implantacao) * principais)
+        valores = colunas(tarifas.valor)
+        incentivo = fixo + core_implantacao + qualidade + vinculo
+
+        results = BatchResults(
+            total_fixed_value=fixo.sum(axis=1),
+            total_vinculo_value=vinculo.sum(axis=1),
+            total_quality_value=qualidade.sum(axis=1),
+            total_core_implantacao_value=core_implantacao.sum(axis=1),
+            total_outros_programas_value=quantidades @ (valores * outros_programas),
+            total_saude_bucal_value=quantidades @ (valores * saude_bucal),
+            total_per_capita=VALOR_PER_CAPITA_ANUAL * np.asarray(populacoes, dtype=float) / 12,
+            total_incentivo_aps_esf_eap=incentivo @ esf_eap,
+            total_incentivo_aps_emulti=incentivo @ emulti,
+            total_geral=np.zeros(municipios),
+        )
+        results.total_geral = (
+            results.total_fixed_value + results.total_quality_value + results.total_vinculo_value
+            + results.total_core_implantacao_value + results.total_outros_programas_value
+            + results.total_saude_bucal_value + results.total_per_capita
+        )
+        return results
+
+    @staticmethod
+    def _indices_lote(valores: Sequence, indice: Dict[str, int]) -> np.ndarray:
+        """Converte rótulos em posições das tabelas (-1 se desconhecido)."""
+        return np.fromiter((indice.get(valor, -1) for valor in valores), dtype=int, count=len(valores))
+
+    def _subtotais_por_grupo(self, tabelas: List[Tuple[List[List], int]]) -> Dict[str, float]:
+        """
+        Soma os totais das tabelas por grupo de serviço (eSF/eAP e eMulti).
+
+        Args:
+            tabelas: Pares (tabela, índice da coluna de valor total)
+
+        Returns:
+            Dict[str, float]: Subtotal por grupo de serviço
+        """
+        subtotais = {GRUPO_ESF_EAP: 0.0, GRUPO_EMULTI: 0.0}
+        for tabela, coluna_total in tabelas:
+            for row in tabela:
+                grupo = GRUPOS_SERVICO.get(row[0].replace(SUFIXO_IMPLANTACAO, ""))
+                if grupo:
+                    subtotais[grupo] += row[coluna_total]
+        return subtotais
+
     def _get_estrato(self, ied: str) -> str:
         """Extrai o estrato do IED."""
         if ied and isinstance(ied, str) and ied.startswith("ESTRATO "):
@@ -285,28 +364,15 @@ class PAPCalculator:
         if service in edited_values:
             return edited_values[service] # Assume que já é float
         
-        if service in ["eSF", "eAP 30h", "eAP 20h"]:
-            # fixed_component_values está em config.json e acessível via self.config
-            estrato_values = self.config.fixed_component_values.get(estrato, {})
-            value_str = estrato_values.get(service, "R$ 0,00")
-            return self._parse_currency_string(value_str)
-        elif service in ["eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]:
-            # Para eMULTI, o valor fixo (custeio) vem de config.json['data'][service]['valor']
-            service_info = self.config.get_service_info(service)
-            value_str = service_info.get('valor', "R$ 0,00")
-            return self._parse_currency_string(value_str)
-        return 0.0
+        # eSF/eAP por estrato (fixed_component_values); eMULTI pelo valor de custeio em data
+        return self.tarifas.valor_fixo(service, estrato)
     
     def _get_service_value_from_config(self, service: str, edited_values: Dict[str, float]) -> float:
         """Obtém valor de um serviço do config.json."""
         if service in edited_values:
             return edited_values[service]
         
-        service_data = self.config.get_service_info(service)
-        if service_data and service_data.get('valor') != 'Sem cálculo':
-            return self._parse_currency_string(service_data['valor'])
-        
-        return 0.0
+        return self.tarifas.valor_servico(service)
     
     def _parse_currency_string(self, value_str: str) -> float:
         """Converte string de moeda para float."""
@@ -320,18 +386,8 @@ class PAPCalculator:
         implantacao_rows = []
         total_implantacao_geral = 0
         
-        implantacao_mapping = {
-            "eMULTI Ampl.": "eMulti Ampliada",
-            "eMULTI Compl.": "eMulti Complementar", 
-            "eMULTI Estrat.": "eMulti Estratégica"
-        }
-        
-        config_implantacao_values = self.config.implantacao_values
-        
         # Considerar apenas serviços que podem ter implantação (eSF, eAP, eMulti)
-        servicos_com_implantacao = ["eSF", "eAP 30h", "eAP 20h", "eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat."]
-
-        for service in servicos_com_implantacao:
+        for service in SERVICOS_ESF_EAP + SERVICOS_EMULTI:
             # A quantidade de CUSTEIO do serviço deve ser > 0 para considerar implantação
             # E a quantidade de IMPLANTAÇÃO deve ser > 0
             if service_selection.services.get(service, 0) > 0: # Verifica se o serviço de custeio existe
@@ -341,22 +397,12 @@ class PAPCalculator:
                     if service in service_selection.edited_implantacao_values:
                         valor_implantacao = service_selection.edited_implantacao_values[service]
                     else:
-                        valor_implantacao_str = "R$ 0,00"
-                        if service in config_implantacao_values:
-                            valor_implantacao_str = config_implantacao_values[service]
-                        elif service in implantacao_mapping and implantacao_mapping[service] in config_implantacao_values:
-                            valor_implantacao_str = config_implantacao_values[implantacao_mapping[service]]
-                        valor_implantacao = self._parse_currency_string(valor_implantacao_str)
+                        valor_implantacao = self.tarifas.valor_implantacao(service)
                     
                     total_implantacao_service = valor_implantacao * quantity_implantacao
                     total_implantacao_geral += total_implantacao_service
                     
-                    implantacao_rows.append([
-                        f"{service} (Implantação)", 
-                        format_currency(valor_implantacao), 
-                        quantity_implantacao, 
-                        format_currency(total_implantacao_service)
-                    ])
+                    implantacao_rows.append([f"{service}{SUFIXO_IMPLANTACAO}", valor_implantacao, quantity_implantacao, total_implantacao_service])
         
         return total_implantacao_geral, implantacao_rows
 
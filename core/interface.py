@@ -418,13 +418,20 @@ class CalculationInterface:
         # Tabelas detalhadas
         self._render_detailed_tables(results)
     
+    @staticmethod
+    def _formatar_moeda(df: pd.DataFrame, colunas=('Valor Unitário', 'Valor Total')) -> pd.DataFrame:
+        """Formata em moeda as colunas numéricas das tabelas de resultado."""
+        for coluna in colunas:
+            df[coluna] = df[coluna].map(format_currency)
+        return df
+    
     def _render_detailed_tables(self, results):
         """Renderiza tabelas detalhadas dos resultados."""
         tab1, tab2, tab3, tab4 = st.tabs(["Componente Fixo", "Qualidade", "Vínculo", "Outros"])
         
         with tab1:
             if results.fixed_table:
-                df = pd.DataFrame(results.fixed_table, columns=['Serviço', 'Valor Unitário', 'Quantidade', 'Valor Total'])
+                df = self._formatar_moeda(pd.DataFrame(results.fixed_table, columns=['Serviço', 'Valor Unitário', 'Quantidade', 'Valor Total']))
                 
                 # Adicionar linha de total
                 total_row = pd.DataFrame({
@@ -438,7 +445,7 @@ class CalculationInterface:
         
         with tab2:
             if results.quality_table:
-                df = pd.DataFrame(results.quality_table, columns=['Serviço', 'Qualidade', 'Valor Unitário', 'Quantidade', 'Valor Total'])
+                df = self._formatar_moeda(pd.DataFrame(results.quality_table, columns=['Serviço', 'Qualidade', 'Valor Unitário', 'Quantidade', 'Valor Total']))
                 
                 total_row = pd.DataFrame({
                     'Serviço': ['Total'],
@@ -452,7 +459,7 @@ class CalculationInterface:
         
         with tab3:
             if results.vinculo_table:
-                df = pd.DataFrame(results.vinculo_table, columns=['Serviço', 'Qualidade', 'Valor Unitário', 'Quantidade', 'Valor Total'])
+                df = self._formatar_moeda(pd.DataFrame(results.vinculo_table, columns=['Serviço', 'Qualidade', 'Valor Unitário', 'Quantidade', 'Valor Total']))
                 
                 total_row = pd.DataFrame({
                     'Serviço': ['Total'],
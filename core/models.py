@@ -8,6 +8,9 @@ from dataclasses import dataclass, field
 from typing import Dict, Optional, List
 import json
 from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.tariffs import TabelasTarifas
 
 
 @dataclass
@@ -68,6 +71,7 @@ class CalculationResults:
     # Subtotais para resumo
     total_incentivo_aps_esf_eap: float = 0.0
     total_incentivo_aps_emulti: float = 0.0
+    subtotais_grupo: Dict[str, float] = field(default_factory=dict) # Subtotais por grupo de serviço
     
     def calculate_total_geral(self) -> float:
         """Calcula o total geral automaticamente."""
@@ -83,11 +87,37 @@ class CalculationResults:
         return self.total_geral
 
 
+@dataclass
+class BatchResults:
+    """Resultados do cálculo do PAP em lote: um valor por município em cada vetor."""
+    total_fixed_value: np.ndarray
+    total_vinculo_value: np.ndarray
+    total_quality_value: np.ndarray
+    total_core_implantacao_value: np.ndarray
+    total_outros_programas_value: np.ndarray
+    total_saude_bucal_value: np.ndarray
+    total_per_capita: np.ndarray
+    total_incentivo_aps_esf_eap: np.ndarray
+    total_incentivo_aps_emulti: np.ndarray
+    total_geral: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.total_geral)
+    
+    def to_dataframe(self, index=None) -> pd.DataFrame:
+        """Retorna os resultados como DataFrame, uma linha por município."""
+        return pd.DataFrame(
+            {nome: valores for nome, valores in self.__dict__.items()},
+            index=index
+        )
+
+
 class ConfigManager:
     """Gerenciador de configurações do sistema."""
     
     _instance = None
     _config = None
+    _tarifas = None
     
     VINCULO_VALUES = {
         'eSF': {'Ótimo': 8000, 'Bom': 6000, 'Suficiente': 4000, 'Regular': 2000},
@@ -143,6 +173,13 @@ class ConfigManager:
         """Retorna os valores de implantação."""
         return self._config.get("implantacao_values", {})
     
+    @property
+    def tarifas(self) -> TabelasTarifas:
+        """Retorna as tarifas compiladas em tabelas numéricas (uma vez por processo)."""
+        if ConfigManager._tarifas is None:
+            ConfigManager._tarifas = TabelasTarifas(self._config, self.VINCULO_VALUES)
+        return ConfigManager._tarifas
+    
     def get_service_info(self, service_name: str) -> Dict:
         """Retorna informações de um serviço específico."""
         return self.data.get(service_name, {})
@@ -3,24 +3,32 @@ Módulo para interface gráfica da Calculadora PAP.
 """
 import streamlit as st
 import pandas as pd
-from pyUFbr.baseuf import ufbr
 from utils import metric_card, format_currency, currency_to_float
 from api import consultar_api, load_data_from_json
 from components.services_interface import render_services_interface
+from components.municipality_search import render_busca_municipio
 from calculations import calculate_results
+from utils.prefetch import agendar_prefetch
+from utils.municipios import get_municipio_index
 
 def setup_consulta_parameters():
     """Configura os parâmetros de consulta."""
+    indice = get_municipio_index()
     with st.expander("🔍 Parâmetros de Consulta", expanded=True):
+        municipio_busca = render_busca_municipio()
         col1, col2 = st.columns(2)
         with col1:
-            estados = ufbr.list_uf
-            uf_selecionada = st.selectbox(
-                "Selecione um Estado", 
-                options=estados, 
-                index=estados.index(st.session_state.get('uf_selecionada', "Não informado")) if st.session_state.get('uf_selecionada', "Não informado") in estados else 0,
-                key="uf_selectbox"
-            )
+            if municipio_busca:
+                uf_selecionada = municipio_busca.uf
+                st.text_input("Estado", value=uf_selecionada, disabled=True)
+            else:
+                estados = indice.ufs()
+                uf_selecionada = st.selectbox(
+                    "Selecione um Estado", 
+                    options=estados, 
+                    index=estados.index(st.session_state.get('uf_selecionada', "Não informado")) if st.session_state.get('uf_selecionada', "Não informado") in estados else 0,
+                    key="uf_selectbox"
+                )
             st.session_state['uf_selecionada'] = uf_selecionada
         with col2:
             competencia = st.text_input(
@@ -30,8 +38,12 @@ def setup_consulta_parameters():
             )
             st.session_state['competencia'] = competencia
 
-        if uf_selecionada:
-            municipios = ufbr.list_cidades(uf_selecionada)
+        if municipio_busca:
+            municipio_selecionado = municipio_busca.nome
+            st.session_state['municipio_selecionado'] = municipio_selecionado
+            codigo_ibge = municipio_busca.codigo6
+        elif uf_selecionada:
+            municipios = indice.nomes(uf_selecionada)
             municipio_selecionado = st.selectbox(
                 "Selecione um Município", 
                 options=municipios,
@@ -55,11 +67,11 @@ def setup_consulta_parameters():
                     st.warning("O código IBGE deve conter exatamente 7 dígitos")
                 codigo_ibge = codigo_ibge_input
             elif municipio_selecionado:
-                try:
-                    codigo_ibge = str(int(float(ufbr.get_cidade(municipio_selecionado).codigo)))[:-1]
-                except AttributeError:
+                municipio = indice.por_nome(uf_selecionada, municipio_selecionado)
+                if municipio is None:
                     st.error("Erro ao obter código IBGE do município")
                     return None, None, None
+                codigo_ibge = municipio.codigo6
 
         if st.button("Consultar"):
             if not (uf_selecionada and municipio_selecionado and competencia):
@@ -71,6 +83,8 @@ def setup_consulta_parameters():
             
             # Extrair e salvar população dos dados
             if dados:
+                # Antecipar as próximas consultas prováveis (M-1, M-2 e municípios vizinhos)
+                agendar_prefetch(codigo_ibge, competencia, uf_selecionada)
                 try:
                     if 'pagamentos' in dados and dados['pagamentos']:
                         populacao = dados['pagamentos'][0].get('qtPopulacao', 0)
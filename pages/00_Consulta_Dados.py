@@ -1,8 +1,12 @@
 # filepath: /home/davi/Python-Projetos/Alysson/Calculadora/pages/00_Consulta_Dados.py
 import streamlit as st
 import pandas as pd
-from pyUFbr.baseuf import ufbr
 from utils import consultar_api, format_currency
+from utils.api_client import consultar_historico, deslocar_competencia
+from utils.prefetch import agendar_prefetch
+from utils.municipios import get_municipio_index
+from components.municipality_search import render_busca_municipio
+from utils.query_layer import CONSULTAS_PRONTAS, get_query_layer
 
 def exibir_tabelas(titulo, dados, colunas):
     """Exibe uma tabela formatada com os dados."""
@@ -60,29 +64,100 @@ def exibir_tabelas(titulo, dados, colunas):
     else:
         st.warning("Nenhum dado encontrado.")
 
+def exibir_historico(codigo_ibge, competencia):
+    """Exibe o histórico de repasses do município nas competências anteriores."""
+    with st.expander("📈 Histórico de Competências", expanded=False):
+        meses = st.number_input("Número de competências", min_value=2, max_value=24, value=12, step=1)
+
+        if st.button("Consultar histórico"):
+            inicio = deslocar_competencia(competencia, -(int(meses) - 1))
+            with st.spinner("Consultando histórico..."):
+                historico = consultar_historico(codigo_ibge, inicio, competencia)
+
+            if not historico:
+                st.warning("Nenhum dado encontrado para o período informado.")
+                return
+
+            linhas = []
+            for parcela, dados_mes in historico.items():
+                for resumo in dados_mes.get('resumosPlanosOrcamentarios', []):
+                    linhas.append({
+                        "Parcela": parcela,
+                        "Plano Orçamentário": resumo.get("dsPlanoOrcamentario", ""),
+                        "Valor Efetivo Repasse": resumo.get("vlEfetivoRepasse", 0) or 0
+                    })
+
+            if not linhas:
+                st.warning("Nenhum resumo orçamentário encontrado para o período informado.")
+                return
+
+            df_historico = pd.DataFrame(linhas).pivot_table(
+                index="Parcela", columns="Plano Orçamentário",
+                values="Valor Efetivo Repasse", aggfunc="sum", fill_value=0
+            )
+            st.line_chart(df_historico)
+            st.dataframe(df_historico.apply(lambda coluna: coluna.map(format_currency)), use_container_width=True)
+            st.info(f"📊 Competências com dados: {len(historico)} de {int(meses)}")
+
+def exibir_consultas_analiticas(uf, competencia):
+    """Exibe as consultas prontas sobre os municípios já presentes no cache local."""
+    with st.expander("🗂️ Consultas Analíticas (cache local)", expanded=False):
+        nome = st.selectbox(
+            "Consulta", options=list(CONSULTAS_PRONTAS),
+            format_func=lambda chave: CONSULTAS_PRONTAS[chave].descricao
+        )
+        estrato = None
+        if CONSULTAS_PRONTAS[nome].usa_estrato:
+            opcao = st.selectbox("Estrato (IED)", options=["Todos"] + [f"ESTRATO {i}" for i in range(1, 7)])
+            estrato = None if opcao == "Todos" else opcao
+
+        if st.button("Executar consulta"):
+            camada = get_query_layer()
+            with st.spinner("Indexando cache local..."):
+                camada.sincronizar()
+            df_consulta = camada.executar_consulta(nome, uf, competencia, estrato)
+
+            if df_consulta.empty:
+                st.warning("Nenhum município encontrado. A consulta considera apenas dados já consultados ou coletados.")
+                return
+
+            for coluna in df_consulta.columns:
+                if coluna.startswith(("vl", "valor_", "total_")) or coluna == "variacao":
+                    df_consulta[coluna] = df_consulta[coluna].map(format_currency)
+            st.dataframe(df_consulta, use_container_width=True)
+            st.info(f"📊 Total de registros: {len(df_consulta)}")
+
 def main():
     
     st.title("🏥 Sistema de Monitoramento de Financiamento da Saúde")
 
+    indice = get_municipio_index()
     with st.expander("🔍 Parâmetros de Consulta", expanded=True):
+        municipio_busca = render_busca_municipio("busca_municipio_consulta")
         col1, col2 = st.columns(2)
         with col1:
-            estados = ufbr.list_uf
-            uf_selecionada = st.selectbox("Selecione um Estado", options=estados)
+            if municipio_busca:
+                uf_selecionada = municipio_busca.uf
+                st.text_input("Estado", value=uf_selecionada, disabled=True)
+            else:
+                estados = indice.ufs()
+                uf_selecionada = st.selectbox("Selecione um Estado", options=estados)
         with col2:
             competencia = st.text_input("Competência (AAAAMM)", "202501")
 
-        if uf_selecionada:
-            municipios = ufbr.list_cidades(uf_selecionada)
+        if municipio_busca:
+            municipio_selecionado = municipio_busca.nome
+            codigo_ibge = municipio_busca.codigo6
+        elif uf_selecionada:
+            municipios = indice.nomes(uf_selecionada)
             municipio_selecionado = st.selectbox("Selecione um Município", options=municipios)
 
             if municipio_selecionado:
-                try:
-                    codigo_ibge = ufbr.get_cidade(municipio_selecionado).codigo
-                    codigo_ibge = str(int(float(codigo_ibge)))[:-1]
-                except AttributeError:
+                municipio = indice.por_nome(uf_selecionada, municipio_selecionado)
+                if municipio is None:
                     st.error("Erro ao obter código IBGE do município")
                     return
+                codigo_ibge = municipio.codigo6
 
     if st.button("Consultar"):
         if not (uf_selecionada and municipio_selecionado and competencia):
@@ -98,6 +173,9 @@ def main():
             st.session_state['municipio_selecionado'] = municipio_selecionado
             st.session_state['uf_selecionada'] = uf_selecionada
             st.session_state['competencia'] = competencia
+
+            # Antecipar as próximas consultas prováveis (M-1, M-2 e municípios vizinhos)
+            agendar_prefetch(codigo_ibge, competencia, uf_selecionada)
             
             # Extrair e salvar população dos dados
             try:
@@ -211,5 +289,11 @@ def main():
             st.error("❌ Nenhum dado encontrado para os parâmetros informados.")
             st.info("💡 Verifique se o código IBGE e a competência estão corretos.")
 
+    if uf_selecionada and municipio_selecionado and len(competencia) == 6 and competencia.isdigit():
+        exibir_historico(codigo_ibge, competencia)
+
+    if uf_selecionada and len(competencia) == 6 and competencia.isdigit():
+        exibir_consultas_analiticas(uf_selecionada, competencia)
+
 if __name__ == "__main__":
     main()
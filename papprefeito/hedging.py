@@ -0,0 +1,142 @@
+"""
+Requisições com hedge para reduzir a latência de cauda da API de financiamento - papprefeito
+
+Se a resposta não chega dentro de um atraso baseado em um percentil das
+latências observadas, uma requisição duplicada é disparada e vale a que
+responder primeiro. Um orçamento global limita a fração de requisições
+duplicadas, de modo que a carga média sobre a API quase não aumenta.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Percentil das latências usado como atraso antes do hedge
+DEFAULT_PERCENTIL = 95.0
+
+# Atraso usado enquanto não há amostras suficientes (segundos)
+DEFAULT_ATRASO = 3.0
+
+# Atraso mínimo antes do hedge (segundos)
+DEFAULT_ATRASO_MINIMO = 0.5
+
+# Fração máxima de requisições que podem ser duplicadas
+DEFAULT_ORCAMENTO = 0.05
+
+# Hedges permitidos além do orçamento proporcional (rajada inicial)
+DEFAULT_RAJADA = 3
+
+
+class HedgePolicy:
+    """Política de hedge com atraso por percentil e orçamento global, segura entre threads."""
+
+    def __init__(self, percentil: float = DEFAULT_PERCENTIL, atraso_padrao: float = DEFAULT_ATRASO,
+                 atraso_minimo: float = DEFAULT_ATRASO_MINIMO, orcamento: float = DEFAULT_ORCAMENTO,
+                 rajada: int = DEFAULT_RAJADA, amostras: int = 200, min_amostras: int = 20,
+                 max_workers: int = 32):
+        """
+        Args:
+            percentil: Percentil das latências observadas usado como atraso (0-100)
+            atraso_padrao: Atraso enquanto houver menos de min_amostras latências
+            atraso_minimo: Limite inferior do atraso
+            orcamento: Fração máxima de requisições com hedge
+            rajada: Hedges permitidos além do orçamento proporcional
+            amostras: Quantidade de latências recentes consideradas
+            min_amostras: Amostras necessárias para usar o percentil
+            max_workers: Threads que executam as requisições
+        """
+        if not 0 < percentil <= 100:
+            raise ValueError("percentil deve estar entre 0 e 100")
+        self.percentil = percentil
+        self.atraso_padrao = atraso_padrao
+        self.atraso_minimo = atraso_minimo
+        self.orcamento = orcamento
+        self.rajada = rajada
+        self.min_amostras = min_amostras
+        self._latencias = deque(maxlen=amostras)
+        self._lock = threading.Lock()
+        self._stats = {"requisicoes": 0, "hedges": 0, "hedges_vencedores": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def atraso(self) -> float:
+        """Atraso atual antes de disparar o hedge, em segundos."""
+        with self._lock:
+            latencias = sorted(self._latencias)
+        if len(latencias) < self.min_amostras:
+            return max(self.atraso_padrao, self.atraso_minimo)
+        indice = max(0, math.ceil(self.percentil / 100 * len(latencias)) - 1)
+        return max(latencias[indice], self.atraso_minimo)
+
+    def registrar_latencia(self, segundos: float) -> None:
+        """Registra a latência de uma requisição bem-sucedida."""
+        with self._lock:
+            self._latencias.append(segundos)
+
+    def _reservar_hedge(self) -> bool:
+        """Consome uma unidade do orçamento de hedge, se disponível."""
+        with self._lock:
+            limite = self.orcamento * self._stats["requisicoes"] + self.rajada
+            if self._stats["hedges"] + 1 > limite:
+                return False
+            self._stats["hedges"] += 1
+            return True
+
+    def executar(self, fn: Callable[[], T]) -> T:
+        """
+        Executa fn com hedge.
+
+        A requisição que perde a corrida não é interrompida: termina em
+        segundo plano e sua conexão volta ao pool.
+
+        Args:
+            fn: Função sem argumentos que faz a requisição
+
+        Returns:
+            O resultado da primeira execução bem-sucedida
+
+        Raises:
+            Exception: A exceção da última execução, se todas falharem
+        """
+        with self._lock:
+            self._stats["requisicoes"] += 1
+        inicio = time.monotonic()
+
+        primaria = self._executor.submit(fn)
+        try:
+            resultado = primaria.result(timeout=self.atraso())
+            self.registrar_latencia(time.monotonic() - inicio)
+            return resultado
+        except FuturesTimeout:
+            pass
+
+        if not self._reservar_hedge():
+            resultado = primaria.result()
+            self.registrar_latencia(time.monotonic() - inicio)
+            return resultado
+
+        secundaria = self._executor.submit(fn)
+        pendentes = {primaria, secundaria}
+        erro: Optional[BaseException] = None
+        while pendentes:
+            concluidas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for future in concluidas:
+                if future.exception() is None:
+                    if future is secundaria:
+                        with self._lock:
+                            self._stats["hedges_vencedores"] += 1
+                    self.registrar_latencia(time.monotonic() - inicio)
+                    return future.result()
+                erro = future.exception()
+        raise erro
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Contadores de requisições e hedges e o atraso atual."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["atraso"] = self.atraso()
+        return stats
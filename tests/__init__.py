@@ -3,4 +3,4 @@ Arquivo __init__.py para o pacote de testes.
 """
 
 # Permite importação dos módulos de teste
-__all__ = ['test_core']
+__all__ = ['test_core', 'test_cache', 'test_api_client', 'test_crawler', 'test_json_stream', 'test_payment_store', 'test_query_layer', 'test_singleflight', 'test_circuit_breaker', 'test_async_client', 'test_hedging', 'test_prefetch', 'test_scheduler', 'test_archive', 'test_change_detection', 'test_api_stub', 'test_synthetic', 'test_municipios', 'test_tariffs']
@@ -0,0 +1,217 @@
+"""
+Testes unitários para o cliente da API de financiamento da saúde.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import json
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import api_client
+from utils.api_client import (
+    APIClient, APIResponse, get_api_client, validar_dados_api,
+    atualizar_entrada, montar_parametros, buscar_periodo, deslocar_competencia, listar_competencias
+)
+from utils.cache import ResponseCache
+from utils.json_stream import processar_json_stream
+
+
+def _mock_response(status_code, dados=None, headers=None):
+    """Cria uma resposta HTTP simulada."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = dados
+    return response
+
+
+class TestAPIClient(unittest.TestCase):
+    """Testes para a classe APIClient."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.session.get = MagicMock()
+
+    def test_shared_client(self):
+        """Testa que o cliente compartilhado é criado uma única vez."""
+        self.assertIs(get_api_client(), get_api_client())
+
+    def test_pool_size(self):
+        """Testa a configuração do pool de conexões."""
+        adapter = self.client.session.get_adapter("https://relatorioaps-prd.saude.gov.br")
+        self.assertEqual(adapter._pool_maxsize, self.client.pool_maxsize)
+
+    def test_fetch_returns_validators(self):
+        """Testa que ETag e Last-Modified são retornados com os dados."""
+        self.client.session.get.return_value = _mock_response(
+            200, {"pagamentos": []}, {"ETag": '"abc"', "Last-Modified": "Tue, 02 Sep 2025 10:00:00 GMT"}
+        )
+
+        resposta = self.client.fetch({"coMunicipio": "261180"})
+
+        self.assertEqual(resposta.dados, {"pagamentos": []})
+        self.assertFalse(resposta.not_modified)
+        self.assertEqual(resposta.validators["etag"], '"abc"')
+
+    def test_conditional_request(self):
+        """Testa o envio de cabeçalhos condicionais e o tratamento de 304."""
+        self.client.session.get.return_value = _mock_response(304)
+
+        resposta = self.client.fetch({"coMunicipio": "261180"}, etag='"abc"',
+                                     last_modified="Tue, 02 Sep 2025 10:00:00 GMT")
+
+        headers = self.client.session.get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"abc"')
+        self.assertIn("If-Modified-Since", headers)
+        self.assertTrue(resposta.not_modified)
+        self.assertIsNone(resposta.dados)
+        self.assertEqual(resposta.etag, '"abc"')
+
+    def test_validar_dados_api(self):
+        """Testa a validação do formato da resposta."""
+        self.assertTrue(validar_dados_api({"pagamentos": []}))
+        self.assertFalse(validar_dados_api({"outro": []}))
+        self.assertFalse(validar_dados_api([]))
+
+
+class TestBuscarPeriodo(unittest.TestCase):
+    """Testes para consultas de intervalos de competências."""
+
+    def setUp(self):
+        api_client._meses_vazios.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+        self.client = MagicMock()
+        self.client.fetch_to_sink.side_effect = lambda params, sink, timeout=60: processar_json_stream(
+            [json.dumps(self.resposta)], sink
+        )
+        self.resposta = {
+            "pagamentos": [
+                {"coMunicipioIbge": "261180", "nuParcela": "202507", "qtEsfCredenciado": 11},
+                {"coMunicipioIbge": "261180", "nuParcela": "202508", "qtEsfCredenciado": 12},
+            ],
+            "resumosPlanosOrcamentarios": [
+                {"coMunicipioIbge": "261180", "nuParcela": "202508", "vlEfetivoRepasse": 336000},
+            ],
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_competencias(self):
+        """Testa a aritmética de competências."""
+        self.assertEqual(deslocar_competencia("202501", -1), "202412")
+        self.assertEqual(deslocar_competencia("202512", 1), "202601")
+        self.assertEqual(listar_competencias("202411", "202502"), ["202411", "202412", "202501", "202502"])
+
+    def test_single_request_partitioned(self):
+        """Testa que o intervalo é obtido em uma requisição e gravado por mês."""
+        historico = buscar_periodo("2611800", "202507", "202508", cache=self.cache, client=self.client)
+
+        params = self.client.fetch_to_sink.call_args.args[0]
+        self.assertEqual((params["nuParcelaInicio"], params["nuParcelaFim"]), ("202507", "202508"))
+        self.assertEqual(list(historico), ["202507", "202508"])
+        self.assertEqual(self.cache.get("261180", "202507")["pagamentos"][0]["qtEsfCredenciado"], 11)
+        self.assertEqual(len(self.cache.get("261180", "202508")["resumosPlanosOrcamentarios"]), 1)
+
+    def test_cached_range_skips_request(self):
+        """Testa que um intervalo totalmente em cache não gera requisição."""
+        buscar_periodo("261180", "202507", "202508", cache=self.cache, client=self.client)
+        buscar_periodo("261180", "202507", "202508", cache=self.cache, client=self.client)
+
+        self.assertEqual(self.client.fetch_to_sink.call_count, 1)
+
+    def test_empty_month_remembered(self):
+        """Testa que um mês sem registros não provoca nova requisição."""
+        historico = buscar_periodo("261180", "202506", "202508", cache=self.cache, client=self.client)
+        self.assertEqual(list(historico), ["202507", "202508"])
+
+        historico = buscar_periodo("261180", "202506", "202508", cache=self.cache, client=self.client)
+
+        self.assertEqual(list(historico), ["202507", "202508"])
+        self.assertEqual(self.client.fetch_to_sink.call_count, 1)
+
+    def test_empty_month_expires(self):
+        """Testa que o registro de mês sem registros expira."""
+        buscar_periodo("261180", "202506", "202508", cache=self.cache, client=self.client)
+        api_client._meses_vazios[("261180", "202506")] -= api_client.TTL_MES_VAZIO + 1
+
+        buscar_periodo("261180", "202506", "202508", cache=self.cache, client=self.client)
+
+        self.assertEqual(self.client.fetch_to_sink.call_count, 2)
+
+    def test_empty_response_is_valid(self):
+        """Testa que respostas com seções vazias ou nulas marcam os meses como vazios."""
+        for resposta in ({"pagamentos": [], "resumosPlanosOrcamentarios": []},
+                         {"pagamentos": None, "resumosPlanosOrcamentarios": None}):
+            api_client._meses_vazios.clear()
+            self.resposta = resposta
+            historico = buscar_periodo("261180", "202507", "202508", cache=self.cache, client=self.client)
+
+            self.assertEqual(historico, {})
+            self.assertTrue(api_client._mes_vazio("261180", "202508"))
+
+    def test_response_without_sections_is_invalid(self):
+        """Testa que respostas sem nenhuma das seções esperadas são rejeitadas."""
+        self.resposta = {"mensagem": "erro"}
+        with self.assertRaises(ValueError):
+            buscar_periodo("261180", "202507", "202508", cache=self.cache, client=self.client)
+
+    def test_requests_only_missing_range(self):
+        """Testa que apenas o trecho com meses ausentes é consultado."""
+        buscar_periodo("261180", "202507", "202508", cache=self.cache, client=self.client)
+        buscar_periodo("261180", "202507", "202509", cache=self.cache, client=self.client)
+
+        params = self.client.fetch_to_sink.call_args.args[0]
+        self.assertEqual((params["nuParcelaInicio"], params["nuParcelaFim"]), ("202509", "202509"))
+
+
+
+class TestAtualizarEntrada(unittest.TestCase):
+    """Testes para a atualização de uma entrada sob o lock da chave."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+        self.client = MagicMock()
+        self.client.fetch.return_value = APIResponse(200, {"pagamentos": [{"vlTotalEsf": 2}]})
+        self.params = montar_parametros("2611606", "202508")
+        self.patchers = [patch.object(api_client, "LOCK_TIMEOUT", 0.1),
+                         patch("utils.api_client.registrar_em_segundo_plano"),
+                         patch("utils.api_client.arquivar_resposta")]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        self.tmpdir.cleanup()
+
+    def test_lock_timeout_serves_stale_entry(self):
+        """Testa que, sem obter o lock, a entrada expirada é servida sem nova gravação."""
+        self.cache.put("261160", "202508", {"pagamentos": [{"vlTotalEsf": 1}]}, ttl=-1)
+        with self.cache.lock("261160", "202508"):
+            status, dados = atualizar_entrada(self.params, "202508", None, self.cache, self.client)
+
+        self.assertEqual(status, "ocupado")
+        self.assertEqual(dados, {"pagamentos": [{"vlTotalEsf": 1}]})
+        self.client.fetch.assert_not_called()
+        self.assertTrue(self.cache.is_expired(self.cache.get_entry("261160", "202508", allow_expired=True)))
+
+    def test_lock_timeout_without_entry_does_not_write(self):
+        """Testa que, sem lock e sem entrada, a resposta é retornada sem ser gravada."""
+        with self.cache.lock("261160", "202508"):
+            status, dados = atualizar_entrada(self.params, "202508", None, self.cache, self.client)
+
+        self.assertEqual(status, "atualizado")
+        self.assertEqual(dados, {"pagamentos": [{"vlTotalEsf": 2}]})
+        self.assertIsNone(self.cache.get_entry("261160", "202508", allow_expired=True))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+"""
+Testes unitários para o servidor local da API de pagamentos.
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from utils.api_client import APIClient, montar_parametros, montar_parametros_uf
+from utils.api_stub import FixtureStore, StubAPIServer
+
+DATA_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_cache.json")
+
+
+class TestStubAPIServer(unittest.TestCase):
+    """Testes para a classe StubAPIServer."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = FixtureStore()
+        cls.fixtures.carregar_arquivo(DATA_CACHE)
+
+    def test_replays_fixture(self):
+        """Testa que a resposta gravada é reproduzida pelo APIClient."""
+        with StubAPIServer(self.fixtures) as servidor:
+            resposta = APIClient(base_url=servidor.url).fetch(montar_parametros("2611800", "202508"))
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.dados["pagamentos"][0]["noMunicipio"], "RIBEIRAO")
+        self.assertEqual(len(resposta.dados["resumosPlanosOrcamentarios"]), 6)
+        self.assertIsNotNone(resposta.etag)
+
+    def test_etag_revalidation(self):
+        """Testa a resposta 304 para um ETag ainda válido."""
+        with StubAPIServer(self.fixtures) as servidor:
+            client = APIClient(base_url=servidor.url)
+            params = montar_parametros("261180", "202508")
+            etag = client.fetch(params).etag
+            self.assertTrue(client.fetch(params, etag=etag).not_modified)
+            self.assertEqual(servidor.stats["nao_modificados"], 1)
+
+    def test_synthetic_deterministic(self):
+        """Testa os dados sintéticos para consultas sem fixture."""
+        with StubAPIServer(self.fixtures) as servidor:
+            client = APIClient(base_url=servidor.url)
+            params = montar_parametros("2611606", "202507", competencia_fim="202508")
+            primeira = client.fetch(params).dados
+            segunda = client.fetch(params).dados
+
+        self.assertEqual(primeira, segunda)
+        self.assertEqual([r["nuParcela"] for r in primeira["pagamentos"]], ["202507", "202508"])
+        self.assertEqual(primeira["pagamentos"][0]["coMunicipioIbge"], "261160")
+
+        with StubAPIServer(self.fixtures, sinteticos=False) as servidor:
+            dados = APIClient(base_url=servidor.url).fetch(montar_parametros("2611606", "202508")).dados
+        self.assertEqual(dados["pagamentos"], [])
+
+    def test_state_query(self):
+        """Testa a consulta por UF a partir das fixtures."""
+        with StubAPIServer(self.fixtures) as servidor:
+            dados = APIClient(base_url=servidor.url).fetch(montar_parametros_uf("26", "202508")).dados
+        self.assertEqual({r["coMunicipioIbge"] for r in dados["pagamentos"]}, {"261180"})
+
+    def test_error_injection_and_latency(self):
+        """Testa a injeção de erros e de latência."""
+        with StubAPIServer(self.fixtures, latencia=0.1, taxa_erro=1.0, status_erro=[503], semente=1) as servidor:
+            inicio = time.monotonic()
+            resposta = requests.get(servidor.url, params=montar_parametros("261180", "202508"), timeout=5)
+            self.assertGreaterEqual(time.monotonic() - inicio, 0.1)
+            self.assertEqual(resposta.status_code, 503)
+            self.assertEqual(servidor.stats["erros_injetados"], 1)
+
+    def test_bad_request(self):
+        """Testa a validação dos parâmetros."""
+        with StubAPIServer(self.fixtures) as servidor:
+            resposta = requests.get(servidor.url, params={"coMunicipio": "261180"}, timeout=5)
+            self.assertEqual(resposta.status_code, 400)
+            self.assertEqual(requests.get(servidor.url + "/outro", timeout=5).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
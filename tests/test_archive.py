@@ -0,0 +1,90 @@
+"""
+Testes unitários para o arquivo de respostas endereçado por conteúdo.
+"""
+
+import unittest
+import copy
+import tempfile
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.archive import ResponseArchive
+
+
+def _resposta(qt_esf=10, vl_total=1500.5):
+    return {
+        "resumosPlanosOrcamentarios": [
+            {"coMunicipioIbge": "261160", "nuParcela": "202508", "vlEfetivoRepasse": 1000.0}
+        ],
+        "pagamentos": [
+            {"coMunicipioIbge": "261160", "nuParcela": "202508", "qtEsfCredenciado": qt_esf},
+            {"coMunicipioIbge": "261160", "nuParcela": "202508", "vlTotalEsf": vl_total},
+        ],
+        "totalRegistros": 3,
+    }
+
+
+class TestResponseArchive(unittest.TestCase):
+    """Testes para a classe ResponseArchive."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = ResponseArchive(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        """Testa que a resposta reconstruída é idêntica à original."""
+        dados = _resposta()
+        manifesto = self.archive.arquivar("2611606", "202508", dados, fetched_at=100.0)
+
+        self.assertEqual(self.archive.reconstruir(manifesto), dados)
+        self.assertEqual(list(self.archive.replay("261160", "202508")), list(dados))
+
+    def test_dedup_identical_records(self):
+        """Testa que apenas os registros alterados geram novos objetos."""
+        self.archive.arquivar("261160", "202508", _resposta(), fetched_at=100.0)
+        objetos = self.archive.stats()["objetos"]
+
+        self.archive.arquivar("261160", "202508", _resposta(), fetched_at=200.0)
+        self.assertEqual(self.archive.stats()["objetos"], objetos)
+
+        self.archive.arquivar("261160", "202508", _resposta(qt_esf=11), fetched_at=300.0)
+        # Um registro e um manifesto novos
+        self.assertEqual(self.archive.stats()["objetos"], objetos + 2)
+        self.assertEqual(self.archive.stats()["respostas"], 3)
+
+    def test_replay_point_in_time(self):
+        """Testa a reconstrução da resposta vigente em cada instante."""
+        antiga, nova = _resposta(qt_esf=10), _resposta(qt_esf=12)
+        self.archive.arquivar("261160", "202508", antiga, fetched_at=100.0)
+        self.archive.arquivar("261160", "202508", nova, fetched_at=200.0)
+
+        self.assertIsNone(self.archive.replay("261160", "202508", em=50.0))
+        self.assertEqual(self.archive.replay("261160", "202508", em=150.0), antiga)
+        self.assertEqual(self.archive.replay("261160", "202508"), nova)
+        self.assertEqual([h["fetched_at"] for h in self.archive.historico("261160")], [100.0, 200.0])
+
+    def test_archived_data_not_aliased(self):
+        """Testa que alterar a resposta após arquivá-la não altera o arquivo."""
+        dados = _resposta()
+        original = copy.deepcopy(dados)
+        self.archive.arquivar("261160", "202508", dados)
+        dados["pagamentos"][0]["qtEsfCredenciado"] = 99
+        self.assertEqual(self.archive.replay("261160", "202508"), original)
+
+    def test_corrupted_object_detected(self):
+        """Testa que objetos corrompidos são detectados na leitura."""
+        manifesto = self.archive.arquivar("261160", "202508", _resposta())
+        path = self.archive._objeto_path(manifesto)
+        path.write_bytes(b"corrompido")
+        with self.assertRaises(ValueError):
+            self.archive.reconstruir(manifesto)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+"""
+Testes unitários para o cliente assíncrono da API.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.exceptions import Timeout
+from utils.api_client import APIResponse, montar_parametros
+from utils.async_client import AsyncAPIClient, consultar_em_paralelo
+from utils.cache import ResponseCache
+
+# Atraso simulado (segundos) por município
+ATRASOS = {"261180": 0.3, "261160": 0.1, "261170": 0.2}
+
+
+class _ClienteLento:
+    """Cliente síncrono simulado com atraso por município e contagem de simultaneidade."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.simultaneas = 0
+        self.max_simultaneas = 0
+        self.chamadas = 0
+
+    def fetch(self, params, timeout=30):
+        with self.lock:
+            self.chamadas += 1
+            self.simultaneas += 1
+            self.max_simultaneas = max(self.max_simultaneas, self.simultaneas)
+        try:
+            if params["coMunicipio"] == "999999":
+                raise Timeout("timeout simulado")
+            time.sleep(ATRASOS.get(params["coMunicipio"], 0.05))
+            if params["coMunicipio"] == "000000":
+                return APIResponse(200, {"outro": []})
+            return APIResponse(200, {"pagamentos": [{"coMunicipioIbge": params["coMunicipio"]}]})
+        finally:
+            with self.lock:
+                self.simultaneas -= 1
+
+
+async def _listar(cliente, queries, concurrency):
+    async with AsyncAPIClient(cliente) as async_client:
+        return [r async for r in async_client.fetch_many(queries, concurrency=concurrency)]
+
+
+class TestAsyncAPIClient(unittest.TestCase):
+    """Testes para a classe AsyncAPIClient."""
+
+    def setUp(self):
+        self.cliente = _ClienteLento()
+
+    def test_results_as_completed(self):
+        """Testa que os resultados chegam por ordem de conclusão, em paralelo."""
+        queries = [montar_parametros(codigo, "202508") for codigo in ATRASOS]
+        inicio = time.monotonic()
+        resultados = asyncio.run(_listar(self.cliente, queries, concurrency=3))
+        duracao = time.monotonic() - inicio
+
+        self.assertEqual([r.params["coMunicipio"] for r in resultados], ["261160", "261170", "261180"])
+        self.assertTrue(all(r.ok for r in resultados))
+        self.assertLess(duracao, 0.55)
+
+    def test_concurrency_limit(self):
+        """Testa que a concorrência máxima é respeitada."""
+        queries = [montar_parametros(f"26{i:04d}", "202508") for i in range(6)]
+        asyncio.run(_listar(self.cliente, queries, concurrency=2))
+
+        self.assertEqual(self.cliente.chamadas, 6)
+        self.assertLessEqual(self.cliente.max_simultaneas, 2)
+
+    def test_errors_reported_per_query(self):
+        """Testa que falhas e respostas inválidas são entregues sem interromper as demais."""
+        queries = [montar_parametros(codigo, "202508") for codigo in ("999999", "000000", "261160")]
+        resultados = {r.params["coMunicipio"]: r for r in asyncio.run(_listar(self.cliente, queries, 3))}
+
+        self.assertIsInstance(resultados["999999"].erro, Timeout)
+        self.assertIsInstance(resultados["000000"].erro, ValueError)
+        self.assertTrue(resultados["261160"].ok)
+
+
+class TestConsultarEmParalelo(unittest.TestCase):
+    """Testes para a consulta síncrona em paralelo com cache."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_uses_and_fills_cache(self):
+        """Testa que apenas as consultas ausentes do cache são feitas e gravadas."""
+        self.cache.put("261180", "202508", {"pagamentos": [{"coMunicipioIbge": "261180"}]})
+        cliente = MagicMock(wraps=_ClienteLento())
+
+        resultados = consultar_em_paralelo(["2611800", "2611600"], ["202508"], cache=self.cache, client=cliente)
+
+        self.assertEqual(set(resultados), {("261180", "202508"), ("261160", "202508")})
+        self.assertEqual(cliente.fetch.call_count, 1)
+        self.assertIsNotNone(self.cache.get("261160", "202508"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
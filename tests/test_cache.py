@@ -0,0 +1,200 @@
+"""
+Testes unitários para o cache de respostas da API.
+"""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+import time
+import os
+import sys
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gzip
+import json
+import multiprocessing
+
+from utils.cache import (
+    ResponseCache, FileLock, make_cache_key, encode_entry, decode_entry,
+    CacheCorruptionError, LOCKS_DIR, fcntl
+)
+
+
+DADOS_EXEMPLO = {
+    "pagamentos": [{"coMunicipioIbge": "261180", "nuParcela": "202508", "qtEsfCredenciado": 12}],
+    "resumosPlanosOrcamentarios": []
+}
+
+
+class TestResponseCache(unittest.TestCase):
+    """Testes para a classe ResponseCache."""
+
+    def setUp(self):
+        """Cria um diretório temporário para o cache."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name, max_entries=3, ttl=60)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_make_cache_key(self):
+        """Testa a montagem da chave de cache."""
+        self.assertEqual(make_cache_key("2611800", "202508"), "261180_202508_COMPLETO")
+
+    def test_put_and_get(self):
+        """Testa gravação e leitura de uma entrada."""
+        self.cache.put("261180", "202508", DADOS_EXEMPLO)
+
+        self.assertEqual(self.cache.get("261180", "202508"), DADOS_EXEMPLO)
+        self.assertIsNone(self.cache.get("261180", "202507"))
+        self.assertEqual(self.cache.stats["hits"], 1)
+        self.assertEqual(self.cache.stats["misses"], 1)
+
+    def test_entries_are_keyed(self):
+        """Testa que consultas diferentes não sobrescrevem umas às outras."""
+        self.cache.put("261180", "202508", DADOS_EXEMPLO)
+        self.cache.put("310620", "202508", {"pagamentos": []})
+
+        self.assertEqual(self.cache.get("261180", "202508"), DADOS_EXEMPLO)
+        self.assertEqual(self.cache.get("310620", "202508"), {"pagamentos": []})
+
+    def test_ttl_expiration(self):
+        """Testa a expiração de entradas pelo TTL."""
+        self.cache.put("261180", "202508", DADOS_EXEMPLO, ttl=0.01)
+        time.sleep(0.05)
+
+        self.assertIsNone(self.cache.get("261180", "202508"))
+        self.assertEqual(self.cache.get("261180", "202508", allow_expired=True), DADOS_EXEMPLO)
+        self.assertGreaterEqual(self.cache.stats["expired"], 1)
+
+    def test_lru_eviction(self):
+        """Testa o descarte da entrada menos recentemente usada."""
+        for competencia in ("202501", "202502", "202503"):
+            self.cache.put("261180", competencia, DADOS_EXEMPLO)
+            time.sleep(0.01)
+
+        # Acessar a mais antiga para torná-la a mais recente
+        self.cache.get("261180", "202501")
+        time.sleep(0.01)
+        self.cache.put("261180", "202504", DADOS_EXEMPLO)
+
+        self.assertIsNotNone(self.cache.get("261180", "202501"))
+        self.assertIsNone(self.cache.get("261180", "202502"))
+        self.assertEqual(self.cache.stats["entries"], 3)
+        self.assertEqual(self.cache.stats["evictions"], 1)
+
+    def test_eviction_does_not_scan_directory(self):
+        """Testa que o descarte usa o índice em memória em vez de listar o diretório a cada gravação."""
+        cache = ResponseCache(cache_dir=self.tmpdir.name, max_entries=10, ttl=60)
+        with patch.object(ResponseCache, "_carregar_indice", autospec=True,
+                          side_effect=ResponseCache._carregar_indice) as carregar:
+            for mes in range(1, 12):
+                cache.put("261180", f"2025{mes:02d}", DADOS_EXEMPLO)
+
+        self.assertEqual(carregar.call_count, 1)
+        self.assertEqual(cache.stats["entries"], 10)
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_eviction_respects_access_by_other_process(self):
+        """Testa que uma entrada acessada por outro processo não é descartada como a mais antiga."""
+        for competencia in ("202501", "202502", "202503"):
+            self.cache.put("261180", competencia, DADOS_EXEMPLO)
+            time.sleep(0.01)
+
+        # Outra instância (como outro worker) acessa a entrada mais antiga
+        ResponseCache(cache_dir=self.tmpdir.name, max_entries=3, ttl=60).get("261180", "202501")
+        time.sleep(0.01)
+        self.cache.put("261180", "202504", DADOS_EXEMPLO)
+
+        self.assertIsNotNone(self.cache.get("261180", "202501"))
+        self.assertIsNone(self.cache.get("261180", "202502"))
+
+    def _entry_path(self):
+        return os.path.join(self.tmpdir.name, "261180_202508_COMPLETO.json.gz")
+
+    def test_corrupted_entry_is_discarded(self):
+        """Testa que uma entrada corrompida é tratada como ausente."""
+        self.cache.put("261180", "202508", DADOS_EXEMPLO)
+        with open(self._entry_path(), "wb") as f:
+            f.write(b"{incompleto")
+
+        self.assertIsNone(self.cache.get("261180", "202508"))
+        self.assertEqual(self.cache.stats["entries"], 0)
+        self.assertEqual(self.cache.stats["corrupted"], 1)
+
+    def test_truncated_entry_is_discarded(self):
+        """Testa que uma gravação interrompida não é lida como entrada válida."""
+        self.cache.put("261180", "202508", DADOS_EXEMPLO)
+        with open(self._entry_path(), "rb") as f:
+            conteudo = f.read()
+        with open(self._entry_path(), "wb") as f:
+            f.write(conteudo[:len(conteudo) // 2])
+
+        self.assertIsNone(self.cache.get("261180", "202508"))
+
+    def test_checksum_verified(self):
+        """Testa que alterações no conteúdo são detectadas pelo checksum."""
+        raw = gzip.decompress(encode_entry({"dados": DADOS_EXEMPLO}))
+        adulterado = gzip.compress(raw.replace(b"12", b"13"))
+
+        self.assertEqual(decode_entry(encode_entry({"dados": DADOS_EXEMPLO}))["dados"], DADOS_EXEMPLO)
+        with self.assertRaises(CacheCorruptionError):
+            decode_entry(adulterado)
+
+    def test_atomic_compressed_write(self):
+        """Testa que a gravação não deixa temporários e comprime o conteúdo."""
+        dados = {"pagamentos": [dict(DADOS_EXEMPLO["pagamentos"][0], vlFixoEsf=i) for i in range(200)]}
+        self.cache.put("261180", "202508", dados)
+
+        arquivos = [nome for nome in os.listdir(self.tmpdir.name) if nome != LOCKS_DIR]
+        self.assertEqual(arquivos, ["261180_202508_COMPLETO.json.gz"])
+        self.assertLess(os.path.getsize(self._entry_path()), len(json.dumps(dados)) / 5)
+        self.assertEqual(self.cache.keys(), ["261180_202508_COMPLETO"])
+
+
+def _incrementar(cache_dir):
+    """Incrementa um contador gravado no cache, sob o lock da chave (executado em outro processo)."""
+    cache = ResponseCache(cache_dir=cache_dir)
+    with cache.lock("261180", "202508"):
+        atual = cache.get("261180", "202508") or {"contador": 0}
+        time.sleep(0.05)
+        cache.put("261180", "202508", {"contador": atual["contador"] + 1})
+
+
+@unittest.skipIf(fcntl is None, "locks entre processos exigem fcntl")
+class TestCrossProcessLock(unittest.TestCase):
+    """Testes para os locks de arquivo compartilhados entre processos."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lock_is_exclusive(self):
+        """Testa que um segundo lock na mesma chave não é obtido enquanto o primeiro existe."""
+        path = os.path.join(self.tmpdir.name, LOCKS_DIR, "chave.lock")
+        primeiro = FileLock(path)
+        self.assertTrue(primeiro.acquire())
+        self.assertFalse(FileLock(path).acquire(timeout=0.1))
+        primeiro.release()
+        segundo = FileLock(path)
+        self.assertTrue(segundo.acquire(timeout=0))
+        segundo.release()
+
+    def test_no_lost_updates_across_processes(self):
+        """Testa que processos concorrentes não sobrescrevem as gravações uns dos outros."""
+        contexto = multiprocessing.get_context("fork")
+        processos = [contexto.Process(target=_incrementar, args=(self.tmpdir.name,)) for _ in range(4)]
+        for processo in processos:
+            processo.start()
+        for processo in processos:
+            processo.join(timeout=30)
+
+        self.assertEqual(ResponseCache(cache_dir=self.tmpdir.name).get("261180", "202508")["contador"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
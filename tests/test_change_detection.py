@@ -0,0 +1,90 @@
+"""
+Testes unitários para a detecção de alterações entre coletas.
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import ResponseCache
+from utils.change_detection import (
+    ALTERADO, NOVO, FINGERPRINTS_FILE, FingerprintStore, fingerprint_pagamentos
+)
+
+
+def _resposta(co_municipio, **campos):
+    registro = {"coMunicipioIbge": co_municipio, "nuParcela": "202508", "sgUf": "PE",
+                "qtEsfCredenciado": 10, "vlTotalEsf": 1500.5}
+    registro.update(campos)
+    return {"pagamentos": [registro], "resumosPlanosOrcamentarios": []}
+
+
+class TestFingerprint(unittest.TestCase):
+    """Testes para a normalização e o hash das linhas."""
+
+    def test_representation_independent(self):
+        """Testa que ordem das chaves, 10 x 10.0 e espaços não alteram o hash."""
+        a = {"qtEsfCredenciado": 10, "vlTotalEsf": 1500.5, "sgUf": "PE"}
+        b = {"sgUf": " PE ", "vlTotalEsf": 1500.50000001, "qtEsfCredenciado": 10.0}
+        self.assertEqual(fingerprint_pagamentos([a]), fingerprint_pagamentos([b]))
+        self.assertNotEqual(fingerprint_pagamentos([a]), fingerprint_pagamentos([dict(a, qtEsfCredenciado=11)]))
+
+
+class TestFingerprintStore(unittest.TestCase):
+    """Testes para a classe FingerprintStore."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+        self.store = FingerprintStore(cache=self.cache)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stored_alongside_cache(self):
+        """Testa que o banco é criado no diretório do cache."""
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, FINGERPRINTS_FILE)))
+
+    def test_changeset(self):
+        """Testa a lista de municípios novos, alterados e inalterados."""
+        primeira = self.store.registrar([_resposta("261160"), _resposta("260720")])
+        self.assertEqual(primeira.municipios, ["260720", "261160"])
+        self.assertTrue(all(a.situacao == NOVO for a in primeira.alteracoes))
+
+        segunda = self.store.registrar([_resposta("261160"), _resposta("260720", vlTotalEsf=1600.0)])
+
+        self.assertEqual(segunda.municipios, ["260720"])
+        self.assertEqual(segunda.inalterados, 1)
+        alteracao = segunda.alteracoes[0]
+        self.assertEqual(alteracao.situacao, ALTERADO)
+        self.assertEqual(alteracao.campos, {"vlTotalEsf": (1500.5, 1600)})
+        self.assertEqual(segunda.campos(), {"vlTotalEsf"})
+
+    def test_new_parcela_compared_with_previous(self):
+        """Testa que uma nova parcela é comparada com a última parcela do município."""
+        self.store.registrar([_resposta("261160"), _resposta("260720")])
+        changeset = self.store.registrar([_resposta("261160", nuParcela="202509"),
+                                          _resposta("260720", nuParcela="202509", vlTotalEsf=1600.0),
+                                          _resposta("261180", nuParcela="202509")])
+
+        self.assertEqual(changeset.municipios, ["260720", "261180"])
+        self.assertEqual(changeset.inalterados, 1)
+        situacoes = {a.co_municipio: (a.situacao, a.campos) for a in changeset.alteracoes}
+        self.assertEqual(situacoes["260720"], (ALTERADO, {"vlTotalEsf": (1500.5, 1600)}))
+        self.assertEqual(situacoes["261180"], (NOVO, {}))
+        self.assertIsNotNone(self.store.fingerprint("261160", "202509"))
+
+    def test_unchanged_refresh_is_empty(self):
+        """Testa que uma coleta idêntica gera um changeset vazio."""
+        self.store.registrar([_resposta("261160")])
+        changeset = self.store.registrar([_resposta("261160")])
+        self.assertTrue(changeset.vazio)
+        self.assertIsNotNone(self.store.fingerprint("2611606", "202508"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,131 @@
+"""
+Testes unitários para o circuit breaker e a revalidação em segundo plano.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.exceptions import ConnectionError, HTTPError
+from utils.api_client import APIClient, APIResponse, montar_parametros, revalidar_em_segundo_plano
+from utils.cache import ResponseCache
+from utils.circuit_breaker import CircuitBreaker, CircuitoAbertoError, ABERTO, FECHADO, MEIO_ABERTO
+
+
+class _Relogio:
+    """Relógio controlado pelos testes."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Testes para a classe CircuitBreaker."""
+
+    def setUp(self):
+        self.relogio = _Relogio()
+        self.breaker = CircuitBreaker(max_falhas=2, tempo_aberto=10, relogio=self.relogio)
+
+    def test_opens_after_consecutive_failures(self):
+        """Testa a abertura do circuito após falhas consecutivas."""
+        self.breaker.registrar_falha()
+        self.breaker.registrar_sucesso()
+        self.breaker.registrar_falha()
+        self.assertEqual(self.breaker.estado, FECHADO)
+
+        self.breaker.registrar_falha()
+        self.assertEqual(self.breaker.estado, ABERTO)
+        self.assertFalse(self.breaker.permite())
+
+    def test_half_open_allows_single_probe(self):
+        """Testa que, após o intervalo, apenas uma chamada de teste é liberada."""
+        self.breaker.registrar_falha()
+        self.breaker.registrar_falha()
+        self.relogio.agora = 10
+
+        self.assertEqual(self.breaker.estado, MEIO_ABERTO)
+        self.assertTrue(self.breaker.permite())
+        self.assertFalse(self.breaker.permite())
+
+        # Falha na chamada de teste reabre o circuito
+        self.breaker.registrar_falha()
+        self.assertEqual(self.breaker.estado, ABERTO)
+
+        self.relogio.agora = 20
+        self.assertTrue(self.breaker.permite())
+        self.breaker.registrar_sucesso()
+        self.assertEqual(self.breaker.estado, FECHADO)
+
+
+class TestAPIClientBreaker(unittest.TestCase):
+    """Testes para o uso do circuit breaker pelo APIClient."""
+
+    def setUp(self):
+        self.client = APIClient(breaker=CircuitBreaker(max_falhas=2, tempo_aberto=60))
+        self.client.session.get = MagicMock(side_effect=ConnectionError("fora do ar"))
+
+    def test_fails_fast_when_open(self):
+        """Testa que o circuito aberto evita novas requisições."""
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.client.fetch({"coMunicipio": "261180"})
+
+        with self.assertRaises(CircuitoAbertoError):
+            self.client.fetch({"coMunicipio": "261180"})
+        self.assertEqual(self.client.session.get.call_count, 2)
+
+    def test_client_errors_do_not_open(self):
+        """Testa que erros 4xx não contam como indisponibilidade."""
+        resposta = MagicMock(status_code=404, headers={})
+        resposta.raise_for_status.side_effect = HTTPError("404", response=resposta)
+        self.client.session.get = MagicMock(return_value=resposta)
+
+        for _ in range(3):
+            with self.assertRaises(HTTPError):
+                self.client.fetch({"coMunicipio": "261180"})
+        self.assertEqual(self.client.breaker.estado, FECHADO)
+
+
+class TestRevalidacao(unittest.TestCase):
+    """Testes para a revalidação em segundo plano."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+        self.params = montar_parametros("2611800", "202508")
+        self.cache.put("261180", "202508", {"pagamentos": [{"qtEsfCredenciado": 1}]}, ttl=0)
+        self.client = MagicMock()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_background_refresh(self):
+        """Testa que a entrada expirada é atualizada em segundo plano."""
+        self.client.fetch.return_value = APIResponse(200, {"pagamentos": [{"qtEsfCredenciado": 2}]})
+        with patch("utils.api_client.get_api_client", return_value=self.client):
+            status = revalidar_em_segundo_plano(self.params, "202508", self.cache).result(timeout=5)
+
+        self.assertEqual(status, "atualizado")
+        self.assertEqual(self.cache.get("261180", "202508")["pagamentos"][0]["qtEsfCredenciado"], 2)
+
+    def test_failure_keeps_stale_entry(self):
+        """Testa que uma falha na atualização preserva a entrada antiga."""
+        self.client.fetch.side_effect = ConnectionError("fora do ar")
+        with patch("utils.api_client.get_api_client", return_value=self.client):
+            status = revalidar_em_segundo_plano(self.params, "202508", self.cache).result(timeout=5)
+
+        self.assertIsNone(status)
+        entrada = self.cache.get_entry("261180", "202508", allow_expired=True)
+        self.assertEqual(entrada["dados"]["pagamentos"][0]["qtEsfCredenciado"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
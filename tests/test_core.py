@@ -6,6 +6,7 @@ Este módulo contém testes para as classes principais do sistema.
 
 import unittest
 from unittest.mock import patch, MagicMock
+import numpy as np
 import sys
 import os
 
@@ -13,7 +14,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.models import MunicipioData, ServiceSelection, CalculationResults, ConfigManager
-from core.calculations import PAPCalculator
+from core.calculations import PAPCalculator, GRUPO_ESF_EAP, GRUPO_EMULTI
 from core.validators import DataValidator, BusinessRuleValidator
 
 
@@ -155,6 +156,115 @@ class TestPAPCalculator(unittest.TestCase):
             self.assertEqual(result, expected)
 
 
+class TestPAPCalculatorNumerico(unittest.TestCase):
+    """Testes para os resultados numéricos da PAPCalculator."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.calculator = PAPCalculator()
+        self.selection = ServiceSelection(
+            services={'eSF': 5, 'eAP 30h': 2, 'eMULTI Ampl.': 1},
+            edited_values={},
+            edited_implantacao_values={},
+            edited_implantacao_quantity={'eSF': 1}
+        )
+    
+    def test_tables_are_numeric(self):
+        """Testa que as tabelas trazem valores numéricos, sem formatação."""
+        total, tabela = self.calculator.calculate_fixed_component(self.selection, "ESTRATO 1")
+        for row in tabela:
+            self.assertIsInstance(row[1], float)
+            self.assertEqual(row[3], row[1] * row[2])
+        self.assertEqual(total, sum(row[3] for row in tabela))
+    
+    def test_subtotais_por_grupo(self):
+        """Testa os subtotais por grupo de serviço."""
+        results = self.calculator.calculate_all_components(self.selection, "Bom", "Ótimo", "ESTRATO 1", 10000)
+        
+        esf_eap = sum(row[3] for row in results.fixed_table + results.core_implantacao_table if not row[0].startswith("eMULTI"))
+        esf_eap += sum(row[4] for row in results.quality_table + results.vinculo_table if not row[0].startswith("eMULTI"))
+        emulti = sum(row[3] for row in results.fixed_table if row[0].startswith("eMULTI"))
+        emulti += sum(row[4] for row in results.quality_table if row[0].startswith("eMULTI"))
+        
+        self.assertAlmostEqual(results.subtotais_grupo[GRUPO_ESF_EAP], esf_eap)
+        self.assertAlmostEqual(results.subtotais_grupo[GRUPO_EMULTI], emulti)
+        self.assertEqual(results.total_incentivo_aps_esf_eap, results.subtotais_grupo[GRUPO_ESF_EAP])
+        self.assertEqual(results.total_incentivo_aps_emulti, results.subtotais_grupo[GRUPO_EMULTI])
+
+
+class TestPAPCalculatorLote(unittest.TestCase):
+    """Testes para o cálculo do PAP em lote."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.calculator = PAPCalculator()
+        self.servicos = ['eSF', 'eAP 30h', 'eMULTI Ampl.', 'eSB Comum I', 'ACS', 'Desconhecido']
+        self.quantidades = np.array([
+            [5, 2, 1, 3, 10, 1],
+            [0, 1, 0, 0, 4, 0],
+            [12, 0, 2, 6, 0, 0],
+        ])
+        self.implantacao = np.array([
+            [1, 0, 1, 0, 0, 0],
+            [2, 0, 1, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0],
+        ])
+        self.estratos = ['1', 'ESTRATO 3', 4]
+        self.classificacoes = ['Bom', 'Ótimo', 'Regular']
+        self.vinculos = ['Ótimo', 'Suficiente', 'Bom']
+        self.populacoes = [25000, 8000, 120000]
+    
+    def test_matches_single_calculation(self):
+        """Testa que o lote equivale ao cálculo município a município."""
+        lote = self.calculator.calculate_batch(
+            self.quantidades, self.servicos, self.estratos, self.classificacoes,
+            self.vinculos, self.populacoes, self.implantacao
+        )
+        self.assertEqual(len(lote), 3)
+        
+        for m in range(3):
+            selection = ServiceSelection(
+                services=dict(zip(self.servicos, self.quantidades[m].tolist())),
+                edited_values={},
+                edited_implantacao_values={},
+                edited_implantacao_quantity=dict(zip(self.servicos, self.implantacao[m].tolist()))
+            )
+            estrato = str(self.estratos[m])[-1]
+            results = self.calculator.calculate_all_components(
+                selection, self.classificacoes[m], self.vinculos[m], f"ESTRATO {estrato}", self.populacoes[m]
+            )
+            for campo in ['total_fixed_value', 'total_vinculo_value', 'total_quality_value',
+                          'total_core_implantacao_value', 'total_outros_programas_value',
+                          'total_saude_bucal_value', 'total_per_capita', 'total_incentivo_aps_esf_eap',
+                          'total_incentivo_aps_emulti', 'total_geral']:
+                self.assertAlmostEqual(getattr(lote, campo)[m], getattr(results, campo), places=6, msg=campo)
+    
+    def test_to_dataframe(self):
+        """Testa a conversão dos resultados em DataFrame."""
+        lote = self.calculator.calculate_batch(
+            self.quantidades, self.servicos, self.estratos, self.classificacoes, self.vinculos, self.populacoes
+        )
+        df = lote.to_dataframe(index=['A', 'B', 'C'])
+        self.assertEqual(list(df.index), ['A', 'B', 'C'])
+        self.assertEqual(df.loc['B', 'total_core_implantacao_value'], 0.0)
+        self.assertAlmostEqual(df.loc['C', 'total_per_capita'], 5.95 * 120000 / 12)
+    
+    def test_invalid_inputs(self):
+        """Testa a validação das dimensões e do estrato."""
+        with self.assertRaises(ValueError):
+            self.calculator.calculate_batch(
+                self.quantidades, self.servicos[:-1], self.estratos, self.classificacoes, self.vinculos, self.populacoes
+            )
+        with self.assertRaises(ValueError):
+            self.calculator.calculate_batch(
+                self.quantidades, self.servicos, self.estratos[:2], self.classificacoes, self.vinculos, self.populacoes
+            )
+        with self.assertRaises(ValueError):
+            self.calculator.calculate_batch(
+                self.quantidades, self.servicos, ['1', '9', '2'], self.classificacoes, self.vinculos, self.populacoes
+            )
+
+
 class TestDataValidator(unittest.TestCase):
     """Testes para a classe DataValidator."""
     
@@ -0,0 +1,265 @@
+"""
+Testes unitários para a coleta em lote de municípios.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import threading
+import json
+import time
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.exceptions import ConnectionError
+from utils.api_client import APIResponse
+from utils.change_detection import FINGERPRINTS_FILE, FingerprintStore
+from utils.crawler import BulkCrawler, TokenBucket, carregar_municipios_anexo
+from utils.json_stream import ParticaoSink, processar_json_stream
+
+
+MUNICIPIOS = [
+    {"uf": "PE", "ibge": "261180", "nome": "RIBEIRÃO"},
+    {"uf": "PE", "ibge": "261160", "nome": "RECIFE"},
+    {"uf": "PE", "ibge": "261170", "nome": "RIACHO DAS ALMAS"},
+]
+
+
+def _resposta(params, timeout=30):
+    """Resposta simulada da API para um município."""
+    return APIResponse(200, {"pagamentos": [{"coMunicipioIbge": params["coMunicipio"]}]})
+
+
+def _resposta_uf(params, timeout=30):
+    """Resposta simulada de uma consulta por UF com dois municípios."""
+    return APIResponse(200, {
+        "data": "05/09/2025",
+        "resumosPlanosOrcamentarios": [
+            {"coMunicipioIbge": "261180", "dsPlanoOrcamentario": "eSF"},
+            {"coMunicipioIbge": "261160", "dsPlanoOrcamentario": "eSF"},
+        ],
+        "pagamentos": [
+            {"coMunicipioIbge": "261180", "qtEsfCredenciado": 12},
+            {"coMunicipioIbge": "261160", "qtEsfCredenciado": 250},
+        ],
+    })
+
+
+class TestParticionamento(unittest.TestCase):
+    """Testes para o particionamento de respostas agregadas."""
+
+    def test_partition_sink_by_municipality(self):
+        """Testa a divisão de uma resposta de UF por município."""
+        with tempfile.TemporaryDirectory() as diretorio, ParticaoSink(diretorio, ("coMunicipioIbge",)) as sink:
+            cabecalho = processar_json_stream([json.dumps(_resposta_uf({}).dados)], sink)
+            particoes = dict(sink.particoes(cabecalho))
+
+        self.assertEqual(set(particoes), {"261180", "261160"})
+        self.assertEqual(particoes["261160"]["pagamentos"], [{"coMunicipioIbge": "261160", "qtEsfCredenciado": 250}])
+        self.assertEqual(len(particoes["261180"]["resumosPlanosOrcamentarios"]), 1)
+        self.assertEqual(particoes["261180"]["data"], "05/09/2025")
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Testes para o limitador de taxa."""
+
+    def test_rate_limit(self):
+        """Testa que o consumo além da rajada respeita a taxa."""
+        bucket = TokenBucket(rate=50, capacity=1)
+        inicio = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.09)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestBulkCrawler(unittest.TestCase):
+    """Testes para a classe BulkCrawler."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.client = MagicMock()
+        self.client.fetch.side_effect = _resposta
+        self.patcher = patch("utils.crawler.arquivar_resposta")
+        self.arquivar = self.patcher.start()
+        self.fingerprints = FingerprintStore(db_path=os.path.join(self.tmpdir.name, FINGERPRINTS_FILE))
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _crawler(self, competencia="202508", output_dir=None):
+        return BulkCrawler(competencia, MUNICIPIOS, output_dir or self.tmpdir.name, concurrency=2, rate=1000,
+                           client=self.client, fingerprints=self.fingerprints)
+
+    def test_anexo_vi(self):
+        """Testa a leitura da lista oficial de municípios."""
+        municipios = carregar_municipios_anexo()
+        self.assertGreater(len(municipios), 5500)
+        self.assertEqual(municipios[0]["ibge"], "120001")
+
+    def test_run_writes_results(self):
+        """Testa a gravação dos resultados por município."""
+        resumo = self._crawler().run()
+
+        self.assertEqual(resumo["concluidos"], 3)
+        self.assertEqual(resumo["falhas"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, "municipios", "261180_202508_COMPLETO.json.gz")))
+        self.assertEqual(sorted(c.args[0] for c in self.arquivar.call_args_list), ["261160", "261170", "261180"])
+
+    def test_resume_after_failure(self):
+        """Testa que uma nova execução processa apenas os pendentes."""
+        def falha_recife(params, timeout=30):
+            if params["coMunicipio"] == "261160":
+                raise ConnectionError("falha simulada")
+            return _resposta(params)
+
+        self.client.fetch.side_effect = falha_recife
+        resumo = self._crawler().run()
+        self.assertEqual(resumo["falhas"], 1)
+
+        self.client.fetch.side_effect = _resposta
+        self.client.fetch.reset_mock()
+        crawler = self._crawler()
+        self.assertEqual([m["ibge"] for m in crawler.pendentes()], ["261160"])
+
+        resumo = crawler.run()
+        self.assertEqual(self.client.fetch.call_count, 1)
+        self.assertEqual(resumo["concluidos"], 3)
+        self.assertEqual(resumo["falhas"], 0)
+
+    def test_checkpoint_written_in_batches(self):
+        """Testa que o checkpoint não é regravado a cada município."""
+        crawler = self._crawler()
+        gravacoes = []
+        original = crawler._save_checkpoint
+        crawler._save_checkpoint = lambda: (gravacoes.append(1), original())
+        crawler.run()
+
+        self.assertEqual(len(gravacoes), 1)
+        self.assertEqual(len(self._crawler().checkpoint["concluidos"]), 3)
+
+    def test_interrupt_cancels_queue_and_saves_checkpoint(self):
+        """Testa que Ctrl-C cancela os municípios na fila e grava os já concluídos."""
+        municipios = [{"uf": "PE", "ibge": f"2611{i:02d}", "nome": str(i)} for i in range(20)]
+
+        def lento(params, timeout=30):
+            time.sleep(0.02)
+            return _resposta(params)
+
+        def interromper(processados, total):
+            if processados == 2:
+                raise KeyboardInterrupt
+
+        self.client.fetch.side_effect = lento
+        crawler = BulkCrawler("202508", municipios, self.tmpdir.name, concurrency=1, rate=1000, client=self.client,
+                              fingerprints=self.fingerprints)
+        with self.assertRaises(KeyboardInterrupt):
+            crawler.run(interromper)
+        # A requisição em andamento termina em segundo plano
+        for thread in threading.enumerate():
+            if thread.name.startswith("crawler"):
+                thread.join()
+
+        self.assertLess(self.client.fetch.call_count, len(municipios))
+        concluidos = BulkCrawler("202508", municipios, self.tmpdir.name, client=self.client,
+                                 fingerprints=self.fingerprints).checkpoint["concluidos"]
+        self.assertGreaterEqual(len(concluidos), 2)
+        self.assertLessEqual(len(concluidos), self.client.fetch.call_count)
+
+    def test_empty_response(self):
+        """Testa municípios sem registros na competência."""
+        self.client.fetch.side_effect = lambda params, timeout=30: APIResponse(200, {"pagamentos": []})
+        resumo = self._crawler().run()
+
+        self.assertEqual(resumo["sem_dados"], 3)
+        self.assertEqual(self._crawler().pendentes(), [])
+
+    def test_run_por_uf(self):
+        """Testa a coleta com uma requisição por UF."""
+        self.client.fetch_to_sink.side_effect = lambda params, sink, timeout=120: processar_json_stream(
+            [json.dumps(_resposta_uf(params).dados)], sink
+        )
+        crawler = self._crawler()
+        resumo = crawler.run_por_uf()
+
+        self.assertEqual(self.client.fetch_to_sink.call_count, 1)
+        self.assertEqual(self.client.fetch_to_sink.call_args.args[0]["unidadeGeografica"], "ESTADO")
+        self.assertEqual(resumo["concluidos"], 2)
+        self.assertEqual(resumo["sem_dados"], 1)
+        self.assertEqual(crawler.results.get("261160", "202508")["pagamentos"][0]["qtEsfCredenciado"], 250)
+        self.assertEqual(sorted(c.args[0] for c in self.arquivar.call_args_list), ["261160", "261180"])
+
+    def test_run_por_uf_empty(self):
+        """Testa que uma UF sem registros marca os municípios como sem dados, e não como falha."""
+        self.client.fetch_to_sink.side_effect = lambda params, sink, timeout=120: processar_json_stream(
+            ['{"pagamentos": [], "resumosPlanosOrcamentarios": []}'], sink
+        )
+        resumo = self._crawler().run_por_uf()
+
+        self.assertEqual(resumo["sem_dados"], 3)
+        self.assertEqual(resumo["falhas"], 0)
+
+    def test_changeset_second_crawl(self):
+        """Testa que uma nova coleta reporta apenas o município alterado."""
+        equipes = {"261180": 11, "261160": 250, "261170": 3}
+        self.client.fetch.side_effect = lambda params, timeout=30: APIResponse(200, {"pagamentos": [{
+            "coMunicipioIbge": params["coMunicipio"], "nuParcela": "202508",
+            "qtEsfCredenciado": equipes[params["coMunicipio"]],
+        }]})
+        resumo = self._crawler().run()
+        self.assertEqual(resumo["alterados"], 3)
+
+        equipes["261160"] = 251
+        crawler = self._crawler()
+        crawler.reiniciar()
+        resumo = crawler.run()
+
+        self.assertEqual(resumo["alterados"], 1)
+        self.assertEqual(resumo["inalterados"], 2)
+        with open(os.path.join(self.tmpdir.name, "changeset.json"), encoding="utf-8") as f:
+            changeset = json.load(f)
+        self.assertEqual(changeset["municipios"], ["261160"])
+        self.assertEqual(changeset["alteracoes"][0]["campos"], {"qtEsfCredenciado": [250, 251]})
+
+    def test_changeset_new_parcela(self):
+        """Testa que a coleta de uma nova parcela é comparada com a parcela anterior."""
+        equipes = {"261180": 11, "261160": 250, "261170": 3}
+        self.client.fetch.side_effect = lambda params, timeout=30: APIResponse(200, {"pagamentos": [{
+            "coMunicipioIbge": params["coMunicipio"], "nuParcela": params["nuParcelaInicio"],
+            "qtEsfCredenciado": equipes[params["coMunicipio"]],
+        }]})
+        self._crawler("202508", os.path.join(self.tmpdir.name, "202508")).run()
+
+        equipes["261170"] = 4
+        resumo = self._crawler("202509", os.path.join(self.tmpdir.name, "202509")).run()
+
+        self.assertEqual(resumo["alterados"], 1)
+        self.assertEqual(resumo["inalterados"], 2)
+        with open(os.path.join(self.tmpdir.name, "202509", "changeset.json"), encoding="utf-8") as f:
+            changeset = json.load(f)
+        self.assertEqual(changeset["alteracoes"][0]["situacao"], "alterado")
+        self.assertEqual(changeset["alteracoes"][0]["campos"], {"qtEsfCredenciado": [3, 4]})
+
+    def test_changeset_por_uf(self):
+        """Testa o changeset da coleta por UF."""
+        self.client.fetch_to_sink.side_effect = lambda params, sink, timeout=120: processar_json_stream(
+            [json.dumps(_resposta_uf(params).dados)], sink
+        )
+        crawler = self._crawler()
+        crawler.run_por_uf()
+        crawler.reiniciar()
+        resumo = crawler.run_por_uf()
+
+        self.assertEqual(resumo["alterados"], 0)
+        self.assertEqual(resumo["inalterados"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+"""
+Testes unitários para as requisições com hedge.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import threading
+import time
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.api_client import APIClient, get_api_client
+from papprefeito import api_client as papprefeito_api_client
+from utils.hedging import HedgePolicy
+
+
+class _Chamadas:
+    """Função simulada cuja primeira chamada trava e as demais respondem rápido."""
+
+    def __init__(self, atraso_primeira=1.0):
+        self.atraso_primeira = atraso_primeira
+        self.lock = threading.Lock()
+        self.total = 0
+
+    def __call__(self):
+        with self.lock:
+            self.total += 1
+            ordem = self.total
+        time.sleep(self.atraso_primeira if ordem == 1 else 0.01)
+        return ordem
+
+
+class TestHedgePolicy(unittest.TestCase):
+    """Testes para a classe HedgePolicy."""
+
+    def test_fast_response_not_hedged(self):
+        """Testa que respostas dentro do atraso não geram hedge."""
+        politica = HedgePolicy(atraso_padrao=0.5, atraso_minimo=0.1)
+        self.assertEqual(politica.executar(lambda: "ok"), "ok")
+        self.assertEqual(politica.stats["hedges"], 0)
+
+    def test_hedge_wins_on_stall(self):
+        """Testa que o hedge responde quando a requisição primária trava."""
+        politica = HedgePolicy(atraso_padrao=0.1, atraso_minimo=0.05)
+        chamadas = _Chamadas()
+
+        inicio = time.monotonic()
+        self.assertEqual(politica.executar(chamadas), 2)
+        self.assertLess(time.monotonic() - inicio, 0.5)
+        self.assertEqual(politica.stats["hedges_vencedores"], 1)
+
+    def test_budget_limits_hedges(self):
+        """Testa que o orçamento global limita os hedges."""
+        politica = HedgePolicy(atraso_padrao=0.05, atraso_minimo=0.01, orcamento=0.0, rajada=1)
+
+        politica.executar(_Chamadas(atraso_primeira=0.2))
+        politica.executar(_Chamadas(atraso_primeira=0.2))
+
+        self.assertEqual(politica.stats["hedges"], 1)
+        self.assertEqual(politica.stats["requisicoes"], 2)
+
+    def test_delay_from_percentile(self):
+        """Testa o atraso calculado a partir do percentil das latências."""
+        politica = HedgePolicy(percentil=90, atraso_minimo=0.0, min_amostras=10)
+        for i in range(1, 11):
+            politica.registrar_latencia(i / 10)
+        self.assertAlmostEqual(politica.atraso(), 0.9)
+
+    def test_error_when_all_fail(self):
+        """Testa que a exceção é propagada quando todas as execuções falham."""
+        politica = HedgePolicy(atraso_padrao=0.05, atraso_minimo=0.01)
+
+        def falha():
+            time.sleep(0.1)
+            raise ValueError("falha")
+
+        with self.assertRaises(ValueError):
+            politica.executar(falha)
+
+
+class TestAPIClientHedging(unittest.TestCase):
+    """Testes para o uso do hedge pelo APIClient."""
+
+    def test_fetch_uses_policy(self):
+        """Testa que o fetch passa pela política de hedge configurada."""
+        resposta = MagicMock(status_code=200, headers={})
+        resposta.json.return_value = {"pagamentos": []}
+        politica = HedgePolicy(atraso_padrao=0.5)
+        client = APIClient(hedge_policy=politica)
+        client.session.get = MagicMock(return_value=resposta)
+
+        self.assertEqual(client.fetch({"coMunicipio": "261180"}).dados, {"pagamentos": []})
+        self.assertEqual(politica.stats["requisicoes"], 1)
+
+    def test_shared_client_not_hedged(self):
+        """Testa que o cliente compartilhado não usa hedge por padrão."""
+        self.assertIsNone(get_api_client().hedge_policy)
+
+    def test_papprefeito_client_not_hedged(self):
+        """Testa que o cliente compartilhado do papprefeito também não usa hedge por padrão."""
+        self.assertFalse(papprefeito_api_client.HEDGING_ATIVO)
+        self.assertIsNone(papprefeito_api_client.get_api_client().hedge_policy)
+
+    def test_hedged_client_opt_in(self):
+        """Testa que o hedge é opcional e reutiliza a sessão e o breaker compartilhados."""
+        politica = HedgePolicy()
+        compartilhado = get_api_client()
+        client = get_api_client(politica)
+
+        self.assertIs(client.hedge_policy, politica)
+        self.assertIs(client.session, compartilhado.session)
+        self.assertIs(client.breaker, compartilhado.breaker)
+        self.assertIsNone(compartilhado.hedge_policy)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+"""
+Testes unitários para a leitura incremental de respostas JSON.
+"""
+
+import unittest
+import tempfile
+import json
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.json_stream import (
+    iterar_json_stream, processar_json_stream, JsonLinesSink, ParticaoSink, iterar_json_lines
+)
+
+
+def _blocos(texto, tamanho):
+    """Divide o texto em blocos de bytes de tamanho fixo."""
+    dados = texto.encode("utf-8")
+    return [dados[i:i + tamanho] for i in range(0, len(dados), tamanho)]
+
+
+class TestJsonStream(unittest.TestCase):
+    """Testes para o parser incremental."""
+
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "data_cache.json"), encoding="utf-8") as f:
+            self.texto = f.read()
+        self.esperado = json.loads(self.texto)
+
+    def test_matches_json_loads(self):
+        """Testa que a leitura em blocos pequenos equivale a json.loads."""
+        for tamanho in (1, 7, 64, 100000):
+            eventos = list(iterar_json_stream(_blocos(self.texto, tamanho)))
+            pagamentos = [valor for chave, valor in eventos if chave == "pagamentos"]
+            resumos = [valor for chave, valor in eventos if chave == "resumosPlanosOrcamentarios"]
+
+            self.assertEqual(pagamentos, self.esperado["pagamentos"])
+            self.assertEqual(resumos, self.esperado["resumosPlanosOrcamentarios"])
+            self.assertIn(("data", self.esperado["data"]), eventos)
+
+    def test_scalars_split_across_chunks(self):
+        """Testa números e listas vazias divididos entre blocos."""
+        texto = '{"total": 123456, "pagamentos": [], "ativo": true}'
+        eventos = list(iterar_json_stream(_blocos(texto, 3)))
+
+        self.assertEqual(eventos, [("total", 123456), ("ativo", True)])
+
+    def test_invalid_json(self):
+        """Testa que respostas truncadas geram erro de decodificação."""
+        with self.assertRaises(json.JSONDecodeError):
+            list(iterar_json_stream(_blocos(self.texto[:500], 64)))
+
+    def test_sink(self):
+        """Testa a entrega dos registros a um destino em arquivo."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "registros.jsonl")
+            with JsonLinesSink(path) as sink:
+                cabecalho = processar_json_stream(_blocos(self.texto, 4096), sink)
+
+            registros = list(iterar_json_lines(path))
+
+        self.assertEqual(cabecalho["data"], self.esperado["data"])
+        self.assertEqual(cabecalho["_contagem"]["resumosPlanosOrcamentarios"], 6)
+        self.assertEqual(len(registros), 7)
+        self.assertEqual(registros[-1], ("pagamentos", self.esperado["pagamentos"][0]))
+
+    def test_partition_sink(self):
+        """Testa a gravação por partição com registros intercalados e poucos arquivos abertos."""
+        resposta = {
+            "data": "05/09/2025",
+            "pagamentos": [{"nuParcela": parcela, "ordem": i} for i, parcela in enumerate(["202507", "202508"] * 3)],
+            "resumosPlanosOrcamentarios": None,
+        }
+        with tempfile.TemporaryDirectory() as tmpdir, ParticaoSink(tmpdir, ("nuParcela",), max_abertos=1) as sink:
+            cabecalho = processar_json_stream(_blocos(json.dumps(resposta), 16), sink)
+            cabecalho.pop("_contagem")
+            cabecalho.pop("_secoes")
+            particoes = dict(sink.particoes(cabecalho))
+
+        self.assertEqual(list(particoes), ["202507", "202508"])
+        self.assertEqual([r["ordem"] for r in particoes["202508"]["pagamentos"]], [1, 3, 5])
+        self.assertEqual(particoes["202507"]["resumosPlanosOrcamentarios"], [])
+        self.assertEqual(particoes["202507"]["data"], "05/09/2025")
+
+    def test_empty_and_null_sections(self):
+        """Testa que seções vazias ou nulas são registradas como presentes, sem registros."""
+        recebidos = []
+        for texto in ('{"pagamentos": [], "resumosPlanosOrcamentarios": []}',
+                      '{"pagamentos": null, "resumosPlanosOrcamentarios": null}'):
+            cabecalho = processar_json_stream(_blocos(texto, 5), lambda secao, registro: recebidos.append(registro))
+
+            self.assertEqual(cabecalho["_secoes"], ["pagamentos", "resumosPlanosOrcamentarios"])
+            self.assertEqual(cabecalho["_contagem"], {"resumosPlanosOrcamentarios": 0, "pagamentos": 0})
+        self.assertEqual(recebidos, [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
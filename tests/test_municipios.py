@@ -0,0 +1,158 @@
+"""
+Testes unitários para o índice de referência dos municípios.
+"""
+
+import unittest
+import time
+import tempfile
+import shutil
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.municipios import (
+    MunicipioIndex, carregar_indice, compilar_indice, digito_verificador, ler_anexo_vi, normalizar_codigo,
+    normalizar_texto
+)
+
+ANEXO_VI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Anexo VI Portaria 3493.csv")
+
+
+class TestMunicipioIndex(unittest.TestCase):
+    """Testes para a classe MunicipioIndex."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.indice = MunicipioIndex(ler_anexo_vi(ANEXO_VI))
+
+    def test_codigo_formats(self):
+        """Testa a consulta por código em 6 e 7 dígitos e no formato float."""
+        self.assertEqual(len(self.indice), 5570)
+        recife = self.indice.get("261160")
+        self.assertEqual((recife.codigo, recife.uf, recife.nome), ("2611606", "PE", "RECIFE"))
+        self.assertEqual(self.indice.get("2611606"), recife)
+        self.assertEqual(self.indice.get("2611606.0"), recife)
+        self.assertEqual(self.indice.get(2611606), recife)
+        self.assertIsNone(self.indice.get("12345"))
+        self.assertNotIn("999999", self.indice)
+
+    def test_reference_data(self):
+        """Testa população, porte, IVS e IED do Anexo VI."""
+        recife = self.indice.get("261160")
+        self.assertEqual(recife.populacao, 1488920)
+        self.assertEqual(recife.porte, 4)
+        self.assertEqual(recife.porte_descricao, "4-Acima de 100mil hab.")
+        self.assertEqual(recife.estrato, "ESTRATO 4")
+
+    def test_name_crosswalk(self):
+        """Testa a consulta por nome restrita à UF."""
+        self.assertEqual(self.indice.codigo("pe", " recife "), "2611606")
+        # Nomes repetidos em UFs diferentes resolvem para o município da UF
+        self.assertEqual(self.indice.por_nome("PI", "ÁGUA BRANCA").uf, "PI")
+        self.assertEqual(self.indice.por_nome("PB", "ÁGUA BRANCA").uf, "PB")
+        self.assertIsNone(self.indice.codigo("PE", "INEXISTENTE"))
+
+    def test_lists(self):
+        """Testa as listas de UFs e de nomes por UF."""
+        self.assertEqual(len(self.indice.ufs()), 27)
+        nomes = self.indice.nomes("AC")
+        self.assertEqual(nomes, sorted(nomes))
+        self.assertEqual(len(nomes), 22)
+
+    def test_digito_verificador(self):
+        """Testa o dígito verificador, inclusive as exceções do IBGE."""
+        self.assertEqual(digito_verificador("261160"), "6")
+        self.assertEqual(digito_verificador("520393"), "9")
+        self.assertEqual(normalizar_codigo(" 1200013.0 "), "120001")
+
+    def test_binary_roundtrip(self):
+        """Testa a serialização no formato binário."""
+        copia = MunicipioIndex.from_bytes(self.indice.to_bytes())
+        self.assertEqual(copia.municipios(), self.indice.municipios())
+        with self.assertRaises(ValueError):
+            MunicipioIndex.from_bytes(b"invalido")
+
+
+class TestBuscaMunicipios(unittest.TestCase):
+    """Testes para a busca por nome ou código."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.indice = MunicipioIndex(ler_anexo_vi(ANEXO_VI))
+
+    def test_accent_insensitive_prefix(self):
+        """Testa a busca sem acentos e sem diferenciar maiúsculas."""
+        self.assertEqual(normalizar_texto("São José d'Oeste"), "SAO JOSE D OESTE")
+        resultados = self.indice.buscar("sao jose")
+        self.assertEqual(resultados[0].nome, "SÃO JOSÉ")
+        self.assertTrue(all(normalizar_texto(m.nome).startswith("SAO JOSE") for m in resultados))
+        self.assertEqual(self.indice.buscar("SÃO JOSÉ DOS CAMPOS")[0].codigo, "3549904")
+
+    def test_word_prefix_and_ranking(self):
+        """Testa a busca pelo início de outras palavras e a ordem por população."""
+        resultados = self.indice.buscar("goytacazes")
+        self.assertEqual(resultados[0].nome, "CAMPOS DOS GOYTACAZES")
+        # Nome exato primeiro, depois os nomes que começam pelo termo, por população
+        resultados = [m for m in self.indice.buscar("ribeirao") if m.nome.startswith("RIBEIRÃO")]
+        self.assertEqual(resultados[0].nome, "RIBEIRÃO")
+        populacoes = [m.populacao for m in resultados[1:]]
+        self.assertEqual(populacoes, sorted(populacoes, reverse=True))
+
+    def test_typo_tolerance(self):
+        """Testa a tolerância a erros de digitação por trigramas."""
+        self.assertEqual(self.indice.buscar("recfe")[0].nome, "RECIFE")
+        self.assertEqual(self.indice.buscar("moji mirim")[0].nome, "MOGI MIRIM")
+        self.assertEqual(self.indice.buscar("xyzwq"), [])
+
+    def test_code_prefix_and_uf(self):
+        """Testa a busca por prefixo do código IBGE e o filtro por UF."""
+        self.assertEqual(self.indice.buscar("261160")[0].nome, "RECIFE")
+        self.assertTrue(all(m.codigo.startswith("2611") for m in self.indice.buscar("2611")))
+        self.assertEqual({m.uf for m in self.indice.buscar("sao jose", uf="sc")}, {"SC"})
+        self.assertEqual(len(self.indice.buscar("sao", limite=3)), 3)
+        self.assertEqual(self.indice.buscar("  "), [])
+
+    def test_latency(self):
+        """Testa que buscas típicas respondem em menos de um milissegundo."""
+        self.indice.buscar("recife")
+        for termo in ("sao jose", "261160", "recfe"):
+            inicio = time.perf_counter()
+            for _ in range(20):
+                self.indice.buscar(termo)
+            self.assertLess((time.perf_counter() - inicio) / 20, 0.005)
+
+
+class TestCarregarIndice(unittest.TestCase):
+    """Testes para a compilação e o carregamento do arquivo de índice."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmpdir, "anexo.csv")
+        self.index_path = os.path.join(self.tmpdir, "municipios.idx")
+        shutil.copy(ANEXO_VI, self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_build_and_load(self):
+        """Testa que o índice compilado é reutilizado."""
+        compilar_indice(self.csv_path, self.index_path)
+        mtime = os.path.getmtime(self.index_path)
+        indice = carregar_indice(self.csv_path, self.index_path)
+        self.assertEqual(len(indice), 5570)
+        self.assertEqual(os.path.getmtime(self.index_path), mtime)
+
+    def test_rebuild_when_csv_changes(self):
+        """Testa a recompilação quando o CSV muda."""
+        compilar_indice(self.csv_path, self.index_path)
+        with open(self.csv_path, "a", encoding="utf-8") as f:
+            f.write("XX;999990;MUNICÍPIO TESTE;1;1.000;1-Até 20mil hab.;1\n")
+        indice = carregar_indice(self.csv_path, self.index_path)
+        self.assertEqual(indice.get("999990").nome, "MUNICÍPIO TESTE")
+        self.assertEqual(len(carregar_indice(self.csv_path, self.index_path)), 5571)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,125 @@
+"""
+Testes unitários para o armazenamento colunar de pagamentos.
+"""
+
+import unittest
+import tempfile
+import threading
+import glob
+import json
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import ResponseCache
+from utils.payment_store import pyarrow_disponivel, valor_em_centavos
+
+if pyarrow_disponivel():
+    from utils.payment_store import PaymentStore, CAMPOS_PAGAMENTOS
+
+
+DATA_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_cache.json")
+
+
+class TestValorEmCentavos(unittest.TestCase):
+    """Testes para a conversão de valores monetários."""
+
+    def test_conversao(self):
+        """Testa números e textos no formato brasileiro."""
+        self.assertEqual(valor_em_centavos(336000), 33600000)
+        self.assertEqual(valor_em_centavos(1234.565), 123457)
+        self.assertEqual(valor_em_centavos("R$ 1.234,56"), 123456)
+        self.assertIsNone(valor_em_centavos(None))
+
+
+@unittest.skipUnless(pyarrow_disponivel(), "pyarrow não instalado")
+class TestPaymentStore(unittest.TestCase):
+    """Testes para a classe PaymentStore."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = PaymentStore(self.tmpdir.name)
+        with open(DATA_CACHE, "r", encoding="utf-8") as f:
+            self.dados = json.load(f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_schema_and_partition(self):
+        """Testa o particionamento por UF/competência e os tipos das colunas."""
+        self.assertEqual(self.store.gravar(self.dados), 1)
+        self.assertEqual(self.store.particoes(), [{"uf": "PE", "competencia": "202508"}])
+
+        df = self.store.carregar_pagamentos(uf="PE", competencia="202508")
+        self.assertEqual(list(df.columns), list(CAMPOS_PAGAMENTOS))
+        self.assertEqual(str(df["qtEsfCredenciado"].dtype), "Int32")
+        self.assertEqual(str(df["dsFaixaIndiceEquidadeEsfEap"].dtype), "category")
+
+        original = self.dados["pagamentos"][0]
+        self.assertEqual(df["qtEsfCredenciado"].iloc[0], original["qtEsfCredenciado"])
+        self.assertAlmostEqual(df["vlQualidadeEsf"].iloc[0], original["vlQualidadeEsf"], places=2)
+
+    def test_column_projection_in_cents(self):
+        """Testa a leitura de colunas selecionadas sem conversão para reais."""
+        self.store.gravar(self.dados)
+        df = self.store.carregar_pagamentos(colunas=["vlTotalEsf", "inexistente"], em_reais=False)
+
+        self.assertEqual(list(df.columns), ["vlTotalEsf"])
+        self.assertEqual(df["vlTotalEsf"].iloc[0], valor_em_centavos(self.dados["pagamentos"][0]["vlTotalEsf"]))
+
+    def test_merge_replaces_municipality(self):
+        """Testa que regravar um município substitui seus registros na partição."""
+        outro = json.loads(json.dumps(self.dados))
+        for secao in ("pagamentos", "resumosPlanosOrcamentarios"):
+            for registro in outro[secao]:
+                registro["coMunicipioIbge"] = "261160"
+        self.store.gravar(self.dados)
+        self.store.gravar(outro)
+        self.store.gravar(self.dados)
+
+        df = self.store.carregar_pagamentos(colunas=["coMunicipioIbge"])
+        self.assertEqual(sorted(df["coMunicipioIbge"]), ["261160", "261180"])
+
+        resumos = self.store.carregar_resumos(municipio="2611800", colunas=["vlEfetivoRepasse"])
+        self.assertEqual(len(resumos), len(self.dados["resumosPlanosOrcamentarios"]))
+
+    def test_import_cache(self):
+        """Testa a importação das entradas de um cache de respostas."""
+        cache = ResponseCache(cache_dir=os.path.join(self.tmpdir.name, "cache"))
+        cache.put("261180", "202508", self.dados)
+
+        self.assertEqual(self.store.importar_cache(cache), 1)
+        self.assertEqual(len(self.store.carregar_pagamentos(competencia="202508")), 1)
+
+    def test_concurrent_writers_keep_rows(self):
+        """Testa que gravadores independentes (como processos distintos) não perdem registros da partição."""
+        codigos = [f"2611{i:02d}" for i in range(8)]
+
+        def gravar(codigo):
+            dados = json.loads(json.dumps(self.dados))
+            for secao in ("pagamentos", "resumosPlanosOrcamentarios"):
+                for registro in dados[secao]:
+                    registro["coMunicipioIbge"] = codigo
+            PaymentStore(self.tmpdir.name).gravar(dados)
+
+        threads = [threading.Thread(target=gravar, args=(codigo,)) for codigo in codigos]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        df = self.store.carregar_pagamentos(colunas=["coMunicipioIbge"])
+        self.assertEqual(sorted(df["coMunicipioIbge"]), codigos)
+        self.assertEqual(glob.glob(os.path.join(self.tmpdir.name, "**", "*.tmp"), recursive=True), [])
+
+    def test_empty_store(self):
+        """Testa a leitura sem partições gravadas."""
+        df = self.store.carregar_pagamentos(uf="SP", colunas=["qtPopulacao"])
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ["qtPopulacao"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
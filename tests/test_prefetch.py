@@ -0,0 +1,117 @@
+"""
+Testes unitários para o prefetch de consultas prováveis.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import tempfile
+import threading
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.api_client import APIResponse
+from utils.cache import ResponseCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.prefetch import Prefetcher, candidatos_prefetch, municipios_vizinhos
+
+
+class TestCandidatos(unittest.TestCase):
+    """Testes para a escolha das consultas antecipadas."""
+
+    def test_previous_competencias_first(self):
+        """Testa que M-1 e M-2 vêm antes dos municípios vizinhos."""
+        candidatos = candidatos_prefetch("2611606", "202501", "PE", max_vizinhos=2)
+        self.assertEqual(candidatos[:2], [("261160", "202412"), ("261160", "202411")])
+        self.assertEqual(len(candidatos), 4)
+        self.assertTrue(all(comp == "202501" for _, comp in candidatos[2:]))
+
+    def test_neighbours_same_uf(self):
+        """Testa que os vizinhos são da mesma UF e não incluem o consultado."""
+        vizinhos = municipios_vizinhos("261160", quantidade=4)
+        self.assertEqual(len(vizinhos), 4)
+        self.assertNotIn("261160", vizinhos)
+        self.assertTrue(all(codigo.startswith("26") for codigo in vizinhos))
+        self.assertEqual(municipios_vizinhos("999999"), [])
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Testes para a classe Prefetcher."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+        self.client = MagicMock()
+        self.client.breaker = CircuitBreaker()
+        self.client.fetch.side_effect = lambda params, **kwargs: APIResponse(
+            200, {"pagamentos": [{"coMunicipioIbge": params["coMunicipio"]}]})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_warms_cache(self):
+        """Testa que a consulta antecipada é gravada no cache."""
+        prefetcher = Prefetcher(self.cache, self.client)
+        self.assertEqual(prefetcher.agendar("2611606", "202412").result(timeout=5), "atualizado")
+        self.assertIsNotNone(self.cache.get("261160", "202412"))
+        self.assertEqual(prefetcher.pendentes(), 0)
+
+    def test_skips_cached_and_open_circuit(self):
+        """Testa que entradas no cache e o circuito aberto não geram prefetch."""
+        prefetcher = Prefetcher(self.cache, self.client)
+        self.cache.put("261160", "202412", {"pagamentos": [{}]})
+        self.assertIsNone(prefetcher.agendar("261160", "202412"))
+
+        for _ in range(self.client.breaker.max_falhas):
+            self.client.breaker.registrar_falha()
+        self.assertIsNone(prefetcher.agendar("261160", "202411"))
+        self.client.fetch.assert_not_called()
+
+    def test_pending_limit(self):
+        """Testa que consultas além do limite de pendentes são descartadas."""
+        liberar = threading.Event()
+        self.client.fetch.side_effect = lambda params, **kwargs: liberar.wait(5) and APIResponse(200, {"pagamentos": [{}]})
+        prefetcher = Prefetcher(self.cache, self.client, max_workers=1, max_pendentes=2)
+
+        futures = [prefetcher.agendar("261160", comp) for comp in ("202412", "202411", "202410")]
+        self.assertIsNone(prefetcher.agendar("261160", "202412"))
+        liberar.set()
+
+        self.assertIsNone(futures[2])
+        for future in futures[:2]:
+            future.result(timeout=5)
+        self.assertEqual(prefetcher.stats["descartados"], 1)
+
+    def test_prefetch_does_not_evict_working_set(self):
+        """Testa que entradas antecipadas são descartadas antes das consultadas pelo usuário."""
+        self.cache.max_entries = 3
+        for codigo in ("110001", "120001"):
+            self.cache.put(codigo, "202412", {"pagamentos": [{}]})
+
+        prefetcher = Prefetcher(self.cache, self.client)
+        for comp in ("202411", "202410", "202409"):
+            prefetcher.agendar("261160", comp).result(timeout=5)
+
+        self.assertIsNotNone(self.cache.get("110001", "202412"))
+        self.assertIsNotNone(self.cache.get("120001", "202412"))
+        self.assertEqual(self.cache.stats["evictions"], 2)
+
+    def test_prefetched_entry_promoted_on_read(self):
+        """Testa que a entrada antecipada deixa a frente da fila de descarte ao ser lida."""
+        self.cache.max_entries = 2
+        prefetcher = Prefetcher(self.cache, self.client)
+        prefetcher.agendar("261160", "202412").result(timeout=5)
+        self.assertIsNotNone(self.cache.get("261160", "202412"))
+
+        self.cache.put("110001", "202412", {"pagamentos": [{}]})
+        prefetcher.agendar("120001", "202412").result(timeout=5)
+
+        self.assertIsNotNone(self.cache.get("261160", "202412"))
+        self.assertIsNotNone(self.cache.get("110001", "202412"))
+        self.assertIsNone(self.cache.get("120001", "202412"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
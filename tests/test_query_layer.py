@@ -0,0 +1,123 @@
+"""
+Testes unitários para a camada de consultas SQLite.
+"""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+import json
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import ResponseCache
+from utils.query_layer import QueryLayer, CONSULTAS_PRONTAS
+
+
+def _resposta(co_municipio, competencia, qualidade, estrato="ESTRATO 1", repasse=1000.0):
+    """Resposta simulada da API para um município e competência."""
+    identificacao = {"coUfIbge": "26", "sgUf": "PE", "coMunicipioIbge": co_municipio,
+                     "noMunicipio": f"MUNICIPIO {co_municipio}", "nuParcela": competencia}
+    return {
+        "pagamentos": [dict(identificacao, vlQualidadeEsf=qualidade, dsFaixaIndiceEquidadeEsfEap=estrato,
+                            qtEsfCredenciado=3)],
+        "resumosPlanosOrcamentarios": [
+            dict(identificacao, dsPlanoOrcamentario="eSF", vlEfetivoRepasse=repasse),
+            dict(identificacao, dsPlanoOrcamentario="eMulti", vlEfetivoRepasse=repasse / 2),
+        ],
+    }
+
+
+class TestQueryLayer(unittest.TestCase):
+    """Testes para a classe QueryLayer."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.layer = QueryLayer(os.path.join(self.tmpdir.name, "consultas.sqlite"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_queda_qualidade_por_estrato(self):
+        """Testa a consulta de queda mês a mês filtrada por estrato."""
+        self.layer.registrar(_resposta("261180", "202507", 8000))
+        self.layer.registrar(_resposta("261180", "202508", 6000))
+        self.layer.registrar(_resposta("261160", "202507", 8000))
+        self.layer.registrar(_resposta("261160", "202508", 9000))
+        self.layer.registrar(_resposta("261170", "202507", 8000, estrato="ESTRATO 2"))
+        self.layer.registrar(_resposta("261170", "202508", 1000, estrato="ESTRATO 2"))
+
+        df = self.layer.executar_consulta("queda_vlQualidadeEsf", "PE", "202508", "ESTRATO 1")
+        self.assertEqual(list(df["coMunicipioIbge"]), ["261180"])
+        self.assertEqual(df["variacao"].iloc[0], -2000)
+
+        df = self.layer.executar_consulta("queda_vlQualidadeEsf", "pe", "202508")
+        self.assertEqual(list(df["coMunicipioIbge"]), ["261170", "261180"])
+
+    def test_reindex_replaces_records(self):
+        """Testa que regravar uma resposta não duplica registros."""
+        self.layer.registrar(_resposta("261180", "202508", 6000))
+        self.layer.registrar(_resposta("261180", "202508", 7000, repasse=2000.0))
+
+        df = self.layer.executar_consulta("maiores_repasses", "PE", "202508")
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df["total_repasse"].iloc[0], 3000.0)
+        self.assertEqual(self.layer.competencias(), [("202508", 1)])
+
+    def test_sincronizar_cache(self):
+        """Testa a indexação incremental das entradas do cache."""
+        cache = ResponseCache(cache_dir=os.path.join(self.tmpdir.name, "cache"))
+        cache.put("261180", "202508", _resposta("261180", "202508", 6000))
+
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[]), 1)
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[]), 0)
+
+        cache.put("261160", "202508", _resposta("261160", "202508", 6000))
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[]), 1)
+        self.assertEqual(self.layer.competencias(), [("202508", 2)])
+
+    def test_sincronizar_skips_unchanged_entries(self):
+        """Testa que entradas apenas lidas (mtime renovado) não são decodificadas de novo."""
+        cache = ResponseCache(cache_dir=os.path.join(self.tmpdir.name, "cache"))
+        cache.put("261180", "202508", _resposta("261180", "202508", 6000))
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[]), 1)
+
+        self.assertIsNotNone(cache.get("261180", "202508"))
+        with patch("utils.query_layer.decode_entry") as decode:
+            self.assertEqual(self.layer.sincronizar(cache, diretorios=[]), 0)
+            decode.assert_not_called()
+
+        cache.put("261180", "202508", _resposta("261180", "202508", 7000))
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[]), 1)
+
+    def test_sincronizar_crawler_output(self):
+        """Testa que as respostas coletadas pelo crawler são indexadas além do cache limitado."""
+        cache = ResponseCache(cache_dir=os.path.join(self.tmpdir.name, "cache"), max_entries=1)
+        coleta = os.path.join(self.tmpdir.name, "crawler_output", "202508", "municipios")
+        resultados = ResponseCache(cache_dir=coleta, max_entries=None, ttl=None)
+        for codigo in ("261160", "261170", "261180"):
+            resultados.put(codigo, "202508", _resposta(codigo, "202508", 6000))
+        cache.put("261190", "202508", _resposta("261190", "202508", 6000))
+
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[coleta]), 4)
+        self.assertEqual(self.layer.sincronizar(cache, diretorios=[coleta]), 0)
+        self.assertEqual(self.layer.competencias(), [("202508", 4)])
+
+    def test_invalid_query(self):
+        """Testa parâmetros inválidos."""
+        with self.assertRaises(ValueError):
+            self.layer.executar_consulta("inexistente", "PE", "202508")
+        with self.assertRaises(ValueError):
+            self.layer.executar_consulta("maiores_repasses", "XX", "202508")
+
+    def test_all_queries_run(self):
+        """Testa que todas as consultas prontas são válidas."""
+        self.layer.registrar(_resposta("261180", "202508", 6000))
+        for nome in CONSULTAS_PRONTAS:
+            self.layer.executar_consulta(nome, "PE", "202508", "ESTRATO 1")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
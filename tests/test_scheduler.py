@@ -0,0 +1,120 @@
+"""
+Testes unitários para a atualização agendada da watchlist.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import tempfile
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.exceptions import Timeout
+from utils.api_client import APIResponse
+from utils.cache import ResponseCache
+from utils.scheduler import WatchlistScheduler, carregar_watchlist
+
+
+class _ClientePublicacao:
+    """Cliente simulado em que apenas as competências publicadas têm dados."""
+
+    def __init__(self, publicadas, falhas=(), vazios=()):
+        self.publicadas = set(publicadas)
+        self.falhas = set(falhas)
+        self.vazios = set(vazios)
+        self.chamadas = []
+
+    def fetch(self, params, etag=None, last_modified=None, timeout=30):
+        self.chamadas.append((params["coMunicipio"], params["nuParcelaInicio"]))
+        if params["coMunicipio"] in self.falhas:
+            raise Timeout("timeout simulado")
+        if params["nuParcelaInicio"] not in self.publicadas or params["coMunicipio"] in self.vazios:
+            return APIResponse(200, {"pagamentos": [], "resumosPlanosOrcamentarios": []})
+        return APIResponse(200, {"pagamentos": [{"coMunicipioIbge": params["coMunicipio"],
+                                                 "nuParcela": params["nuParcelaInicio"]}]})
+
+
+class TestWatchlistScheduler(unittest.TestCase):
+    """Testes para a classe WatchlistScheduler."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=os.path.join(self.tmpdir.name, "cache"))
+        self.state_path = os.path.join(self.tmpdir.name, "state.json")
+        self.patcher = patch("utils.async_client.registrar_em_segundo_plano")
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _scheduler(self, client, ultima="202507"):
+        scheduler = WatchlistScheduler(["2611606", "2607208"], self.state_path, self.cache, client)
+        scheduler.state["ultima_parcela"] = ultima
+        return scheduler
+
+    def test_no_new_parcela(self):
+        """Testa que nada é atualizado enquanto a parcela seguinte não é publicada."""
+        client = _ClientePublicacao(publicadas=["202507"])
+        scheduler = self._scheduler(client)
+        for codigo in scheduler.municipios:
+            scheduler.state["atualizacoes"][codigo] = {"nuParcela": "202507"}
+
+        self.assertIsNone(scheduler.executar_ciclo())
+        self.assertEqual(client.chamadas, [("261160", "202508")])
+        self.assertIsNone(self.cache.get("261160", "202508"))
+
+    def test_new_parcela_refreshes_watchlist(self):
+        """Testa a atualização de todos os municípios e o registro de conclusão."""
+        scheduler = self._scheduler(_ClientePublicacao(publicadas=["202508"]))
+
+        resumo = scheduler.executar_ciclo()
+
+        self.assertEqual(resumo["competencia"], "202508")
+        self.assertEqual(resumo["atualizados"], ["260720", "261160"])
+        self.assertEqual(resumo["changeset"]["municipios"], ["260720", "261160"])
+        self.assertIsNotNone(self.cache.get("260720", "202508"))
+        with open(self.state_path, encoding="utf-8") as f:
+            estado = json.load(f)
+        self.assertEqual(estado["ultima_parcela"], "202508")
+        self.assertIn("concluido_em", estado["atualizacoes"]["260720"])
+
+    def test_failures_retried_next_cycle(self):
+        """Testa que municípios com falha são atualizados no ciclo seguinte."""
+        client = _ClientePublicacao(publicadas=["202508"], falhas=["260720"])
+        scheduler = self._scheduler(client)
+        self.assertIn("260720", scheduler.executar_ciclo()["falhas"])
+
+        client.falhas.clear()
+        resumo = scheduler.executar_ciclo()
+        self.assertEqual(resumo["atualizados"], ["260720"])
+        self.assertEqual(scheduler.pendentes(), [])
+
+    def test_empty_response_stays_pending(self):
+        """Testa que municípios sem pagamentos não são marcados como atualizados."""
+        client = _ClientePublicacao(publicadas=["202508"], vazios=["260720"])
+        scheduler = self._scheduler(client)
+
+        resumo = scheduler.executar_ciclo()
+        self.assertEqual(resumo["atualizados"], ["261160"])
+        self.assertEqual(resumo["sem_dados"], ["260720"])
+        self.assertEqual(scheduler.pendentes(), ["260720"])
+
+        client.vazios.clear()
+        resumo = scheduler.executar_ciclo()
+        self.assertEqual(resumo["atualizados"], ["260720"])
+        self.assertEqual(scheduler.pendentes(), [])
+
+    def test_carregar_watchlist(self):
+        """Testa a leitura da watchlist e a conversão do intervalo."""
+        path = os.path.join(self.tmpdir.name, "watchlist.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"municipios": ["2611606", 2607208], "intervalo_minutos": 15}, f)
+        self.assertEqual(carregar_watchlist(path), {"municipios": ["2611606", "2607208"], "intervalo": 900.0})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
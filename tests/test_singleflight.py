@@ -0,0 +1,119 @@
+"""
+Testes unitários para o agrupamento de requisições concorrentes.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.api_client import APIResponse, atualizar_entrada, montar_parametros
+from utils.cache import ResponseCache
+from utils.singleflight import SingleFlight, chave_parametros
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Testes para a classe SingleFlight."""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.chamadas = 0
+        self.liberar = threading.Event()
+
+    def _lenta(self):
+        self.chamadas += 1
+        self.liberar.wait(2)
+        return {"pagamentos": []}
+
+    def test_concurrent_calls_coalesced(self):
+        """Testa que chamadas concorrentes com a mesma chave executam uma única vez."""
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(self.flight.do, "chave", self._lenta) for _ in range(5)]
+            while self.flight.em_andamento() == 0:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            self.liberar.set()
+            resultados = [f.result() for f in futures]
+
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(sum(1 for _, compartilhado in resultados if compartilhado), 4)
+        self.assertTrue(all(r is resultados[0][0] for r, _ in resultados))
+        self.assertEqual(self.flight.em_andamento(), 0)
+
+    def test_sequential_calls_not_cached(self):
+        """Testa que chamadas sequenciais executam novamente."""
+        self.liberar.set()
+        self.flight.do("chave", self._lenta)
+        self.flight.do("chave", self._lenta)
+        self.assertEqual(self.chamadas, 2)
+
+    def test_exception_shared(self):
+        """Testa que a exceção do líder é repassada e a chave é liberada."""
+        def falha():
+            raise ValueError("falha")
+
+        with self.assertRaises(ValueError):
+            self.flight.do("chave", falha)
+        self.assertEqual(self.flight.em_andamento(), 0)
+
+    def test_chave_parametros(self):
+        """Testa que a chave não depende da ordem dos parâmetros."""
+        self.assertEqual(chave_parametros({"a": 1, "b": 2}), chave_parametros({"b": 2, "a": 1}))
+        self.assertNotEqual(chave_parametros({"a": 1}, '"etag"'), chave_parametros({"a": 1}))
+
+
+class TestAtualizarEntrada(unittest.TestCase):
+    """Testes para a atualização do cache a partir da API."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmpdir.name)
+        self.client = MagicMock()
+        self.params = montar_parametros("2611800", "202508")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_atualizado(self):
+        """Testa a gravação de uma resposta nova no cache."""
+        self.client.fetch.return_value = APIResponse(200, {"pagamentos": [{"coMunicipioIbge": "261180"}]}, etag='"v1"')
+
+        status, dados = atualizar_entrada(self.params, "202508", None, self.cache, self.client)
+
+        self.assertEqual(status, "atualizado")
+        entrada = self.cache.get_entry("261180", "202508")
+        self.assertEqual(entrada["dados"], dados)
+        self.assertEqual(entrada["metadata"]["etag"], '"v1"')
+
+    def test_nao_modificado_e_vazio(self):
+        """Testa a revalidação (304) e respostas sem registros."""
+        entrada = {"dados": {"pagamentos": [{"qtEsfCredenciado": 1}]}, "metadata": {"etag": '"v1"'}}
+        self.client.fetch.return_value = APIResponse(304, etag='"v1"')
+        status, dados = atualizar_entrada(self.params, "202508", entrada, self.cache, self.client)
+        self.assertEqual((status, dados), ("nao_modificado", entrada["dados"]))
+        self.assertEqual(self.client.fetch.call_args.kwargs["etag"], '"v1"')
+
+        self.client.fetch.return_value = APIResponse(200, {"pagamentos": []})
+        self.assertEqual(atualizar_entrada(self.params, "202507", None, self.cache, self.client), ("vazio", None))
+
+    def test_reuses_entry_refreshed_by_other_worker(self):
+        """Testa que uma entrada atualizada por outro processo não gera nova requisição."""
+        antiga = {"dados": {"pagamentos": [{"qtEsfCredenciado": 1}]}, "metadata": {}}
+        self.cache.put("261180", "202508", {"pagamentos": [{"qtEsfCredenciado": 2}]})
+
+        status, dados = atualizar_entrada(self.params, "202508", antiga, self.cache, self.client)
+
+        self.assertEqual(status, "atualizado")
+        self.assertEqual(dados["pagamentos"][0]["qtEsfCredenciado"], 2)
+        self.client.fetch.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+"""
+Testes unitários para o gerador de dados sintéticos de pagamentos.
+"""
+
+import unittest
+import json
+import tempfile
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.payment_store import pyarrow_disponivel, PaymentStore
+from utils.synthetic import GeradorPagamentos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _gerador(semente=0):
+    return GeradorPagamentos(
+        semente,
+        anexo_path=os.path.join(RAIZ, "Anexo VI Portaria 3493.csv"),
+        modelo_path=os.path.join(RAIZ, "data_cache.json"),
+        config_path=os.path.join(RAIZ, "config.json"),
+    )
+
+
+class TestGeradorPagamentos(unittest.TestCase):
+    """Testes para a classe GeradorPagamentos."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.gerador = _gerador()
+        with open(os.path.join(RAIZ, "data_cache.json"), encoding="utf-8") as f:
+            cls.modelo = json.load(f)
+
+    def test_all_municipalities(self):
+        """Testa que todos os municípios do Anexo VI são gerados."""
+        self.assertEqual(len(self.gerador.codigos()), 5570)
+        self.assertIsNone(self.gerador.gerar("999999", "202508"))
+
+    def test_deterministic_by_seed(self):
+        """Testa que a mesma semente gera os mesmos dados e outra semente não."""
+        dados = self.gerador.gerar("2611606", "202508")
+        self.assertEqual(dados, _gerador().gerar("261160", "202508"))
+        self.assertNotEqual(dados, _gerador(semente=7).gerar("261160", "202508"))
+
+    def test_field_shapes(self):
+        """Testa que os registros têm os campos do data_cache.json."""
+        dados = self.gerador.gerar("261160", "202508")
+        self.assertEqual(set(dados["pagamentos"][0]), set(self.modelo["pagamentos"][0]))
+        self.assertEqual(set(dados["resumosPlanosOrcamentarios"][0]),
+                         set(self.modelo["resumosPlanosOrcamentarios"][0]))
+
+        pagamento = dados["pagamentos"][0]
+        self.assertEqual((pagamento["sgUf"], pagamento["noMunicipio"], pagamento["nuCompCnes"]),
+                         ("PE", "RECIFE", "202506"))
+        self.assertEqual(pagamento["dsFaixaIndiceEquidadeEsfEap"], "ESTRATO 4")
+
+    def test_values_consistent(self):
+        """Testa a coerência entre quantidades, tarifas e resumos."""
+        dados = self.gerador.gerar("261180", "202508")
+        pagamento = dados["pagamentos"][0]
+        # Estrato 2: R$ 16.000,00 por eSF
+        self.assertEqual(pagamento["vlFixoEsf"], pagamento["qtEsfTotalPgto"] * 16000)
+        self.assertAlmostEqual(pagamento["vlTotalEsf"], pagamento["vlFixoEsf"] + pagamento["vlVinculoEsf"]
+                               + pagamento["vlQualidadeEsf"])
+        self.assertLessEqual(pagamento["qtEsfCredenciado"], pagamento["qtTetoEsf"])
+
+        total_resumos = sum(r["vlEfetivoRepasse"] for r in dados["resumosPlanosOrcamentarios"])
+        self.assertAlmostEqual(total_resumos, pagamento["vlTotalEsf"] + pagamento["vlTotalEap"]
+                               + pagamento["vlPagamentoEsb40h"] + pagamento["vlPagamentoEsb40hQualidade"]
+                               + pagamento["vlTotalEmulti"] + pagamento["vlTotalAcsDireto"]
+                               + pagamento["vlPagamentoIncentivoPopulacional"], places=2)
+
+    def test_salvar_json(self):
+        """Testa o arquivo JSON no formato do data_cache.json."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "sinteticos.json")
+            total = self.gerador.salvar_json(path, "202507", "202508", ["RR"])
+            with open(path, encoding="utf-8") as f:
+                dados = json.load(f)
+
+        self.assertEqual(total, 2 * len(self.gerador.codigos(["RR"])))
+        self.assertEqual(len(dados["pagamentos"]), total)
+        self.assertEqual(len(dados["resumosPlanosOrcamentarios"]), 6 * total)
+        self.assertEqual({r["nuParcela"] for r in dados["pagamentos"]}, {"202507", "202508"})
+
+    @unittest.skipUnless(pyarrow_disponivel(), "pyarrow não instalado")
+    def test_salvar_parquet(self):
+        """Testa a gravação no armazenamento colunar."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            total = self.gerador.salvar_parquet(tmpdir, "202508", "202508", ["AC"])
+            df = PaymentStore(tmpdir).carregar_pagamentos(uf="AC", competencia="202508")
+        self.assertEqual(len(df), total)
+        self.assertEqual(total, len(self.gerador.codigos(["AC"])))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,98 @@
+"""
+Testes unitários para as tabelas de tarifas compiladas do config.json.
+"""
+
+import unittest
+import json
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tariffs import TabelasTarifas
+
+VINCULO = {'eSF': {'Ótimo': 8000, 'Bom': 6000, 'Suficiente': 4000, 'Regular': 2000}}
+
+CONFIG = {
+    "data": {
+        "eSF": {"quantidade": 1, "valor": "Sem cálculo"},
+        "eMULTI Ampl.": {"quantidade": 1, "valor": "R$ 36.000,00"},
+        "ACS": {"quantidade": 1, "valor": "R$ 3.036,00"},
+    },
+    "quality_values": {"eSF": {"Ótimo": 8000, "Bom": 6000}, "eMULTI Ampl.": {"Bom": 6750}},
+    "fixed_component_values": {"1": {"eSF": "R$ 18.000,00"}, "2": {"eSF": "R$ 16.000,00", "eAP 30h": "R$ 9.600,00"}},
+    "implantacao_values": {"eSF": "R$ 30.000,00", "eMulti Ampliada": "R$ 36.000,00"},
+}
+
+
+class TestTabelasTarifas(unittest.TestCase):
+    """Testes para a classe TabelasTarifas."""
+
+    def setUp(self):
+        self.tarifas = TabelasTarifas(CONFIG, VINCULO)
+
+    def test_fixed_by_estrato(self):
+        """Testa o componente fixo por (serviço, estrato)."""
+        self.assertEqual(self.tarifas.valor_fixo("eSF", "1"), 18000.0)
+        self.assertEqual(self.tarifas.valor_fixo("eSF", "2"), 16000.0)
+        self.assertEqual(self.tarifas.valor_fixo("eAP 30h", "1"), 0.0)
+        # eMulti usa o valor de custeio em qualquer estrato
+        self.assertEqual(self.tarifas.valor_fixo("eMULTI Ampl.", "2"), 36000.0)
+        self.assertEqual(self.tarifas.valor_fixo("eMULTI Ampl.", "9"), 36000.0)
+        self.assertEqual(self.tarifas.valor_fixo("ACS", "1"), 0.0)
+        self.assertEqual(self.tarifas.valor_fixo("Inexistente", "1"), 0.0)
+
+    def test_service_and_implantacao_values(self):
+        """Testa os valores de data[*].valor e de implantação."""
+        self.assertEqual(self.tarifas.valor_servico("ACS"), 3036.0)
+        self.assertEqual(self.tarifas.valor_servico("eSF"), 0.0)
+        self.assertEqual(self.tarifas.valor_implantacao("eSF"), 30000.0)
+        self.assertEqual(self.tarifas.valor_implantacao("eMULTI Ampl."), 36000.0)
+        self.assertEqual(self.tarifas.valor_implantacao("ACS"), 0.0)
+
+    def test_quality_and_vinculo(self):
+        """Testa os componentes por (serviço, classificação) e (serviço, vínculo)."""
+        self.assertEqual(self.tarifas.valor_qualidade("eSF", "Bom"), 6000.0)
+        self.assertEqual(self.tarifas.valor_qualidade("eMULTI Ampl.", "Ótimo"), 0.0)
+        self.assertEqual(self.tarifas.valor_vinculo("eSF", "Regular"), 2000.0)
+        self.assertEqual(self.tarifas.valor_vinculo("eSF", "Inválido"), 0.0)
+
+    def test_dense_tables(self):
+        """Testa o formato das matrizes densas."""
+        total = len(self.tarifas.servicos)
+        self.assertEqual(self.tarifas.fixo.shape, (total, 2))
+        self.assertEqual(self.tarifas.qualidade.shape, (total, 4))
+        linha = self.tarifas.indice_servico["eSF"]
+        self.assertEqual(list(self.tarifas.fixo[linha]), [18000.0, 16000.0])
+
+    def test_invalid_values_reported(self):
+        """Testa que valores inválidos valem 0 e ficam registrados com a origem no config.json."""
+        config = json.loads(json.dumps(CONFIG))
+        config["data"]["ACS"]["valor"] = "R$ três mil"
+        config["fixed_component_values"]["1"]["eSF"] = "abc"
+        config["implantacao_values"]["eMulti Ampliada"] = None
+        tarifas = TabelasTarifas(config, VINCULO)
+
+        self.assertEqual(tarifas.valor_servico("ACS"), 0.0)
+        self.assertIn("R$ três mil", tarifas.erro("ACS", "valor"))
+        self.assertEqual(tarifas.valor_fixo("eSF", "1"), 0.0)
+        self.assertIn('fixed_component_values["1"]["eSF"]', tarifas.erro("eSF", "fixo"))
+        self.assertIsNone(tarifas.erro("eSF", "implantacao"))
+        self.assertIsNone(tarifas.erro("eSF", "valor"))
+        self.assertIn("ausente", tarifas.erro("eMULTI Compl.", "valor"))
+        self.assertIsNone(self.tarifas.erro("ACS", "valor"))
+
+    def test_matches_config_file(self):
+        """Testa as tabelas compiladas do config.json do projeto."""
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(raiz, "config.json"), encoding="utf-8") as f:
+            config = json.load(f)
+        tarifas = TabelasTarifas(config)
+        self.assertEqual(tarifas.valor_fixo("eSF", "4"), 12000.0)
+        self.assertEqual(tarifas.valor_implantacao("eMULTI Estrat."), 12000.0)
+        self.assertEqual(tarifas.valor_qualidade("eSB Comum I", "Bom"), 1836.75)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
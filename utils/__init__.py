@@ -27,6 +27,9 @@ from utils.data import (
     extrair_informacoes_municipio
 )
 
+# Importações do cache de respostas da API
+from utils.cache import ResponseCache, get_response_cache
+
 # Lista de funções e constantes exportadas
 __all__ = [
     # Funções de formatação
@@ -48,5 +51,9 @@ __all__ = [
     "consultar_api",
     "DATA_FILE",
     "validar_dados_municipio",
-    "extrair_informacoes_municipio"
+    "extrair_informacoes_municipio",
+    
+    # Cache de respostas da API
+    "ResponseCache",
+    "get_response_cache"
 ]
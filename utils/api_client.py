@@ -4,24 +4,93 @@ Módulo para comunicação com APIs externas e gerenciamento de dados relacionad
 import streamlit as st
 import requests
 import json
+import copy
+import os
+import tempfile
 import time
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterator, Tuple
 from requests.exceptions import RequestException, Timeout, ConnectionError
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from .cache import ResponseCache, get_response_cache
+from .json_stream import CHUNK_SIZE, ParticaoSink, Sink, iterar_json_stream, processar_json_stream
+from .archive import arquivar_resposta
+from .payment_store import registrar_em_segundo_plano
+from .singleflight import SingleFlight, chave_parametros
+from .circuit_breaker import CircuitBreaker, CircuitoAbertoError
+from .hedging import HedgePolicy
 
-# Nome do arquivo JSON para armazenar os dados da API
+# Endpoint de pagamentos (PAP_API_URL permite apontar para um servidor local, ver utils/api_stub.py)
+API_URL = os.environ.get("PAP_API_URL", "https://relatorioaps-prd.saude.gov.br/financiamento/pagamento")
+
+# Nome do arquivo JSON legado com a última consulta (mantido apenas para leitura)
 DATA_FILE = "data_cache.json"
 
+# Chave do session_state com a consulta atualmente carregada
+CONSULTA_ATUAL_KEY = "consulta_atual"
+
+# Tamanho do pool de conexões keep-alive compartilhado entre as sessões do Streamlit
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# Requisições com hedge nas consultas interativas (ver utils/hedging.py).
+# Coletas em lote (crawler, scheduler, prefetch) nunca usam hedge: as
+# duplicatas não passam pelo limite de taxa delas.
+HEDGING_ATIVO = False
+
+# Entradas expiradas são exibidas imediatamente e atualizadas em segundo plano
+STALE_WHILE_REVALIDATE = True
+
+# Threads dedicadas às atualizações em segundo plano
+REVALIDACAO_WORKERS = 2
+
+# Espera máxima (segundos) pelo lock de uma chave ocupada por outro worker
+LOCK_TIMEOUT = 90
+
+# Validade (segundos) do registro de competências sem dados em buscar_periodo
+TTL_MES_VAZIO = 60 * 60
+
+@dataclass
+class APIResponse:
+    """Resultado de uma requisição à API, incluindo validadores HTTP."""
+    status_code: int
+    dados: Optional[Dict[str, Any]] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        """Indica se o servidor respondeu 304 (conteúdo inalterado)."""
+        return self.status_code == 304
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Validadores para revalidação condicional futura."""
+        validators = {}
+        if self.etag:
+            validators["etag"] = self.etag
+        if self.last_modified:
+            validators["last_modified"] = self.last_modified
+        return validators
+
 class APIClient:
     """Cliente robusto para comunicação com a API de financiamento da saúde."""
     
-    def __init__(self):
-        self.base_url = "https://relatorioaps-prd.saude.gov.br/financiamento/pagamento"
+    def __init__(self, pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                 breaker: Optional[CircuitBreaker] = None, hedge_policy: Optional[HedgePolicy] = None,
+                 base_url: Optional[str] = None):
+        self.base_url = base_url or API_URL
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_policy = hedge_policy
         self.session = self._create_session()
     
     def _create_session(self) -> requests.Session:
-        """Cria uma sessão HTTP com configurações de retry e timeout."""
+        """Cria uma sessão HTTP com configurações de retry, timeout e pool de conexões."""
         session = requests.Session()
         
         # Configurar estratégia de retry
@@ -31,7 +100,11 @@ class APIClient:
             status_forcelist=[429, 500, 502, 503, 504],
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
@@ -43,24 +116,228 @@ class APIClient:
         
         return session
     
+    def fetch(self, params: Dict[str, str], etag: Optional[str] = None,
+              last_modified: Optional[str] = None, timeout: float = 30) -> APIResponse:
+        """
+        Executa uma requisição à API, com revalidação condicional opcional.
+
+        Args:
+            params: Parâmetros da consulta
+            etag: ETag de uma resposta anterior (If-None-Match)
+            last_modified: Last-Modified de uma resposta anterior (If-Modified-Since)
+            timeout: Tempo limite da requisição em segundos
+
+        Com uma política de hedge configurada, uma requisição duplicada é
+        disparada se a resposta demorar mais que o atraso da política.
+
+        Returns:
+            APIResponse: Resposta com os dados (None se 304) e os novos validadores
+
+        Raises:
+            requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+                (CircuitoAbertoError se a API estiver marcada como indisponível)
+            json.JSONDecodeError: Se o corpo da resposta não for JSON válido
+        """
+        if self.hedge_policy is not None:
+            return self.hedge_policy.executar(lambda: self._fetch_once(params, etag, last_modified, timeout))
+        return self._fetch_once(params, etag, last_modified, timeout)
+
+    def _fetch_once(self, params: Dict[str, str], etag: Optional[str],
+                    last_modified: Optional[str], timeout: float) -> APIResponse:
+        """Executa uma única requisição (ver fetch)."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        with self.breaker.proteger():
+            response = self.session.get(
+                self.base_url,
+                params=params,
+                headers=headers,
+                timeout=timeout,
+                verify=True
+            )
+
+            if response.status_code == 304:
+                return APIResponse(
+                    status_code=304,
+                    etag=response.headers.get("ETag", etag),
+                    last_modified=response.headers.get("Last-Modified", last_modified)
+                )
+
+            response.raise_for_status()
+            return APIResponse(
+                status_code=response.status_code,
+                dados=response.json(),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+    
+    def fetch_stream(self, params: Dict[str, str], timeout: float = 120) -> Iterator[Tuple[str, Any]]:
+        """
+        Executa uma requisição à API e percorre a resposta incrementalmente.
+
+        Indicado para respostas grandes (UF inteira ou várias competências):
+        os registros são entregues um a um, sem materializar a resposta.
+
+        Args:
+            params: Parâmetros da consulta
+            timeout: Tempo limite da requisição em segundos
+
+        Yields:
+            Tuple[str, Any]: (seção, registro) para pagamentos e resumos e
+            (campo, valor) para os demais campos da resposta
+
+        Raises:
+            requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+            json.JSONDecodeError: Se o corpo da resposta não for JSON válido
+        """
+        with self.breaker.proteger(), self.session.get(self.base_url, params=params, timeout=timeout,
+                                                      verify=True, stream=True) as response:
+            response.raise_for_status()
+            yield from iterar_json_stream(response.iter_content(chunk_size=CHUNK_SIZE))
+
+    def fetch_to_sink(self, params: Dict[str, str], sink: Sink, timeout: float = 120) -> Dict[str, Any]:
+        """
+        Executa uma requisição e entrega cada registro a um destino do chamador
+        (arquivo, banco de dados ou função), com memória limitada.
+
+        Returns:
+            Dict: Campos escalares da resposta, a contagem de registros por seção
+            e as seções presentes (ver processar_json_stream)
+        """
+        with self.breaker.proteger(), self.session.get(self.base_url, params=params, timeout=timeout,
+                                                      verify=True, stream=True) as response:
+            response.raise_for_status()
+            return processar_json_stream(response.iter_content(chunk_size=CHUNK_SIZE), sink)
+    
     def validar_dados_api(self, dados: Dict[Any, Any]) -> bool:
         """Valida se os dados retornados da API estão no formato esperado."""
-        if not isinstance(dados, dict):
-            return False
-        
-        # Verificar se contém pelo menos uma das chaves esperadas
-        expected_keys = ['resumosPlanosOrcamentarios', 'pagamentos']
-        return any(key in dados for key in expected_keys)
+        return validar_dados_api(dados)
+
+def validar_dados_api(dados: Dict[Any, Any]) -> bool:
+    """Valida se os dados retornados da API estão no formato esperado."""
+    if not isinstance(dados, dict):
+        return False
+    
+    # Verificar se contém pelo menos uma das chaves esperadas
+    expected_keys = ['resumosPlanosOrcamentarios', 'pagamentos']
+    return any(key in dados for key in expected_keys)
+
+def montar_parametros(codigo_ibge: str, competencia: str, tipo_relatorio: str = "COMPLETO",
+                      competencia_fim: Optional[str] = None) -> Dict[str, str]:
+    """
+    Monta os parâmetros de consulta de um município para uma competência
+    ou, com competencia_fim, para um intervalo de competências.
+
+    Args:
+        codigo_ibge: Código IBGE do município (6 ou 7 dígitos)
+        competencia: Competência (inicial) no formato AAAAMM
+        tipo_relatorio: Tipo de relatório solicitado
+        competencia_fim: Competência final do intervalo (padrão: a própria competência)
 
-def load_data_from_json() -> Dict[str, Any]:
-    """Carrega os dados do arquivo JSON de cache. Retorna um dicionário vazio se o arquivo não existir."""
+    Returns:
+        Dict: Parâmetros aceitos pelo endpoint de pagamentos
+    """
+    return {
+        "unidadeGeografica": "MUNICIPIO",
+        "coUf": codigo_ibge[:2],
+        "coMunicipio": codigo_ibge[:6],
+        "nuParcelaInicio": competencia,
+        "nuParcelaFim": competencia_fim or competencia,
+        "tipoRelatorio": tipo_relatorio
+    }
+
+def deslocar_competencia(competencia: str, meses: int) -> str:
+    """
+    Soma (ou subtrai, se negativo) meses a uma competência AAAAMM.
+
+    Args:
+        competencia: Competência no formato AAAAMM
+        meses: Número de meses a deslocar
+
+    Returns:
+        str: Nova competência no formato AAAAMM
+    """
+    indice = int(competencia[:4]) * 12 + int(competencia[4:]) - 1 + meses
+    return f"{indice // 12:04d}{indice % 12 + 1:02d}"
+
+def listar_competencias(inicio: str, fim: str) -> List[str]:
+    """Lista as competências AAAAMM de inicio a fim, inclusive."""
+    competencias = []
+    atual = inicio
+    while atual <= fim:
+        competencias.append(atual)
+        atual = deslocar_competencia(atual, 1)
+    return competencias
+
+def montar_parametros_uf(co_uf: str, competencia: str, tipo_relatorio: str = "COMPLETO") -> Dict[str, str]:
+    """
+    Monta os parâmetros de consulta de uma UF inteira para uma competência.
+
+    Args:
+        co_uf: Código IBGE da UF (2 dígitos)
+        competencia: Competência no formato AAAAMM
+        tipo_relatorio: Tipo de relatório solicitado
+
+    Returns:
+        Dict: Parâmetros aceitos pelo endpoint de pagamentos
+    """
+    return {
+        "unidadeGeografica": "ESTADO",
+        "coUf": co_uf[:2],
+        "nuParcelaInicio": competencia,
+        "nuParcelaFim": competencia,
+        "tipoRelatorio": tipo_relatorio
+    }
+
+_api_client: Optional[APIClient] = None
+_hedge_policy: Optional[HedgePolicy] = None
+_api_client_lock = threading.Lock()
+
+def get_api_client(hedge_policy: Optional[HedgePolicy] = None) -> APIClient:
+    """
+    Retorna o cliente HTTP compartilhado pelo processo.
+
+    A sessão, o adaptador de retry e as conexões TLS são criados uma única vez
+    e reutilizados por todas as sessões do Streamlit. O cliente compartilhado
+    não usa hedge; quem quiser hedge informa a política explicitamente.
+
+    Args:
+        hedge_policy: Política de hedge (padrão: sem hedge)
+
+    Returns:
+        APIClient: Instância compartilhada e thread-safe do cliente, ou uma
+        cópia com hedge que usa a mesma sessão e o mesmo circuit breaker
+    """
+    global _api_client
+    with _api_client_lock:
+        if _api_client is None:
+            _api_client = APIClient()
+    if hedge_policy is None:
+        return _api_client
+    client = copy.copy(_api_client)
+    client.hedge_policy = hedge_policy
+    return client
+
+def get_hedge_policy() -> HedgePolicy:
+    """Retorna a política de hedge compartilhada pelas consultas interativas."""
+    global _hedge_policy
+    with _api_client_lock:
+        if _hedge_policy is None:
+            _hedge_policy = HedgePolicy(max_workers=POOL_MAXSIZE)
+        return _hedge_policy
+
+def _load_legacy_data_file() -> Dict[str, Any]:
+    """Carrega o arquivo JSON legado de cache. Retorna um dicionário vazio se o arquivo não existir."""
     try:
         with open(DATA_FILE, "r", encoding="utf-8") as f:
             dados = json.load(f)
             
         # Validar dados carregados
-        api_client = APIClient()
-        if not api_client.validar_dados_api(dados):
+        if not validar_dados_api(dados):
             st.warning("⚠️ Dados em cache podem estar corrompidos.")
             return {}
             
@@ -71,8 +348,290 @@ def load_data_from_json() -> Dict[str, Any]:
         st.warning("⚠️ Erro ao decodificar o arquivo de cache. O arquivo pode estar corrompido.")
         return {}
 
+def load_data_from_json(codigo_ibge: Optional[str] = None, competencia: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Carrega os dados de uma consulta a partir do cache local.
+
+    Sem parâmetros, carrega a consulta atual da sessão; se não houver,
+    recorre ao arquivo legado DATA_FILE.
+
+    Args:
+        codigo_ibge: Código IBGE do município (opcional)
+        competencia: Competência no formato AAAAMM (opcional)
+
+    Returns:
+        Dict: Dados carregados ou dicionário vazio
+    """
+    if not (codigo_ibge and competencia):
+        consulta_atual = st.session_state.get(CONSULTA_ATUAL_KEY) or {}
+        codigo_ibge = consulta_atual.get("coMunicipio")
+        competencia = consulta_atual.get("nuParcela")
+
+    if codigo_ibge and competencia:
+        dados = get_response_cache().get(codigo_ibge[:6], competencia, allow_expired=True)
+        if dados:
+            return dados
+
+    return _load_legacy_data_file()
+
+def baixar_particoes(client: APIClient, params: Dict[str, str], campos: Tuple[str, ...],
+                     timeout: float = 120) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    Obtém uma resposta agregada e a divide por partição sem materializá-la.
+
+    Cada registro é gravado no arquivo temporário da sua partição assim que
+    chega (ver ParticaoSink); em seguida as partições são entregues uma a uma.
+
+    Args:
+        client: Cliente HTTP
+        params: Parâmetros da consulta
+        campos: Campos que formam a chave de partição
+        timeout: Tempo limite da requisição em segundos
+
+    Yields:
+        Tuple: (chave de partição, resposta parcial no formato da API)
+
+    Raises:
+        requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+        ValueError: Se a resposta não contiver nenhuma das seções esperadas
+    """
+    with tempfile.TemporaryDirectory(prefix="particoes_") as diretorio, ParticaoSink(diretorio, campos) as sink:
+        cabecalho = client.fetch_to_sink(params, sink, timeout=timeout)
+        cabecalho.pop("_contagem", None)
+        # Seções vazias ou nulas são válidas: apenas não geram partições
+        if not cabecalho.pop("_secoes", None):
+            raise ValueError("Dados recebidos da API estão em formato inválido.")
+        yield from sink.particoes(cabecalho)
+
+# Competências sem registros na API: (coMunicipio, competência) -> horário da consulta
+_meses_vazios: Dict[Tuple[str, str], float] = {}
+_meses_vazios_lock = threading.Lock()
+
+def _registrar_mes_vazio(co_municipio: str, competencia: str) -> None:
+    """Lembra que a API não retornou registros para o município na competência."""
+    with _meses_vazios_lock:
+        _meses_vazios[(co_municipio, competencia)] = time.time()
+
+def _mes_vazio(co_municipio: str, competencia: str) -> bool:
+    """Indica se a competência foi consultada sem registros há menos de TTL_MES_VAZIO segundos."""
+    with _meses_vazios_lock:
+        consultado_em = _meses_vazios.get((co_municipio, competencia))
+        if consultado_em is None:
+            return False
+        if time.time() - consultado_em > TTL_MES_VAZIO:
+            del _meses_vazios[(co_municipio, competencia)]
+            return False
+        return True
+
+def buscar_periodo(codigo_ibge: str, inicio: str, fim: str, cache: Optional[ResponseCache] = None,
+                   client: Optional[APIClient] = None, timeout: float = 60) -> Dict[str, Dict[str, Any]]:
+    """
+    Obtém um intervalo de competências de um município com uma única requisição.
+
+    Competências já presentes e válidas no cache não provocam requisição; se
+    alguma faltar, apenas o trecho entre a primeira e a última ausentes é
+    consultado, de uma vez, e cada mês é gravado como uma entrada própria do
+    cache. Meses que a API retornou sem registros são lembrados por
+    TTL_MES_VAZIO segundos, para não repetir a consulta a cada exibição.
+
+    Args:
+        codigo_ibge: Código IBGE do município
+        inicio: Competência inicial no formato AAAAMM
+        fim: Competência final no formato AAAAMM
+        cache: Cache de respostas (padrão: cache compartilhado)
+        client: Cliente HTTP (padrão: cliente compartilhado do processo)
+        timeout: Tempo limite da requisição em segundos
+
+    Returns:
+        Dict: Competência -> dados do mês (meses sem registros são omitidos)
+
+    Raises:
+        requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+        ValueError: Se a resposta não estiver no formato esperado
+    """
+    cache = cache or get_response_cache()
+    competencias = listar_competencias(inicio, fim)
+
+    historico = {}
+    faltantes = []
+    for competencia in competencias:
+        dados = cache.get(codigo_ibge[:6], competencia)
+        if dados:
+            historico[competencia] = dados
+        elif not _mes_vazio(codigo_ibge[:6], competencia):
+            faltantes.append(competencia)
+    if not faltantes:
+        return historico
+
+    client = client or get_api_client()
+    params = montar_parametros(codigo_ibge, faltantes[0], competencia_fim=faltantes[-1])
+    recebidas = set()
+
+    for competencia, dados in baixar_particoes(client, params, ("nuParcela",), timeout=timeout):
+        if competencia not in faltantes:
+            continue
+        recebidas.add(competencia)
+        cache.put(params["coMunicipio"], competencia, dados, params["tipoRelatorio"])
+        historico[competencia] = dados
+        registrar_em_segundo_plano(dados)
+        arquivar_resposta(params["coMunicipio"], competencia, dados)
+
+    for competencia in faltantes:
+        if competencia not in recebidas:
+            _registrar_mes_vazio(params["coMunicipio"], competencia)
+
+    return dict(sorted(historico.items()))
+
+def consultar_historico(codigo_ibge: str, inicio: str, fim: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Consulta o histórico de competências de um município para exibição.
+
+    Versão de buscar_periodo com mensagens de erro no Streamlit.
+
+    Returns:
+        Dict: Competência -> dados do mês, ou dicionário vazio em caso de erro
+    """
+    for competencia in (inicio, fim):
+        if len(competencia) != 6 or not competencia.isdigit():
+            st.error("❌ Competência deve estar no formato AAAAMM (6 dígitos).")
+            return {}
+    if inicio > fim:
+        st.error("❌ A competência inicial deve ser anterior à final.")
+        return {}
+
+    try:
+        return buscar_periodo(codigo_ibge, inicio, fim)
+    except Timeout:
+        st.error("⏱️ Timeout na consulta à API. Tente novamente em alguns minutos.")
+    except ConnectionError:
+        st.error("🌐 Erro de conexão. Verifique sua conexão com a internet.")
+    except CircuitoAbertoError:
+        st.error("🚧 A API está indisponível após falhas consecutivas. Tente novamente em alguns minutos.")
+    except RequestException as e:
+        st.error(f"❌ Erro na consulta à API: {str(e)}")
+    except ValueError:
+        st.error("❌ Dados recebidos da API estão em formato inválido.")
+    return {}
+
+# Requisições em andamento compartilhadas entre as sessões do processo
+_consultas_em_andamento = SingleFlight()
+
+def atualizar_entrada(params: Dict[str, str], competencia: str, entrada: Optional[Dict[str, Any]],
+                      cache: ResponseCache, client: Optional[APIClient] = None,
+                      baixa_prioridade: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Consulta a API e atualiza o cache de um município/competência.
+
+    Entradas expiradas são revalidadas com os validadores HTTP armazenados.
+    A atualização ocorre sob o lock da chave no cache: se outro processo a
+    atualizou enquanto este aguardava, a entrada gravada é reutilizada sem
+    nova requisição. Se o lock não for obtido dentro de LOCK_TIMEOUT, a
+    entrada atual (mesmo expirada) é servida sem gravar no cache; sem entrada,
+    a API é consultada e a resposta é retornada sem ser gravada.
+
+    Args:
+        params: Parâmetros da consulta (ver montar_parametros)
+        competencia: Competência no formato AAAAMM
+        entrada: Entrada atual do cache, se houver (mesmo expirada)
+        cache: Cache de respostas a atualizar
+        client: Cliente HTTP (padrão: cliente compartilhado do processo)
+        baixa_prioridade: Grava a entrada com baixa prioridade no descarte
+            LRU (ver ResponseCache.put)
+
+    Returns:
+        Tuple[str, Optional[Dict]]: (situação, dados), onde a situação é
+        "atualizado", "nao_modificado", "invalido", "vazio" ou "ocupado"
+        (entrada atual servida sem atualização, pois o lock não foi obtido)
+
+    Raises:
+        requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+    """
+    with cache.lock(params["coMunicipio"], competencia, params["tipoRelatorio"], timeout=LOCK_TIMEOUT) as obtido:
+        atual = cache.get_entry(params["coMunicipio"], competencia, params["tipoRelatorio"], allow_expired=True)
+        if atual and not cache.is_expired(atual):
+            # Atualizada por outro processo enquanto aguardávamos o lock
+            return "atualizado", atual["dados"]
+        entrada = atual or entrada
+        if not obtido and entrada:
+            # Outro processo ainda atualiza a chave: servir a entrada atual sem gravar
+            return "ocupado", entrada["dados"]
+
+        client = client or get_api_client()
+        validators = entrada.get("metadata", {}) if entrada else {}
+
+        resposta = client.fetch(
+            params,
+            etag=validators.get("etag"),
+            last_modified=validators.get("last_modified"),
+            timeout=30
+        )
+
+        if resposta.not_modified:
+            # Conteúdo inalterado: renovar a validade da entrada existente
+            cache.put(params["coMunicipio"], competencia, entrada["dados"], params["tipoRelatorio"],
+                      metadata=resposta.validators or validators, baixa_prioridade=baixa_prioridade)
+            return "nao_modificado", entrada["dados"]
+
+        dados = resposta.dados
+        if not validar_dados_api(dados):
+            return "invalido", None
+        if not dados.get('resumosPlanosOrcamentarios') and not dados.get('pagamentos'):
+            return "vazio", None
+
+        if obtido:
+            cache.put(params["coMunicipio"], competencia, dados, params["tipoRelatorio"],
+                      metadata=resposta.validators, baixa_prioridade=baixa_prioridade)
+        registrar_em_segundo_plano(dados)
+        arquivar_resposta(params["coMunicipio"], competencia, dados)
+        return "atualizado", dados
+
+_revalidacao_executor = ThreadPoolExecutor(max_workers=REVALIDACAO_WORKERS, thread_name_prefix="revalidacao")
+
+def atualizar_se_expirada(params: Dict[str, str], competencia: str, cache: ResponseCache,
+                          client: Optional[APIClient] = None, baixa_prioridade: bool = False) -> Optional[str]:
+    """
+    Atualiza uma entrada ausente ou expirada do cache; falhas mantêm a entrada antiga.
+
+    Usada pela revalidação e pelo prefetch em segundo plano (este com
+    baixa_prioridade, ver atualizar_entrada). Consultas simultâneas com os
+    mesmos parâmetros compartilham a requisição.
+
+    Returns:
+        Optional[str]: Situação da atualização (ver atualizar_entrada), ou
+        None se não foi necessária ou falhou
+    """
+    entrada = cache.get_entry(params["coMunicipio"], competencia, allow_expired=True)
+    if entrada and not cache.is_expired(entrada):
+        # Já atualizada por outra sessão ou revalidação anterior
+        return None
+    validators = entrada.get("metadata", {}) if entrada else {}
+    try:
+        (status, _), _ = _consultas_em_andamento.do(
+            chave_parametros(params, validators.get("etag"), validators.get("last_modified")),
+            lambda: atualizar_entrada(params, competencia, entrada, cache, client, baixa_prioridade)
+        )
+        return status
+    except (RequestException, ValueError):
+        return None
+
+def revalidar_em_segundo_plano(params: Dict[str, str], competencia: str,
+                               cache: Optional[ResponseCache] = None) -> Future:
+    """
+    Agenda a atualização de uma entrada do cache sem bloquear o chamador.
+
+    Args:
+        params: Parâmetros da consulta (ver montar_parametros)
+        competencia: Competência no formato AAAAMM
+        cache: Cache de respostas (padrão: cache compartilhado)
+
+    Returns:
+        Future: Situação da atualização (ver atualizar_entrada), ou None se
+        não foi necessária ou falhou
+    """
+    return _revalidacao_executor.submit(atualizar_se_expirada, params, competencia, cache or get_response_cache())
+
 def consultar_api(codigo_ibge: str, competencia: str) -> Optional[Dict[str, Any]]:
-    """Consulta a API de financiamento da saúde e salva os dados em um arquivo JSON."""
+    """Consulta a API de financiamento da saúde, usando e alimentando o cache local."""
     
     # Validar parâmetros de entrada
     if not codigo_ibge or not competencia:
@@ -91,16 +650,26 @@ def consultar_api(codigo_ibge: str, competencia: str) -> Optional[Dict[str, Any]
     if 'competencia' in st.session_state:
         st.session_state['competencia'] = competencia
 
-    api_client = APIClient()
-    
-    params = {
-        "unidadeGeografica": "MUNICIPIO",
-        "coUf": codigo_ibge[:2],
-        "coMunicipio": codigo_ibge[:6],
-        "nuParcelaInicio": competencia,
-        "nuParcelaFim": competencia,
-        "tipoRelatorio": "COMPLETO"
-    }
+    cache = get_response_cache()
+    entrada = cache.get_entry(codigo_ibge[:6], competencia, allow_expired=True)
+    if entrada and not cache.is_expired(entrada):
+        st.session_state[CONSULTA_ATUAL_KEY] = {"coMunicipio": codigo_ibge[:6], "nuParcela": competencia}
+        st.success(f"✅ Dados da competência {competencia} para o IBGE {codigo_ibge} carregados do cache local.")
+        return entrada["dados"]
+
+    params = montar_parametros(codigo_ibge, competencia)
+
+    if entrada and STALE_WHILE_REVALIDATE:
+        # Exibe a entrada expirada de imediato e a revalida em segundo plano
+        revalidar_em_segundo_plano(params, competencia, cache)
+        st.session_state[CONSULTA_ATUAL_KEY] = {"coMunicipio": params["coMunicipio"], "nuParcela": competencia}
+        st.info(f"🔄 Dados da competência {competencia} para o IBGE {codigo_ibge} carregados do cache local; "
+                "a atualização está sendo feita em segundo plano.")
+        return entrada["dados"]
+
+    # Entradas expiradas são revalidadas com os validadores HTTP armazenados
+    validators = entrada.get("metadata", {}) if entrada else {}
+    client = get_api_client(get_hedge_policy()) if HEDGING_ATIVO else None
     
     try:
         # Mostrar progresso
@@ -110,42 +679,37 @@ def consultar_api(codigo_ibge: str, competencia: str) -> Optional[Dict[str, Any]
         status_text.text("🔄 Conectando à API...")
         progress_bar.progress(25)
         
-        # Fazer requisição com timeout
-        response = api_client.session.get(
-            api_client.base_url, 
-            params=params, 
-            timeout=30,
-            verify=True  # Removido verify=False por segurança
+        # Sessões concorrentes com os mesmos parâmetros compartilham uma única requisição
+        (status, dados), compartilhado = _consultas_em_andamento.do(
+            chave_parametros(params, validators.get("etag"), validators.get("last_modified")),
+            lambda: atualizar_entrada(params, competencia, entrada, cache, client)
         )
         
-        progress_bar.progress(50)
-        status_text.text("📥 Recebendo dados...")
-        
-        response.raise_for_status()
-        dados = response.json()
-        
         progress_bar.progress(75)
         status_text.text("✅ Validando dados...")
         
-        # Validar dados recebidos
-        if not api_client.validar_dados_api(dados):
+        if status == "invalido":
             st.error("❌ Dados recebidos da API estão em formato inválido.")
             return None
         
-        # Verificar se há dados relevantes
-        resumos = dados.get('resumosPlanosOrcamentarios', [])
-        pagamentos = dados.get('pagamentos', [])
-        
-        if not resumos and not pagamentos:
+        if status == "vazio":
             st.warning("⚠️ Nenhum dado encontrado para os parâmetros informados.")
             return None
         
-        progress_bar.progress(90)
-        status_text.text("💾 Salvando cache...")
+        st.session_state[CONSULTA_ATUAL_KEY] = {"coMunicipio": params["coMunicipio"], "nuParcela": competencia}
         
-        # Salvar dados em cache
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=4)
+        if status == "nao_modificado":
+            progress_bar.empty()
+            status_text.empty()
+            st.success(f"✅ Dados da competência {competencia} para o IBGE {codigo_ibge} revalidados (sem alterações).")
+            return dados
+
+        if status == "ocupado":
+            progress_bar.empty()
+            status_text.empty()
+            st.info(f"⏳ Os dados da competência {competencia} estão sendo atualizados por outra sessão; "
+                    "exibindo a versão em cache.")
+            return dados
         
         progress_bar.progress(100)
         status_text.text("✅ Consulta concluída com sucesso!")
@@ -155,7 +719,8 @@ def consultar_api(codigo_ibge: str, competencia: str) -> Optional[Dict[str, Any]
         progress_bar.empty()
         status_text.empty()
         
-        st.success(f"✅ Dados da competência {competencia} para o IBGE {codigo_ibge} consultados com sucesso!")
+        origem = " (requisição compartilhada com outra sessão)" if compartilhado else ""
+        st.success(f"✅ Dados da competência {competencia} para o IBGE {codigo_ibge} consultados com sucesso!{origem}")
         return dados
         
     except Timeout:
@@ -167,6 +732,9 @@ def consultar_api(codigo_ibge: str, competencia: str) -> Optional[Dict[str, Any]
     except requests.exceptions.SSLError:
         st.error("🔒 Erro de certificado SSL. Verifique a configuração do servidor.")
         return None
+    except CircuitoAbertoError:
+        st.error("🚧 A API está indisponível após falhas consecutivas. Tente novamente em alguns minutos.")
+        return None
     except RequestException as e:
         st.error(f"❌ Erro na consulta à API: {str(e)}")
         return None
@@ -0,0 +1,353 @@
+"""
+Servidor HTTP local que substitui a API de financiamento em testes e benchmarks.
+
+Atende o contrato de /financiamento/pagamento (mesmos parâmetros, formato
+de resposta, ETag e 304) a partir de respostas gravadas: o data_cache.json
+distribuído com o projeto, arquivos no mesmo formato e entradas do cache de
+respostas. Municípios e competências sem resposta gravada recebem dados
+sintéticos derivados de um modelo gravado ou, com --anexo, do gerador
+baseado no Anexo VI (utils/synthetic.py), de forma determinística.
+
+Latência, taxa de erro e códigos de status são configuráveis e sorteados
+com semente fixa, para medir vazão, retentativas e cache de forma
+reproduzível e sem acesso à rede.
+
+Uso:
+    python -m utils.api_stub --port 8765 --latencia 0.2 --jitter 0.1 --taxa-erro 0.05
+    PAP_API_URL=http://127.0.0.1:8765/financiamento/pagamento streamlit run main.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .api_client import DATA_FILE, listar_competencias
+from .cache import ResponseCache
+from .partitioning import SECOES_REGISTROS
+from .query_layer import CODIGOS_UF
+from .synthetic import GeradorPagamentos
+
+ENDPOINT = "/financiamento/pagamento"
+
+DEFAULT_PORT = 8765
+
+# Status usados na injeção de erros quando nenhum é informado
+DEFAULT_STATUS_ERRO = (500, 502, 503, 504)
+
+# Gerador de respostas sintéticas: (coMunicipio, competência) -> dados ou None
+Gerador = Callable[[str, str], Optional[Dict[str, Any]]]
+
+_SIGLAS_UF = {codigo: sigla for sigla, codigo in CODIGOS_UF.items()}
+
+
+def gerar_sintetico(modelo: Dict[str, List[Dict[str, Any]]]) -> Gerador:
+    """
+    Cria um gerador que adapta uma resposta modelo a qualquer município e competência.
+
+    Quantidades e valores são multiplicados por um fator determinístico
+    (entre 0,5 e 1,5) derivado do município e da competência.
+
+    Args:
+        modelo: Registros por seção (pagamentos e resumosPlanosOrcamentarios)
+    """
+    def gerar(co_municipio: str, competencia: str) -> Optional[Dict[str, Any]]:
+        semente = hashlib.sha256(f"{co_municipio}:{competencia}".encode("utf-8")).digest()
+        fator = 0.5 + int.from_bytes(semente[:4], "big") / 0xFFFFFFFF
+        co_uf = co_municipio[:2]
+        dados = {}
+        for secao in SECOES_REGISTROS:
+            registros = []
+            for original in modelo.get(secao, []):
+                registro = dict(original)
+                for campo, valor in original.items():
+                    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                        continue
+                    if campo.startswith("qt"):
+                        registro[campo] = int(round(valor * fator))
+                    elif campo.startswith("vl"):
+                        registro[campo] = round(valor * fator, 2)
+                registro.update({
+                    "coUfIbge": co_uf, "sgUf": _SIGLAS_UF.get(co_uf, ""), "coMunicipioIbge": co_municipio,
+                    "noMunicipio": f"MUNICIPIO {co_municipio}", "nuParcela": competencia,
+                })
+                registros.append(registro)
+            dados[secao] = registros
+        return dados
+    return gerar
+
+
+class FixtureStore:
+    """Registros gravados por (município, competência), em memória."""
+
+    def __init__(self):
+        self._registros: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+
+    def adicionar(self, dados: Dict[str, Any]) -> int:
+        """
+        Adiciona os registros de uma resposta da API.
+
+        Returns:
+            int: Número de registros adicionados
+        """
+        total = 0
+        for secao in SECOES_REGISTROS:
+            for registro in dados.get(secao) or []:
+                chave = (str(registro.get("coMunicipioIbge", ""))[:6], str(registro.get("nuParcela", "")))
+                self._registros.setdefault(chave, {s: [] for s in SECOES_REGISTROS})[secao].append(registro)
+                total += 1
+        return total
+
+    def carregar_arquivo(self, path: str = DATA_FILE) -> int:
+        """Adiciona as respostas de um arquivo JSON no formato da API (ex.: data_cache.json)."""
+        with open(path, "r", encoding="utf-8") as f:
+            return self.adicionar(json.load(f))
+
+    def importar_cache(self, cache: ResponseCache) -> int:
+        """Adiciona as respostas gravadas em um cache de respostas."""
+        return sum(self.adicionar(entrada["dados"]) for _, entrada in cache.iter_entries())
+
+    def buscar(self, co_municipio: str, competencia: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        return self._registros.get((co_municipio, competencia))
+
+    def da_uf(self, co_uf: str, competencia: str) -> List[Dict[str, List[Dict[str, Any]]]]:
+        return [dados for (co, comp), dados in sorted(self._registros.items())
+                if co.startswith(co_uf) and comp == competencia]
+
+    def modelo(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Primeira resposta gravada, usada como modelo dos dados sintéticos."""
+        return next(iter(self._registros.values()), None)
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+
+class StubAPIServer:
+    """Servidor local com o contrato do endpoint de pagamentos e injeção de falhas."""
+
+    def __init__(self, fixtures: Optional[FixtureStore] = None, gerador: Optional[Gerador] = None,
+                 sinteticos: bool = True, latencia: float = 0.0, jitter: float = 0.0,
+                 taxa_erro: float = 0.0, status_erro: Sequence[int] = DEFAULT_STATUS_ERRO,
+                 semente: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            fixtures: Respostas gravadas (padrão: data_cache.json, se existir)
+            gerador: Gerador de respostas sintéticas (padrão: derivado das fixtures)
+            sinteticos: Se False, consultas sem fixture retornam listas vazias
+            latencia: Atraso fixo de cada resposta em segundos
+            jitter: Atraso adicional máximo, sorteado uniformemente
+            taxa_erro: Probabilidade (0-1) de responder com um status de erro
+            status_erro: Status sorteados na injeção de erros
+            semente: Semente do sorteio de latência e erros
+            host: Endereço de escuta
+            port: Porta (0 escolhe uma porta livre)
+        """
+        if not 0 <= taxa_erro <= 1:
+            raise ValueError("taxa_erro deve estar entre 0 e 1")
+        if fixtures is None:
+            fixtures = FixtureStore()
+            try:
+                fixtures.carregar_arquivo(DATA_FILE)
+            except (OSError, json.JSONDecodeError):
+                pass
+        self.fixtures = fixtures
+        if gerador is None and sinteticos and fixtures.modelo():
+            gerador = gerar_sintetico(fixtures.modelo())
+        self.gerador = gerador if sinteticos else None
+        self.latencia = latencia
+        self.jitter = jitter
+        self.taxa_erro = taxa_erro
+        self.status_erro = tuple(status_erro)
+        self._random = random.Random(semente)
+        self._lock = threading.Lock()
+        self._stats = {"requisicoes": 0, "erros_injetados": 0, "nao_modificados": 0}
+        self._server = ThreadingHTTPServer((host, port), self._criar_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL do endpoint de pagamentos do servidor."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{ENDPOINT}"
+
+    def start(self) -> "StubAPIServer":
+        """Inicia o servidor em uma thread em segundo plano."""
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="api-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Atende requisições na thread atual até uma interrupção (Ctrl+C)."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """Encerra o servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StubAPIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores de requisições, erros injetados e respostas 304."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _contar(self, chave: str) -> None:
+        with self._lock:
+            self._stats[chave] += 1
+
+    def _sortear(self) -> Tuple[float, Optional[int]]:
+        """Sorteia a latência e, conforme a taxa de erro, um status de erro."""
+        with self._lock:
+            atraso = self.latencia + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            erro = None
+            if self.taxa_erro and self._random.random() < self.taxa_erro:
+                erro = self._random.choice(self.status_erro)
+            return atraso, erro
+
+    def _dados_municipio(self, co_municipio: str, competencia: str) -> Dict[str, List[Dict[str, Any]]]:
+        gravados = self.fixtures.buscar(co_municipio, competencia)
+        if gravados is not None:
+            return gravados
+        if self.gerador is not None:
+            return self.gerador(co_municipio, competencia) or {}
+        return {}
+
+    def responder(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Monta a resposta de uma consulta.
+
+        Raises:
+            ValueError: Se faltarem parâmetros obrigatórios
+        """
+        try:
+            unidade = params.get("unidadeGeografica", "MUNICIPIO")
+            competencias = listar_competencias(params["nuParcelaInicio"], params.get("nuParcelaFim")
+                                               or params["nuParcelaInicio"])
+        except (KeyError, ValueError):
+            raise ValueError("nuParcelaInicio e nuParcelaFim devem estar no formato AAAAMM") from None
+
+        partes: Iterable[Dict[str, List[Dict[str, Any]]]]
+        if unidade == "ESTADO":
+            if not params.get("coUf"):
+                raise ValueError("coUf é obrigatório para unidadeGeografica=ESTADO")
+            partes = [dados for comp in competencias for dados in self.fixtures.da_uf(params["coUf"], comp)]
+        else:
+            if not params.get("coMunicipio"):
+                raise ValueError("coMunicipio é obrigatório")
+            partes = [self._dados_municipio(params["coMunicipio"][:6], comp) for comp in competencias]
+
+        resposta: Dict[str, Any] = {"data": datetime.now().strftime("%d/%m/%Y")}
+        for secao in ("resumosPlanosOrcamentarios", "pagamentos"):
+            resposta[secao] = [registro for dados in partes for registro in dados.get(secao, [])]
+        return resposta
+
+    def _criar_handler(self) -> type:
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _enviar(self, status: int, corpo: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                for nome, valor in (headers or {}).items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                if corpo:
+                    self.wfile.write(corpo)
+
+            def do_GET(self) -> None:
+                servidor._contar("requisicoes")
+                url = urlparse(self.path)
+                if url.path != ENDPOINT:
+                    self._enviar(404)
+                    return
+
+                atraso, erro = servidor._sortear()
+                if atraso:
+                    time.sleep(atraso)
+                if erro is not None:
+                    servidor._contar("erros_injetados")
+                    headers = {"Retry-After": "0"} if erro in (429, 503) else None
+                    self._enviar(erro, b'{"erro": "falha injetada"}', headers)
+                    return
+
+                params = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+                try:
+                    resposta = servidor.responder(params)
+                except ValueError as e:
+                    self._enviar(400, json.dumps({"erro": str(e)}, ensure_ascii=False).encode("utf-8"),
+                                 {"Content-Type": "application/json"})
+                    return
+
+                # ETag calculado sem o campo "data", que muda diariamente
+                conteudo = {k: v for k, v in resposta.items() if k != "data"}
+                etag = '"' + hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode("utf-8")).hexdigest()[:32] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    servidor._contar("nao_modificados")
+                    self._enviar(304, headers={"ETag": etag})
+                    return
+
+                corpo = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+                self._enviar(200, corpo, {"Content-Type": "application/json; charset=utf-8", "ETag": etag})
+
+        return Handler
+
+
+def main() -> None:
+    """Ponto de entrada de linha de comando do servidor local."""
+    parser = argparse.ArgumentParser(description="Servidor local com o contrato da API de pagamentos.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fixtures", nargs="*", default=[DATA_FILE], help="Arquivos JSON no formato da API")
+    parser.add_argument("--cache-dir", help="Diretório de um cache de respostas a reproduzir")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso fixo em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Atraso adicional máximo em segundos")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Probabilidade de erro (0-1)")
+    parser.add_argument("--status", type=int, nargs="+", default=list(DEFAULT_STATUS_ERRO),
+                        help="Status sorteados na injeção de erros")
+    parser.add_argument("--semente", type=int, help="Semente do sorteio de latência e erros")
+    parser.add_argument("--sem-sinteticos", action="store_true", help="Não gera dados para consultas sem fixture")
+    parser.add_argument("--anexo", action="store_true",
+                        help="Gera os dados sintéticos a partir do Anexo VI (ver utils/synthetic.py)")
+    args = parser.parse_args()
+
+    fixtures = FixtureStore()
+    for path in args.fixtures:
+        fixtures.carregar_arquivo(path)
+    if args.cache_dir:
+        fixtures.importar_cache(ResponseCache(cache_dir=args.cache_dir, max_entries=None, ttl=None))
+
+    gerador = GeradorPagamentos(args.semente or 0).gerar if args.anexo else None
+    servidor = StubAPIServer(fixtures, gerador, sinteticos=not args.sem_sinteticos, latencia=args.latencia,
+                             jitter=args.jitter, taxa_erro=args.taxa_erro, status_erro=args.status,
+                             semente=args.semente, host=args.host, port=args.port)
+    print(f"Servindo {len(fixtures)} respostas gravadas em {servidor.url}", flush=True)
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Arquivo endereçado por conteúdo de todas as respostas brutas recebidas da API.
+
+Para auditoria, cada resposta é preservada integralmente, mas de mês para
+mês a maior parte dos registros de pagamentos é idêntica. Cada registro é
+armazenado uma única vez, comprimido, sob o hash SHA-256 do seu JSON
+canônico; a resposta vira um manifesto (também endereçado por conteúdo) com
+a lista de hashes de cada seção. Assim o armazenamento cresce apenas com as
+alterações reais.
+
+Estrutura:
+    response_archive/objetos/ab/abcdef....json.gz   registros e manifestos
+    response_archive/indice.sqlite                  (município, competência, fetched_at) -> manifesto
+
+O arquivo é somente de inclusão: objetos nunca são reescritos e o índice
+recebe apenas inserções. replay() reconstrói qualquer resposta histórica.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cache import COMPRESS_LEVEL
+
+ARCHIVE_DIR = "response_archive"
+
+OBJETOS_DIR = "objetos"
+
+INDICE_FILE = "indice.sqlite"
+
+OBJETO_SUFFIX = ".json.gz"
+
+
+def json_canonico(valor: Any) -> bytes:
+    """Serialização determinística (chaves ordenadas, sem espaços) usada no hash."""
+    return json.dumps(valor, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def hash_conteudo(conteudo: bytes) -> str:
+    """Hash SHA-256 (hexadecimal) de um conteúdo."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+class ResponseArchive:
+    """Arquivo de respostas da API com deduplicação por registro."""
+
+    def __init__(self, base_dir: str = ARCHIVE_DIR):
+        self.base_dir = Path(base_dir)
+        self.objetos_dir = self.base_dir / OBJETOS_DIR
+        self.objetos_dir.mkdir(parents=True, exist_ok=True)
+        self.indice_path = self.base_dir / INDICE_FILE
+        self._lock = threading.Lock()
+        self._criar_esquema()
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão, com commit ao final do bloco."""
+        conn = sqlite3.connect(str(self.indice_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _criar_esquema(self) -> None:
+        """Cria a tabela do índice, se ainda não existir."""
+        with self._conexao() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS respostas "
+                         "(coMunicipio TEXT, nuParcela TEXT, fetched_at REAL, manifesto TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_chave "
+                         "ON respostas (coMunicipio, nuParcela, fetched_at)")
+
+    def _objeto_path(self, digest: str) -> Path:
+        return self.objetos_dir / digest[:2] / f"{digest}{OBJETO_SUFFIX}"
+
+    def _gravar_objeto(self, valor: Any) -> str:
+        """
+        Grava um objeto, se ainda não existir, e retorna seu hash.
+
+        A gravação é atômica (arquivo temporário + rename); objetos com o
+        mesmo hash têm o mesmo conteúdo e nunca são reescritos.
+        """
+        conteudo = json_canonico(valor)
+        digest = hash_conteudo(conteudo)
+        path = self._objeto_path(digest)
+        if path.exists():
+            return digest
+
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{digest[:8]}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(conteudo, compresslevel=COMPRESS_LEVEL))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return digest
+
+    def ler_objeto(self, digest: str) -> Any:
+        """
+        Lê um objeto pelo hash, verificando a integridade.
+
+        Raises:
+            KeyError: Se o objeto não existir
+            ValueError: Se o conteúdo não corresponder ao hash
+        """
+        try:
+            with open(self._objeto_path(digest), "rb") as f:
+                conteudo = gzip.decompress(f.read())
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Objeto {digest} corrompido: {e}") from e
+        if hash_conteudo(conteudo) != digest:
+            raise ValueError(f"Objeto {digest} corrompido: hash não confere")
+        return json.loads(conteudo.decode("utf-8"))
+
+    def arquivar(self, co_municipio: str, competencia: str, dados: Dict[str, Any],
+                 fetched_at: Optional[float] = None) -> str:
+        """
+        Arquiva uma resposta da API.
+
+        Listas de registros (pagamentos, resumosPlanosOrcamentarios, ...) são
+        armazenadas registro a registro; os demais campos ficam no manifesto.
+
+        Args:
+            co_municipio: Código IBGE do município (6 dígitos)
+            competencia: Competência no formato AAAAMM
+            dados: Resposta da API
+            fetched_at: Horário do recebimento (padrão: agora)
+
+        Returns:
+            str: Hash do manifesto da resposta
+        """
+        manifesto = {"chaves": list(dados), "secoes": {}, "valores": {}}
+        for chave, valor in dados.items():
+            if isinstance(valor, list) and all(isinstance(item, dict) for item in valor):
+                manifesto["secoes"][chave] = [self._gravar_objeto(registro) for registro in valor]
+            else:
+                manifesto["valores"][chave] = valor
+        digest = self._gravar_objeto(manifesto)
+
+        with self._lock, self._conexao() as conn:
+            conn.execute("INSERT INTO respostas VALUES (?, ?, ?, ?)",
+                         (co_municipio[:6], competencia, fetched_at or time.time(), digest))
+        return digest
+
+    def reconstruir(self, manifesto: str) -> Dict[str, Any]:
+        """Reconstrói uma resposta a partir do hash do seu manifesto."""
+        conteudo = self.ler_objeto(manifesto)
+        dados = {}
+        for chave in conteudo["chaves"]:
+            if chave in conteudo["secoes"]:
+                dados[chave] = [self.ler_objeto(digest) for digest in conteudo["secoes"][chave]]
+            else:
+                dados[chave] = conteudo["valores"][chave]
+        return dados
+
+    def historico(self, co_municipio: str, competencia: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Lista as respostas arquivadas de um município, em ordem de recebimento.
+
+        Returns:
+            List[Dict]: Chaves "coMunicipio", "nuParcela", "fetched_at" e "manifesto"
+        """
+        sql = "SELECT coMunicipio, nuParcela, fetched_at, manifesto FROM respostas WHERE coMunicipio = ?"
+        params: List[Any] = [co_municipio[:6]]
+        if competencia:
+            sql += " AND nuParcela = ?"
+            params.append(competencia)
+        with self._conexao() as conn:
+            linhas = conn.execute(sql + " ORDER BY fetched_at, rowid", params).fetchall()
+        return [dict(zip(("coMunicipio", "nuParcela", "fetched_at", "manifesto"), linha)) for linha in linhas]
+
+    def replay(self, co_municipio: str, competencia: str, em: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reconstrói a resposta de um município e competência como era em um instante.
+
+        Args:
+            co_municipio: Código IBGE do município
+            competencia: Competência no formato AAAAMM
+            em: Instante (timestamp); padrão: a resposta mais recente
+
+        Returns:
+            Optional[Dict]: A última resposta recebida até o instante, ou None
+        """
+        sql = "SELECT manifesto FROM respostas WHERE coMunicipio = ? AND nuParcela = ?"
+        params: List[Any] = [co_municipio[:6], competencia]
+        if em is not None:
+            sql += " AND fetched_at <= ?"
+            params.append(em)
+        with self._conexao() as conn:
+            linha = conn.execute(sql + " ORDER BY fetched_at DESC, rowid DESC LIMIT 1", params).fetchone()
+        return self.reconstruir(linha[0]) if linha else None
+
+    def stats(self) -> Dict[str, int]:
+        """Número de respostas indexadas, objetos armazenados e bytes ocupados."""
+        objetos = list(self.objetos_dir.glob(f"*/*{OBJETO_SUFFIX}"))
+        with self._conexao() as conn:
+            respostas = conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+        return {
+            "respostas": respostas,
+            "objetos": len(objetos),
+            "bytes": sum(path.stat().st_size for path in objetos),
+        }
+
+
+# Instância global do arquivo de respostas
+_response_archive = None
+_archive_lock = threading.Lock()
+
+def get_response_archive() -> ResponseArchive:
+    """
+    Retorna o arquivo de respostas compartilhado do processo.
+
+    Returns:
+        ResponseArchive: Arquivo usado por atualizar_entrada e buscar_periodo
+    """
+    global _response_archive
+    with _archive_lock:
+        if _response_archive is None:
+            _response_archive = ResponseArchive()
+        return _response_archive
+
+def arquivar_resposta(co_municipio: str, competencia: str, dados: Dict[str, Any]) -> bool:
+    """
+    Arquiva uma resposta recebida da API.
+
+    Falhas de gravação não interrompem a consulta.
+
+    Returns:
+        bool: True se a resposta foi arquivada
+    """
+    try:
+        get_response_archive().arquivar(co_municipio, competencia, dados)
+        return True
+    except (OSError, sqlite3.Error):
+        return False
@@ -0,0 +1,166 @@
+"""
+Cliente assíncrono (asyncio) para consultas simultâneas à API de financiamento.
+
+Comparações entre vários municípios ou competências disparam as consultas
+em paralelo, com concorrência limitada, e recebem os resultados à medida
+que ficam prontos: o tempo total fica próximo ao da consulta mais lenta.
+
+As requisições reutilizam o APIClient compartilhado (pool de conexões,
+retentativas e circuit breaker), executado em threads dedicadas, e mantêm
+os mesmos parâmetros (montar_parametros), a mesma validação
+(validar_dados_api) e as mesmas exceções do cliente síncrono.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from requests.exceptions import RequestException
+
+from .api_client import APIClient, POOL_MAXSIZE, get_api_client, montar_parametros, validar_dados_api
+from .archive import arquivar_resposta
+from .payment_store import registrar_em_segundo_plano
+from .cache import ResponseCache, get_response_cache
+
+# Consultas simultâneas padrão em fetch_many
+DEFAULT_CONCURRENCY = 8
+
+
+@dataclass
+class ResultadoConsulta:
+    """Resultado de uma consulta de fetch_many: dados ou a exceção levantada."""
+    params: Dict[str, str]
+    dados: Optional[Dict[str, Any]] = None
+    erro: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.erro is None
+
+
+class AsyncAPIClient:
+    """Interface asyncio sobre o cliente HTTP compartilhado."""
+
+    def __init__(self, client: Optional[APIClient] = None, max_workers: int = POOL_MAXSIZE):
+        """
+        Args:
+            client: Cliente síncrono usado nas requisições (padrão: cliente compartilhado)
+            max_workers: Limite de requisições em andamento ao mesmo tempo
+        """
+        self.client = client or get_api_client()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-api")
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Encerra as threads do cliente."""
+        self._executor.shutdown(wait=False)
+
+    async def fetch(self, params: Dict[str, str], timeout: float = 30) -> Dict[str, Any]:
+        """
+        Executa uma consulta e valida a resposta.
+
+        Args:
+            params: Parâmetros da consulta (ver montar_parametros)
+            timeout: Tempo limite da requisição em segundos
+
+        Returns:
+            Dict: Dados da API
+
+        Raises:
+            requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+            json.JSONDecodeError: Se o corpo da resposta não for JSON válido
+            ValueError: Se a resposta não estiver no formato esperado
+        """
+        loop = asyncio.get_running_loop()
+        resposta = await loop.run_in_executor(self._executor, partial(self.client.fetch, params, timeout=timeout))
+        if not validar_dados_api(resposta.dados):
+            raise ValueError("Dados recebidos da API estão em formato inválido.")
+        return resposta.dados
+
+    async def _fetch_resultado(self, params: Dict[str, str], semaforo: asyncio.Semaphore,
+                               timeout: float) -> ResultadoConsulta:
+        async with semaforo:
+            try:
+                return ResultadoConsulta(params, dados=await self.fetch(params, timeout))
+            except (RequestException, ValueError) as e:
+                return ResultadoConsulta(params, erro=e)
+
+    async def fetch_many(self, queries: Iterable[Dict[str, str]], concurrency: int = DEFAULT_CONCURRENCY,
+                         timeout: float = 30) -> AsyncIterator[ResultadoConsulta]:
+        """
+        Executa várias consultas simultaneamente, entregando cada resultado assim que fica pronto.
+
+        Falhas individuais não interrompem as demais: são entregues no campo
+        "erro" do resultado.
+
+        Args:
+            queries: Parâmetros de cada consulta
+            concurrency: Número máximo de consultas simultâneas
+            timeout: Tempo limite de cada requisição em segundos
+
+        Yields:
+            ResultadoConsulta: Na ordem de conclusão
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency deve ser pelo menos 1")
+        semaforo = asyncio.Semaphore(concurrency)
+        tarefas = [asyncio.ensure_future(self._fetch_resultado(params, semaforo, timeout)) for params in queries]
+        try:
+            for proxima in asyncio.as_completed(tarefas):
+                yield await proxima
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+
+async def _coletar(queries: List[Dict[str, str]], concurrency: int, client: Optional[APIClient]) -> List[ResultadoConsulta]:
+    async with AsyncAPIClient(client, max_workers=concurrency) as async_client:
+        return [resultado async for resultado in async_client.fetch_many(queries, concurrency)]
+
+def consultar_em_paralelo(codigos_ibge: Iterable[str], competencias: Iterable[str],
+                          concurrency: int = DEFAULT_CONCURRENCY, cache: Optional[ResponseCache] = None,
+                          client: Optional[APIClient] = None) -> Dict[tuple, ResultadoConsulta]:
+    """
+    Consulta todas as combinações de municípios e competências, usando o cache local.
+
+    Versão síncrona (para páginas do Streamlit) que executa as consultas
+    ausentes do cache em paralelo e grava as respostas obtidas.
+
+    Args:
+        codigos_ibge: Códigos IBGE dos municípios
+        competencias: Competências no formato AAAAMM
+        concurrency: Número máximo de consultas simultâneas
+        cache: Cache de respostas (padrão: cache compartilhado)
+        client: Cliente HTTP (padrão: cliente compartilhado do processo)
+
+    Returns:
+        Dict: (coMunicipio, competência) -> ResultadoConsulta
+    """
+    cache = cache or get_response_cache()
+    resultados = {}
+    pendentes = []
+    for codigo in codigos_ibge:
+        for competencia in competencias:
+            params = montar_parametros(codigo, competencia)
+            dados = cache.get(params["coMunicipio"], competencia)
+            if dados:
+                resultados[(params["coMunicipio"], competencia)] = ResultadoConsulta(params, dados=dados)
+            else:
+                pendentes.append(params)
+
+    if pendentes:
+        for resultado in asyncio.run(_coletar(pendentes, concurrency, client)):
+            params = resultado.params
+            if resultado.ok and (resultado.dados.get("pagamentos") or resultado.dados.get("resumosPlanosOrcamentarios")):
+                # Respostas sem registros não são gravadas (a parcela pode ainda não ter sido publicada)
+                cache.put(params["coMunicipio"], params["nuParcelaInicio"], resultado.dados, params["tipoRelatorio"])
+                registrar_em_segundo_plano(resultado.dados)
+                arquivar_resposta(params["coMunicipio"], params["nuParcelaInicio"], resultado.dados)
+            resultados[(params["coMunicipio"], params["nuParcelaInicio"])] = resultado
+    return resultados
@@ -0,0 +1,494 @@
+"""
+Cache local de respostas da API de financiamento da saúde.
+
+Cada resposta é gravada em um arquivo próprio, identificado pela chave
+(coMunicipio, nuParcela, tipoRelatorio). O cache aplica validade (TTL) por
+entrada, descarte LRU limitado por número de entradas e mantém contadores
+de acertos e falhas.
+
+Os arquivos são comprimidos com gzip, levam um checksum SHA-256 do conteúdo
+verificado na leitura e são gravados de forma atômica (arquivo temporário
+seguido de rename), de modo que uma gravação interrompida ou concorrente
+nunca deixa uma entrada truncada.
+
+Vários processos (workers do Streamlit) podem compartilhar o mesmo
+diretório: locks de arquivo por chave (flock) permitem que apenas um
+processo atualize uma entrada por vez, e o descarte LRU é coordenado por
+um lock próprio.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks apenas entre threads do mesmo processo
+    fcntl = None
+
+# Diretório padrão do cache de respostas
+CACHE_DIR = "cache_api"
+
+# Validade padrão de uma entrada (24 horas)
+DEFAULT_TTL = 24 * 60 * 60
+
+# Número máximo padrão de entradas mantidas em disco
+DEFAULT_MAX_ENTRIES = 200
+
+DEFAULT_TIPO_RELATORIO = "COMPLETO"
+
+# Extensão dos arquivos de entrada
+ENTRY_SUFFIX = ".json.gz"
+
+# Nível de compressão gzip (compromisso entre tempo de gravação e tamanho)
+COMPRESS_LEVEL = 6
+
+
+# Idade atribuída às entradas de baixa prioridade (ex.: prefetch) até serem
+# lidas: ficam atrás de qualquer entrada usada dentro da validade padrão
+IDADE_BAIXA_PRIORIDADE = DEFAULT_TTL
+
+# Gravações após as quais o índice LRU em memória é reconstruído a partir do
+# disco, incorporando entradas gravadas ou removidas por outros processos
+# (em múltiplos de max_entries)
+REINDEX_FACTOR = 1
+
+# Subdiretório dos arquivos de lock
+LOCKS_DIR = ".locks"
+
+# Intervalo entre tentativas de obter um lock ocupado (segundos)
+LOCK_POLL_INTERVAL = 0.05
+
+
+class FileLock:
+    """
+    Lock exclusivo baseado em flock, válido entre processos e entre threads.
+
+    Sem fcntl (Windows), recai para um lock de thread por caminho.
+    """
+
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._fd: Optional[int] = None
+        self._thread_lock: Optional[threading.Lock] = None
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Obtém o lock.
+
+        Args:
+            timeout: Tempo máximo de espera em segundos (None = sem limite, 0 = não bloqueia)
+
+        Returns:
+            bool: True se o lock foi obtido
+        """
+        if fcntl is None:
+            with FileLock._thread_locks_guard:
+                self._thread_lock = FileLock._thread_locks.setdefault(self.path, threading.Lock())
+            return self._thread_lock.acquire(timeout=-1 if timeout is None else timeout)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return True
+            except BlockingIOError:
+                if limite is not None and time.monotonic() >= limite:
+                    os.close(fd)
+                    return False
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def release(self) -> None:
+        """Libera o lock, se obtido."""
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        elif self._thread_lock is not None:
+            self._thread_lock.release()
+            self._thread_lock = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class CacheCorruptionError(ValueError):
+    """Conteúdo de uma entrada não confere com o checksum gravado."""
+
+
+def encode_entry(entry: Dict[str, Any]) -> bytes:
+    """
+    Serializa uma entrada: checksum SHA-256 na primeira linha, JSON compacto
+    em seguida, tudo comprimido com gzip.
+    """
+    payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    checksum = hashlib.sha256(payload).hexdigest().encode("ascii")
+    return gzip.compress(checksum + b"\n" + payload, compresslevel=COMPRESS_LEVEL)
+
+
+def decode_entry(data: bytes) -> Dict[str, Any]:
+    """
+    Desserializa uma entrada gravada por encode_entry, verificando o checksum.
+
+    Raises:
+        CacheCorruptionError: Se o arquivo estiver truncado ou o checksum não conferir
+    """
+    try:
+        raw = gzip.decompress(data)
+    except (OSError, EOFError) as e:
+        raise CacheCorruptionError(f"Entrada ilegível: {e}") from e
+    checksum, _, payload = raw.partition(b"\n")
+    if hashlib.sha256(payload).hexdigest().encode("ascii") != checksum:
+        raise CacheCorruptionError("Checksum da entrada não confere")
+    return json.loads(payload.decode("utf-8"))
+
+
+def make_cache_key(co_municipio: str, nu_parcela: str, tipo_relatorio: str = DEFAULT_TIPO_RELATORIO) -> str:
+    """
+    Monta a chave de cache a partir dos parâmetros da consulta.
+
+    Args:
+        co_municipio: Código IBGE do município (6 dígitos)
+        nu_parcela: Competência/parcela no formato AAAAMM
+        tipo_relatorio: Tipo de relatório solicitado à API
+
+    Returns:
+        str: Chave no formato "<coMunicipio>_<nuParcela>_<tipoRelatorio>"
+    """
+    return f"{str(co_municipio)[:6]}_{nu_parcela}_{tipo_relatorio}"
+
+
+class ResponseCache:
+    """Cache em disco, com uma entrada por chave, TTL e descarte LRU."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                 ttl: Optional[float] = DEFAULT_TTL):
+        """
+        Args:
+            cache_dir: Diretório onde as entradas são gravadas
+            max_entries: Limite de entradas (None = ilimitado)
+            ttl: Validade padrão em segundos (None = sem expiração)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "corrupted": 0}
+        # Ordem LRU das entradas (chave -> mtime em ns), carregada sob demanda;
+        # evita listar o diretório a cada gravação
+        self._indice: Optional["OrderedDict[str, int]"] = None
+        self._gravacoes_desde_indice = 0
+
+    def _path(self, key: str) -> Path:
+        """Retorna o caminho do arquivo de uma chave."""
+        return self.cache_dir / f"{key}{ENTRY_SUFFIX}"
+
+    def _count(self, stat: str) -> None:
+        """Incrementa um contador de estatística."""
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _read_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Lê uma entrada do disco. Entradas ilegíveis são descartadas."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                return decode_entry(f.read())
+        except FileNotFoundError:
+            return None
+        except (CacheCorruptionError, json.JSONDecodeError, UnicodeDecodeError):
+            self._count("corrupted")
+            self._remove(path)
+            self._esquecer(key)
+            return None
+
+    def _write_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        """Grava uma entrada no disco de forma atômica (arquivo temporário + rename)."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = encode_entry(entry)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(Path(tmp_path))
+            raise
+
+    def _registrar_acesso(self, key: str, mtime_ns: int, recente: bool = True) -> None:
+        """Move a chave para o fim (mais recente) ou o início do índice LRU, se carregado."""
+        with self._lock:
+            if self._indice is not None:
+                self._indice[key] = mtime_ns
+                self._indice.move_to_end(key, last=recente)
+
+    def _esquecer(self, key: str) -> None:
+        """Remove a chave do índice LRU, se carregado."""
+        with self._lock:
+            if self._indice is not None:
+                self._indice.pop(key, None)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        """Remove um arquivo ignorando ausência."""
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def is_expired(entry: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Verifica se a entrada ultrapassou sua validade."""
+        ttl = entry.get("ttl")
+        now = time.time() if now is None else now
+        return ttl is not None and now - entry.get("stored_at", 0) > ttl
+
+    def get_entry(self, co_municipio: str, nu_parcela: str,
+                  tipo_relatorio: str = DEFAULT_TIPO_RELATORIO,
+                  allow_expired: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a entrada completa (dados e metadados) de uma chave.
+
+        Args:
+            co_municipio: Código IBGE do município
+            nu_parcela: Competência no formato AAAAMM
+            tipo_relatorio: Tipo de relatório
+            allow_expired: Se True, retorna também entradas expiradas
+
+        Returns:
+            Dict ou None: Entrada com as chaves "dados", "stored_at", "ttl" e "metadata"
+        """
+        key = make_cache_key(co_municipio, nu_parcela, tipo_relatorio)
+        entry = self._read_entry(key)
+        if entry is None:
+            self._count("misses")
+            return None
+
+        if self.is_expired(entry):
+            self._count("expired")
+            if not allow_expired:
+                self._count("misses")
+                return None
+
+        # Atualiza o horário de acesso, usado como ordem do LRU
+        agora = time.time_ns()
+        try:
+            os.utime(self._path(key), ns=(agora, agora))
+            self._registrar_acesso(key, agora)
+        except FileNotFoundError:
+            pass
+
+        self._count("hits")
+        return entry
+
+    def get(self, co_municipio: str, nu_parcela: str,
+            tipo_relatorio: str = DEFAULT_TIPO_RELATORIO,
+            allow_expired: bool = False) -> Optional[Dict[str, Any]]:
+        """Retorna apenas os dados da API armazenados para a chave, ou None."""
+        entry = self.get_entry(co_municipio, nu_parcela, tipo_relatorio, allow_expired)
+        return entry["dados"] if entry else None
+
+    def put(self, co_municipio: str, nu_parcela: str, dados: Dict[str, Any],
+            tipo_relatorio: str = DEFAULT_TIPO_RELATORIO, ttl: Optional[float] = None,
+            metadata: Optional[Dict[str, Any]] = None, baixa_prioridade: bool = False) -> None:
+        """
+        Armazena os dados de uma consulta e aplica a política de descarte.
+
+        Args:
+            co_municipio: Código IBGE do município
+            nu_parcela: Competência no formato AAAAMM
+            dados: Resposta da API
+            tipo_relatorio: Tipo de relatório
+            ttl: Validade específica desta entrada (padrão: ttl do cache)
+            metadata: Informações adicionais gravadas junto à entrada
+            baixa_prioridade: Coloca a entrada na frente da fila de descarte até
+                que seja lida (usado pelo prefetch, para não expulsar as
+                entradas consultadas pelos usuários)
+        """
+        key = make_cache_key(co_municipio, nu_parcela, tipo_relatorio)
+        entry = {
+            "key": {
+                "coMunicipio": str(co_municipio)[:6],
+                "nuParcela": nu_parcela,
+                "tipoRelatorio": tipo_relatorio,
+            },
+            "stored_at": time.time(),
+            "ttl": self.ttl if ttl is None else ttl,
+            "metadata": metadata or {},
+            "dados": dados,
+        }
+        self._write_entry(key, entry)
+        try:
+            if baixa_prioridade:
+                antigo = time.time_ns() - int(IDADE_BAIXA_PRIORIDADE * 1e9)
+                os.utime(self._path(key), ns=(antigo, antigo))
+                self._registrar_acesso(key, antigo, recente=False)
+            else:
+                self._registrar_acesso(key, self._path(key).stat().st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        self._evict()
+
+    @contextmanager
+    def lock(self, co_municipio: str, nu_parcela: str, tipo_relatorio: str = DEFAULT_TIPO_RELATORIO,
+             timeout: Optional[float] = None) -> Iterator[bool]:
+        """
+        Lock exclusivo de uma chave, compartilhado por todos os processos que usam o diretório.
+
+        Usado para que apenas um worker consulte a API e grave a entrada; os
+        demais aguardam e reutilizam o resultado.
+
+        Args:
+            co_municipio: Código IBGE do município
+            nu_parcela: Competência no formato AAAAMM
+            tipo_relatorio: Tipo de relatório
+            timeout: Tempo máximo de espera (None = sem limite)
+
+        Yields:
+            bool: True se o lock foi obtido dentro do prazo
+        """
+        key = make_cache_key(co_municipio, nu_parcela, tipo_relatorio)
+        file_lock = FileLock(self.cache_dir / LOCKS_DIR / f"{key}.lock")
+        obtido = file_lock.acquire(timeout)
+        try:
+            yield obtido
+        finally:
+            if obtido:
+                file_lock.release()
+
+    def invalidate(self, co_municipio: str, nu_parcela: str,
+                   tipo_relatorio: str = DEFAULT_TIPO_RELATORIO) -> None:
+        """Remove a entrada de uma chave."""
+        key = make_cache_key(co_municipio, nu_parcela, tipo_relatorio)
+        self._remove(self._path(key))
+        self._esquecer(key)
+
+    def keys(self) -> List[str]:
+        """Lista as chaves presentes, da menos para a mais recentemente usada."""
+        return [key for key, _ in self.arquivos()]
+
+    def arquivos(self) -> List[Tuple[str, Path]]:
+        """Lista as entradas presentes como (chave, arquivo), sem lê-las."""
+        return [(path.name[:-len(ENTRY_SUFFIX)], path) for path in self._entries_by_access()]
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Percorre as entradas legíveis como (chave, entrada), sem alterar a ordem de acesso."""
+        for key in self.keys():
+            entry = self._read_entry(key)
+            if entry is not None:
+                yield key, entry
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        for path in self._entries_by_access():
+            self._remove(path)
+        with self._lock:
+            self._indice = None
+
+    def _entries_by_access(self) -> List[Path]:
+        """Arquivos de entrada ordenados pelo último acesso (LRU primeiro)."""
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(entries)]
+
+    def _carregar_indice(self) -> "OrderedDict[str, int]":
+        """Reconstrói o índice LRU a partir dos arquivos em disco."""
+        indice: "OrderedDict[str, int]" = OrderedDict()
+        if self.cache_dir.exists():
+            entries = []
+            for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"):
+                try:
+                    entries.append((path.stat().st_mtime_ns, path.name[:-len(ENTRY_SUFFIX)]))
+                except FileNotFoundError:
+                    continue
+            for mtime_ns, key in sorted(entries):
+                indice[key] = mtime_ns
+        return indice
+
+    def _evict(self) -> None:
+        """
+        Descarta as entradas menos recentemente usadas acima do limite.
+
+        A ordem vem do índice em memória; o diretório só é listado ao carregar
+        o índice e a cada REINDEX_FACTOR * max_entries gravações. Antes de
+        remover uma candidata, seu mtime é conferido: se outro processo a
+        acessou, ela volta para o fim da fila.
+        """
+        if self.max_entries is None:
+            return
+        # Um único processo descarta por vez; os demais deixam para a próxima gravação
+        evict_lock = FileLock(self.cache_dir / LOCKS_DIR / "_evict.lock")
+        if not evict_lock.acquire(timeout=0):
+            return
+        try:
+            with self._lock:
+                self._gravacoes_desde_indice += 1
+                if self._indice is None or self._gravacoes_desde_indice > REINDEX_FACTOR * self.max_entries:
+                    self._indice = self._carregar_indice()
+                    self._gravacoes_desde_indice = 0
+                while len(self._indice) > self.max_entries:
+                    key, mtime_ns = self._indice.popitem(last=False)
+                    path = self._path(key)
+                    try:
+                        atual = path.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+                    if atual > mtime_ns:
+                        # Acessada por outro processo desde o registro
+                        self._indice[key] = atual
+                        continue
+                    self._remove(path)
+                    self._stats["evictions"] += 1
+        finally:
+            evict_lock.release()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso do cache e número atual de entradas."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["entries"] = len(self._entries_by_access())
+        return stats
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Retorna a instância compartilhada do cache de respostas.
+
+    Returns:
+        ResponseCache: Cache usado por consultar_api e load_data_from_json
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
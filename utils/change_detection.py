@@ -0,0 +1,205 @@
+"""
+Detecção de alterações entre coletas sucessivas dos pagamentos.
+
+Cada linha de pagamentos é normalizada (chaves ordenadas, números sem
+diferenças de representação, textos sem espaços nas pontas) e identificada
+pelo hash do seu JSON canônico. As impressões digitais ficam em um único
+banco SQLite ao lado do cache de respostas (compartilhado pelo agendador e
+pelo crawler), junto com a linha normalizada, e cada atualização em lote gera
+um changeset com os municípios e campos alterados em relação à parcela mais
+recente já registrada de cada município (a mesma ou uma anterior).
+Cálculos, rankings e relatórios podem então ser refeitos apenas para o
+conjunto alterado.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .archive import hash_conteudo, json_canonico
+from .cache import ResponseCache, get_response_cache
+
+# Banco das impressões digitais, gravado no diretório do cache
+FINGERPRINTS_FILE = "fingerprints.sqlite"
+
+# Campos que mudam a cada parcela e não contam como alteração entre parcelas
+CAMPOS_PARCELA = ("nuParcela",)
+
+# Situações de um município no changeset
+NOVO = "novo"
+ALTERADO = "alterado"
+
+
+def _normalizar_valor(valor: Any) -> Any:
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, float):
+        valor = round(valor, 2)
+        return int(valor) if valor.is_integer() else valor
+    if isinstance(valor, str):
+        return valor.strip()
+    return valor
+
+
+def normalizar_pagamento(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """Normaliza uma linha de pagamentos para comparação entre coletas."""
+    return {campo: _normalizar_valor(registro[campo]) for campo in sorted(registro)}
+
+
+def fingerprint_pagamentos(registros: Iterable[Dict[str, Any]]) -> str:
+    """Hash SHA-256 das linhas normalizadas de pagamentos de um município."""
+    return hash_conteudo(json_canonico([normalizar_pagamento(r) for r in registros]))
+
+
+def campos_alterados(antigos: List[Dict[str, Any]], novos: List[Dict[str, Any]]) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Compara as linhas normalizadas de duas coletas, campo a campo.
+
+    Returns:
+        Dict: Campo -> (valor anterior, valor novo); com mais de uma linha,
+        os campos recebem o sufixo "[i]" a partir da segunda
+    """
+    alterados = {}
+    for indice in range(max(len(antigos), len(novos))):
+        antigo = antigos[indice] if indice < len(antigos) else {}
+        novo = novos[indice] if indice < len(novos) else {}
+        sufixo = f"[{indice}]" if indice else ""
+        for campo in sorted(set(antigo) | set(novo)):
+            if antigo.get(campo) != novo.get(campo):
+                alterados[f"{campo}{sufixo}"] = (antigo.get(campo), novo.get(campo))
+    return alterados
+
+
+def _sem_campos_parcela(registros: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{campo: valor for campo, valor in r.items() if campo not in CAMPOS_PARCELA} for r in registros]
+
+
+@dataclass
+class Alteracao:
+    """Alteração dos pagamentos de um município em uma competência."""
+    co_municipio: str
+    competencia: str
+    situacao: str
+    campos: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class Changeset:
+    """Resultado da comparação de uma atualização com a coleta anterior."""
+    alteracoes: List[Alteracao] = field(default_factory=list)
+    inalterados: int = 0
+
+    @property
+    def vazio(self) -> bool:
+        return not self.alteracoes
+
+    @property
+    def municipios(self) -> List[str]:
+        """Códigos IBGE dos municípios novos ou alterados."""
+        return sorted({a.co_municipio for a in self.alteracoes})
+
+    def campos(self) -> Set[str]:
+        """Campos alterados em algum município (sem o sufixo de linha)."""
+        return {campo.split("[")[0] for a in self.alteracoes for campo in a.campos}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "municipios": self.municipios,
+            "inalterados": self.inalterados,
+            "alteracoes": [asdict(a) for a in self.alteracoes],
+        }
+
+
+class FingerprintStore:
+    """Impressões digitais das linhas de pagamentos já coletadas."""
+
+    def __init__(self, db_path: Optional[str] = None, cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            db_path: Caminho do banco (padrão: FINGERPRINTS_FILE no diretório do cache)
+            cache: Cache de respostas ao lado do qual o banco é gravado
+        """
+        if db_path is None:
+            cache_dir = (cache or get_response_cache()).cache_dir
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            db_path = str(Path(cache_dir) / FINGERPRINTS_FILE)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._criar_esquema()
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão, com commit ao final do bloco."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _criar_esquema(self) -> None:
+        """Cria a tabela, se ainda não existir."""
+        with self._conexao() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS fingerprints ("
+                         "coMunicipio TEXT, nuParcela TEXT, fingerprint TEXT, registros TEXT, "
+                         "atualizado_em REAL, PRIMARY KEY (coMunicipio, nuParcela))")
+
+    def fingerprint(self, co_municipio: str, competencia: str) -> Optional[str]:
+        """Impressão digital registrada para um município e competência, se houver."""
+        with self._conexao() as conn:
+            linha = conn.execute("SELECT fingerprint FROM fingerprints WHERE coMunicipio = ? AND nuParcela = ?",
+                                 (co_municipio[:6], competencia)).fetchone()
+        return linha[0] if linha else None
+
+    def registrar(self, respostas: Iterable[Dict[str, Any]]) -> Changeset:
+        """
+        Registra as linhas de pagamentos de uma atualização e compara com a coleta anterior.
+
+        Cada município é comparado com a parcela mais recente já registrada até
+        a competência recebida: a própria (nova coleta do mesmo mês) ou, numa
+        parcela nova, a anterior. É "novo" apenas o município sem nenhum registro.
+
+        Args:
+            respostas: Respostas da API (de um ou vários municípios/competências)
+
+        Returns:
+            Changeset: Municípios novos ou alterados e os campos modificados
+        """
+        grupos: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for dados in respostas:
+            for registro in dados.get("pagamentos") or []:
+                chave = (str(registro.get("coMunicipioIbge", ""))[:6], str(registro.get("nuParcela", "")))
+                grupos.setdefault(chave, []).append(normalizar_pagamento(registro))
+
+        changeset = Changeset()
+        agora = time.time()
+        with self._lock, self._conexao() as conn:
+            for (co_municipio, competencia), registros in sorted(grupos.items()):
+                fingerprint = hash_conteudo(json_canonico(registros))
+                anterior = conn.execute(
+                    "SELECT nuParcela, fingerprint, registros FROM fingerprints "
+                    "WHERE coMunicipio = ? AND nuParcela <= ? ORDER BY nuParcela DESC LIMIT 1",
+                    (co_municipio, competencia)
+                ).fetchone()
+                if anterior and anterior[0] == competencia and anterior[1] == fingerprint:
+                    changeset.inalterados += 1
+                    continue
+
+                if anterior:
+                    campos = campos_alterados(_sem_campos_parcela(json.loads(anterior[2])),
+                                              _sem_campos_parcela(registros))
+                    if campos:
+                        changeset.alteracoes.append(Alteracao(co_municipio, competencia, ALTERADO, campos))
+                    else:
+                        changeset.inalterados += 1
+                else:
+                    changeset.alteracoes.append(Alteracao(co_municipio, competencia, NOVO))
+                conn.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                             (co_municipio, competencia, fingerprint,
+                              json_canonico(registros).decode("utf-8"), agora))
+        return changeset
@@ -0,0 +1,125 @@
+"""
+Circuit breaker para chamadas à API de financiamento.
+
+Após um número de falhas consecutivas, o circuito abre e as chamadas
+falham imediatamente durante um intervalo de espera, sem aguardar timeouts
+e retentativas. Passado o intervalo, uma única chamada de teste é liberada
+(meio-aberto): sucesso fecha o circuito, falha o reabre.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from requests.exceptions import RequestException, HTTPError
+
+# Falhas consecutivas até abrir o circuito
+DEFAULT_MAX_FALHAS = 3
+
+# Tempo (segundos) com o circuito aberto antes de uma nova tentativa
+DEFAULT_TEMPO_ABERTO = 60.0
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class CircuitoAbertoError(RequestException):
+    """Chamada recusada porque o circuito está aberto."""
+
+
+def falha_do_servidor(erro: BaseException) -> bool:
+    """
+    Indica se um erro reflete indisponibilidade do servidor.
+
+    Erros HTTP 4xx (parâmetros inválidos, recurso inexistente) não contam
+    como falha do serviço.
+    """
+    if isinstance(erro, HTTPError) and erro.response is not None:
+        return erro.response.status_code >= 500 or erro.response.status_code == 429
+    return isinstance(erro, RequestException) and not isinstance(erro, CircuitoAbertoError)
+
+
+class CircuitBreaker:
+    """Circuit breaker de três estados (fechado, aberto e meio-aberto), seguro entre threads."""
+
+    def __init__(self, max_falhas: int = DEFAULT_MAX_FALHAS, tempo_aberto: float = DEFAULT_TEMPO_ABERTO,
+                 relogio: Callable[[], float] = time.monotonic):
+        if max_falhas < 1:
+            raise ValueError("max_falhas deve ser pelo menos 1")
+        self.max_falhas = max_falhas
+        self.tempo_aberto = tempo_aberto
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._falhas = 0
+        self._aberto_em: Optional[float] = None
+        self._teste_em_andamento = False
+
+    @property
+    def estado(self) -> str:
+        """Estado atual do circuito."""
+        with self._lock:
+            return self._estado()
+
+    def _estado(self) -> str:
+        if self._aberto_em is None:
+            return FECHADO
+        if self._relogio() - self._aberto_em >= self.tempo_aberto:
+            return MEIO_ABERTO
+        return ABERTO
+
+    def permite(self) -> bool:
+        """Indica se uma chamada pode ser feita agora (reservando a chamada de teste, se meio-aberto)."""
+        with self._lock:
+            estado = self._estado()
+            if estado == FECHADO:
+                return True
+            if estado == MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            return False
+
+    def registrar_sucesso(self) -> None:
+        """Fecha o circuito e zera a contagem de falhas."""
+        with self._lock:
+            self._falhas = 0
+            self._aberto_em = None
+            self._teste_em_andamento = False
+
+    def registrar_falha(self) -> None:
+        """Conta uma falha; abre (ou reabre) o circuito ao atingir o limite."""
+        with self._lock:
+            self._falhas += 1
+            if self._teste_em_andamento or self._falhas >= self.max_falhas:
+                self._aberto_em = self._relogio()
+            self._teste_em_andamento = False
+
+    def segundos_para_nova_tentativa(self) -> float:
+        """Tempo restante com o circuito aberto (0 se fechado ou meio-aberto)."""
+        with self._lock:
+            if self._aberto_em is None:
+                return 0.0
+            return max(0.0, self.tempo_aberto - (self._relogio() - self._aberto_em))
+
+    @contextmanager
+    def proteger(self) -> Iterator[None]:
+        """
+        Executa o bloco sob o circuito.
+
+        Raises:
+            CircuitoAbertoError: Se o circuito estiver aberto
+        """
+        if not self.permite():
+            raise CircuitoAbertoError(
+                f"API indisponível; nova tentativa em {self.segundos_para_nova_tentativa():.0f}s"
+            )
+        try:
+            yield
+        except BaseException as e:
+            if falha_do_servidor(e):
+                self.registrar_falha()
+            else:
+                # Erros do cliente ou de decodificação não indicam indisponibilidade
+                self.registrar_sucesso()
+            raise
+        self.registrar_sucesso()
@@ -0,0 +1,430 @@
+"""
+Coleta em lote dos dados de pagamento de todos os municípios para uma competência.
+
+O crawler percorre os municípios listados no Anexo VI da Portaria 3.493,
+consulta a API com concorrência limitada e taxa controlada por token bucket,
+grava o resultado de cada município em disco e registra um checkpoint após
+cada município, permitindo retomar uma execução interrompida. Ao final, os
+municípios gravados são comparados com as coletas anteriores e o changeset
+(municípios novos ou alterados) é gravado ao lado do checkpoint.
+
+No modo por UF, cada estado é obtido em uma única requisição
+(unidadeGeografica=ESTADO), lida incrementalmente, com cada registro
+gravado no arquivo temporário do seu município assim que chega.
+
+Uso:
+    python -m utils.crawler --competencia 202508
+    python -m utils.crawler --competencia 202508 --por-uf
+    python -m utils.crawler --competencia 202508 --parquet
+    python -m utils.crawler --competencia 202508 --reiniciar
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+from requests.exceptions import RequestException
+
+from .api_client import (
+    APIClient, baixar_particoes, get_api_client, montar_parametros, montar_parametros_uf,
+    validar_dados_api
+)
+from .archive import arquivar_resposta
+from .cache import ResponseCache
+from .change_detection import Changeset, FingerprintStore
+from .municipios import ANEXO_VI_FILE
+from .payment_store import PaymentStore, STORE_DIR
+
+# Diretório base das coletas em lote
+CRAWLER_OUTPUT_DIR = "crawler_output"
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# O checkpoint é regravado a cada CHECKPOINT_INTERVALO municípios ou
+# CHECKPOINT_SEGUNDOS segundos, o que vier primeiro, e ao final da execução
+CHECKPOINT_INTERVALO = 100
+CHECKPOINT_SEGUNDOS = 5.0
+
+# Changeset da última execução, gravado ao lado do checkpoint
+CHANGESET_FILE = "changeset.json"
+
+# Subdiretório com um arquivo de resultado por município
+RESULTADOS_DIR = "municipios"
+
+# Padrões conservadores para não sobrecarregar o endpoint federal
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10.0
+
+
+def carregar_municipios_anexo(path: str = ANEXO_VI_FILE) -> List[Dict[str, str]]:
+    """
+    Lê a lista de municípios do Anexo VI da Portaria 3.493.
+
+    Args:
+        path: Caminho do arquivo CSV (separado por ponto e vírgula)
+
+    Returns:
+        List[Dict]: Municípios com as chaves "uf", "ibge" e "nome"
+    """
+    municipios = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader, None)  # Cabeçalho
+        for row in reader:
+            if len(row) < 3 or not row[1].strip().isdigit():
+                continue
+            municipios.append({"uf": row[0].strip(), "ibge": row[1].strip(), "nome": row[2].strip()})
+    return municipios
+
+
+def coletar_uf(co_uf: str, competencia: str, cache: ResponseCache,
+               client: Optional[APIClient] = None, timeout: float = 120) -> List[str]:
+    """
+    Consulta uma UF inteira em uma única requisição e grava uma entrada de
+    cache por município.
+
+    Args:
+        co_uf: Código IBGE da UF (2 dígitos)
+        competencia: Competência no formato AAAAMM
+        cache: Cache de destino, sem limite de entradas (ex.: BulkCrawler.results);
+            o cache compartilhado de respostas descartaria a maior parte da UF
+        client: Cliente HTTP (padrão: cliente compartilhado do processo)
+        timeout: Tempo limite da requisição em segundos
+
+    Returns:
+        List[str]: Códigos IBGE (6 dígitos) dos municípios gravados
+
+    Raises:
+        requests.exceptions.RequestException: Em falhas de rede ou status HTTP de erro
+        ValueError: Se a resposta não estiver no formato esperado
+    """
+    client = client or get_api_client()
+    params = montar_parametros_uf(co_uf, competencia)
+
+    # Cada registro da UF vai para o arquivo do seu município assim que chega
+    gravados = []
+    for co_municipio, dados_municipio in baixar_particoes(client, params, ("coMunicipioIbge",), timeout=timeout):
+        if not co_municipio:
+            continue
+        cache.put(co_municipio, competencia, dados_municipio, params["tipoRelatorio"])
+        arquivar_resposta(co_municipio, competencia, dados_municipio)
+        gravados.append(co_municipio[:6])
+    return gravados
+
+
+class TokenBucket:
+    """Limitador de taxa thread-safe no modelo token bucket."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens repostos por segundo (requisições por segundo)
+            capacity: Tamanho máximo da rajada (padrão: rate)
+        """
+        if rate <= 0:
+            raise ValueError("A taxa do token bucket deve ser positiva.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Bloqueia até que haja tokens disponíveis e os consome."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BulkCrawler:
+    """Coleta em lote, com checkpoint e retomada, de uma competência."""
+
+    def __init__(self, competencia: str, municipios: Optional[List[Dict[str, str]]] = None,
+                 output_dir: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: float = DEFAULT_RATE, client: Optional[APIClient] = None,
+                 timeout: float = 30, fingerprints: Optional[FingerprintStore] = None):
+        """
+        Args:
+            competencia: Competência no formato AAAAMM
+            municipios: Municípios a coletar (padrão: todos do Anexo VI)
+            output_dir: Diretório da coleta (padrão: crawler_output/<competencia>)
+            concurrency: Número máximo de requisições simultâneas
+            rate: Requisições por segundo permitidas
+            client: Cliente HTTP (padrão: cliente compartilhado do processo)
+            timeout: Tempo limite de cada requisição em segundos
+            fingerprints: Impressões digitais das coletas anteriores (padrão: banco
+                compartilhado ao lado do cache de respostas, o mesmo do agendador)
+        """
+        if len(competencia) != 6 or not competencia.isdigit():
+            raise ValueError("Competência deve estar no formato AAAAMM (6 dígitos).")
+
+        self.competencia = competencia
+        self.municipios = municipios if municipios is not None else carregar_municipios_anexo()
+        self.output_dir = Path(output_dir or os.path.join(CRAWLER_OUTPUT_DIR, competencia))
+        self.concurrency = concurrency
+        self.client = client or get_api_client()
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate)
+        self.results = ResponseCache(cache_dir=str(self.output_dir / RESULTADOS_DIR), max_entries=None, ttl=None)
+        self.fingerprints = fingerprints or FingerprintStore()
+        self._checkpoint_path = self.output_dir / CHECKPOINT_FILE
+        self._changeset_path = self.output_dir / CHANGESET_FILE
+        self._lock = threading.Lock()
+        self.checkpoint = self._load_checkpoint()
+        self._nao_gravados = 0
+        self._ultima_gravacao = time.monotonic()
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Carrega o checkpoint da competência, se existir."""
+        try:
+            with open(self._checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("competencia") == self.competencia:
+                return checkpoint
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {"competencia": self.competencia, "concluidos": {}, "falhas": {}}
+
+    def _save_json(self, path: Path, conteudo: Dict[str, Any]) -> None:
+        """Grava um arquivo JSON da coleta de forma atômica (arquivo temporário + rename)."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(conteudo, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _save_checkpoint(self) -> None:
+        """Grava o checkpoint de forma atômica."""
+        self._save_json(self._checkpoint_path, self.checkpoint)
+        self._nao_gravados = 0
+        self._ultima_gravacao = time.monotonic()
+
+    def _flush_checkpoint(self) -> None:
+        """Grava o checkpoint se houver resultados ainda não gravados."""
+        with self._lock:
+            if self._nao_gravados:
+                self._save_checkpoint()
+
+    def reiniciar(self) -> None:
+        """Descarta o checkpoint para coletar novamente todos os municípios."""
+        with self._lock:
+            self.checkpoint = {"competencia": self.competencia, "concluidos": {}, "falhas": {}}
+            self._save_checkpoint()
+
+    def _registrar_changeset(self, gravados: List[str]) -> Changeset:
+        """
+        Compara os municípios gravados nesta execução com as coletas anteriores
+        (desta ou da última parcela) e grava o changeset ao lado do checkpoint.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        respostas = (self.results.get(codigo, self.competencia) or {} for codigo in gravados)
+        changeset = self.fingerprints.registrar(respostas)
+        self._save_json(self._changeset_path, {"competencia": self.competencia, **changeset.to_dict()})
+        return changeset
+
+    def pendentes(self) -> List[Dict[str, str]]:
+        """Municípios ainda não concluídos nesta competência."""
+        concluidos = self.checkpoint["concluidos"]
+        return [m for m in self.municipios if m["ibge"][:6] not in concluidos]
+
+    def _registrar(self, codigo: str, status: Optional[str], erro: Optional[str] = None) -> None:
+        """Registra o resultado de um município; o checkpoint é gravado em lotes."""
+        with self._lock:
+            if erro is None:
+                self.checkpoint["concluidos"][codigo] = status
+                self.checkpoint["falhas"].pop(codigo, None)
+            else:
+                self.checkpoint["falhas"][codigo] = erro
+            self._nao_gravados += 1
+            if (self._nao_gravados >= CHECKPOINT_INTERVALO
+                    or time.monotonic() - self._ultima_gravacao >= CHECKPOINT_SEGUNDOS):
+                self._save_checkpoint()
+
+    def coletar_municipio(self, municipio: Dict[str, str]) -> str:
+        """
+        Consulta e grava os dados de um município.
+
+        Returns:
+            str: "ok" se houve dados, "sem_dados" se a API não retornou registros
+        """
+        params = montar_parametros(municipio["ibge"], self.competencia)
+        self.rate_limiter.acquire()
+        resposta = self.client.fetch(params, timeout=self.timeout)
+        dados = resposta.dados
+
+        if not validar_dados_api(dados):
+            raise ValueError("Dados recebidos da API estão em formato inválido.")
+
+        if not dados.get("pagamentos") and not dados.get("resumosPlanosOrcamentarios"):
+            return "sem_dados"
+
+        self.results.put(params["coMunicipio"], self.competencia, dados, params["tipoRelatorio"],
+                         metadata=resposta.validators)
+        arquivar_resposta(params["coMunicipio"], self.competencia, dados)
+        return "ok"
+
+    def run(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Executa (ou retoma) a coleta dos municípios pendentes.
+
+        Args:
+            progress_callback: Função chamada com (processados, total) após cada município
+
+        Returns:
+            Dict: Resumo com totais de concluídos, sem dados, falhas e duração
+        """
+        pendentes = self.pendentes()
+        total = len(pendentes)
+        processados = 0
+        inicio = time.monotonic()
+        gravados = []
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawler")
+        futures = {executor.submit(self.coletar_municipio, m): m for m in pendentes}
+        registrados = set()
+
+        def registrar(future) -> None:
+            codigo = futures[future]["ibge"][:6]
+            registrados.add(future)
+            try:
+                status = future.result()
+                self._registrar(codigo, status)
+            except (RequestException, ValueError) as e:
+                self._registrar(codigo, None, erro=str(e))
+            else:
+                if status == "ok":
+                    gravados.append(codigo)
+
+        try:
+            for future in as_completed(futures):
+                registrar(future)
+                processados += 1
+                if progress_callback:
+                    progress_callback(processados, total)
+        except KeyboardInterrupt:
+            # Descarta a fila; municípios já concluídos entram no checkpoint antes de sair
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future in futures:
+                if future.done() and not future.cancelled() and future not in registrados:
+                    registrar(future)
+            self._flush_checkpoint()
+            self._registrar_changeset(gravados)
+            raise
+        executor.shutdown()
+        self._flush_checkpoint()
+
+        return self._resumo(processados, inicio, self._registrar_changeset(gravados))
+
+    def run_por_uf(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Executa (ou retoma) a coleta com uma requisição por UF.
+
+        Municípios ausentes da resposta da UF são registrados como "sem_dados".
+
+        Args:
+            progress_callback: Função chamada com (UFs processadas, total de UFs)
+
+        Returns:
+            Dict: Resumo com totais de concluídos, sem dados, falhas e duração
+        """
+        pendentes_por_uf: Dict[str, List[str]] = {}
+        for municipio in self.pendentes():
+            pendentes_por_uf.setdefault(municipio["ibge"][:2], []).append(municipio["ibge"][:6])
+
+        total = len(pendentes_por_uf)
+        processados = 0
+        inicio = time.monotonic()
+        gravados_total = []
+
+        try:
+            for co_uf, codigos in pendentes_por_uf.items():
+                self.rate_limiter.acquire()
+                try:
+                    gravados = set(coletar_uf(co_uf, self.competencia, self.results, self.client))
+                except (RequestException, ValueError) as e:
+                    for codigo in codigos:
+                        self._registrar(codigo, None, erro=str(e))
+                else:
+                    with self._lock:
+                        for codigo in codigos:
+                            self.checkpoint["concluidos"][codigo] = "ok" if codigo in gravados else "sem_dados"
+                            self.checkpoint["falhas"].pop(codigo, None)
+                        self._save_checkpoint()
+                    gravados_total.extend(codigo for codigo in codigos if codigo in gravados)
+                processados += 1
+                if progress_callback:
+                    progress_callback(processados, total)
+        except KeyboardInterrupt:
+            self._flush_checkpoint()
+            self._registrar_changeset(gravados_total)
+            raise
+        self._flush_checkpoint()
+
+        return self._resumo(processados, inicio, self._registrar_changeset(gravados_total))
+
+    def _resumo(self, processados: int, inicio: float, changeset: Changeset) -> Dict[str, Any]:
+        """Monta o resumo da execução a partir do checkpoint e do changeset."""
+        status = list(self.checkpoint["concluidos"].values())
+        return {
+            "competencia": self.competencia,
+            "processados": processados,
+            "concluidos": status.count("ok"),
+            "sem_dados": status.count("sem_dados"),
+            "falhas": len(self.checkpoint["falhas"]),
+            # Lista completa em CHANGESET_FILE, ao lado do checkpoint
+            "alterados": len(changeset.municipios),
+            "inalterados": changeset.inalterados,
+            "duracao_segundos": round(time.monotonic() - inicio, 2),
+        }
+
+
+def main() -> None:
+    """Ponto de entrada de linha de comando do crawler."""
+    parser = argparse.ArgumentParser(description="Coleta em lote dos pagamentos de uma competência.")
+    parser.add_argument("--competencia", required=True, help="Competência no formato AAAAMM")
+    parser.add_argument("--uf", help="Restringe a coleta a uma UF (sigla)")
+    parser.add_argument("--output-dir", help="Diretório dos resultados")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Requisições por segundo")
+    parser.add_argument("--por-uf", action="store_true",
+                        help="Uma requisição por UF (unidadeGeografica=ESTADO) em vez de uma por município")
+    parser.add_argument("--parquet", nargs="?", const=STORE_DIR, metavar="DIR",
+                        help="Exporta os resultados para o armazenamento colunar (padrão: %(const)s)")
+    parser.add_argument("--reiniciar", action="store_true",
+                        help="Ignora o checkpoint e coleta novamente todos os municípios")
+    args = parser.parse_args()
+
+    municipios = carregar_municipios_anexo()
+    if args.uf:
+        municipios = [m for m in municipios if m["uf"] == args.uf.upper()]
+
+    crawler = BulkCrawler(args.competencia, municipios, args.output_dir, args.concurrency, args.rate)
+    if args.reiniciar:
+        crawler.reiniciar()
+
+    unidade = "UFs" if args.por_uf else "municípios"
+
+    def progresso(processados: int, total: int) -> None:
+        print(f"\r{processados}/{total} {unidade}", end="", flush=True)
+
+    resumo = crawler.run_por_uf(progresso) if args.por_uf else crawler.run(progresso)
+    print()
+    if args.parquet:
+        resumo["exportados_parquet"] = PaymentStore(args.parquet).importar_cache(crawler.results)
+    print(json.dumps(resumo, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,12 @@ Funções para manipulação de dados na Calculadora PAP.
 Versão refatorada que utiliza o APIClient consolidado.
 """
 import streamlit as st
-from typing import Optional, Dict, Any
-from .api_client import APIClient, load_data_from_json as load_cache_data, consultar_api as api_consultar
+import pandas as pd
+from typing import Optional, Dict, Any, Iterable
+from .api_client import (
+    APIClient, CONSULTA_ATUAL_KEY, load_data_from_json as load_cache_data, consultar_api as api_consultar
+)
+from .payment_store import get_payment_store
 
 # Nome do arquivo JSON legado para compatibilidade
 DATA_FILE = "data.json"
@@ -39,16 +43,20 @@ def get_estrato(ied: Optional[str] = None) -> str:
     st.info("💡 **Dica**: Certifique-se de que os dados foram carregados corretamente na página 'Consulta Dados'.")
     st.stop()
 
-def load_data_from_json() -> Dict[str, Any]:
+def load_data_from_json(codigo_ibge: Optional[str] = None, competencia: Optional[str] = None) -> Dict[str, Any]:
     """
     Carrega os dados do arquivo de cache. 
     Mantém compatibilidade com data.json e data_cache.json.
     
+    Args:
+        codigo_ibge: Código IBGE do município (opcional, padrão: consulta atual da sessão)
+        competencia: Competência no formato AAAAMM (opcional)
+    
     Returns:
         Dict: Dados carregados do cache ou dicionário vazio
     """
     # Primeiro tenta carregar do cache moderno
-    dados = load_cache_data()
+    dados = load_cache_data(codigo_ibge, competencia)
     
     if dados:
         return dados
@@ -67,6 +75,33 @@ def load_data_from_json() -> Dict[str, Any]:
         st.error("❌ Erro ao decodificar arquivo de dados. Arquivo pode estar corrompido.")
         return {}
 
+def load_pagamentos_dataframe(colunas: Iterable[str]) -> pd.DataFrame:
+    """
+    Carrega os pagamentos da consulta atual apenas com as colunas informadas.
+
+    Usa o armazenamento colunar (Parquet) quando a consulta já foi gravada nele,
+    com quantidades inteiras e valores monetários numéricos; caso contrário,
+    monta o DataFrame a partir do cache JSON.
+
+    Args:
+        colunas: Colunas de pagamentos necessárias
+
+    Returns:
+        pd.DataFrame: Pagamentos do município (vazio se não houver dados)
+    """
+    colunas = list(colunas)
+    consulta_atual = st.session_state.get(CONSULTA_ATUAL_KEY) or {}
+    store = get_payment_store()
+    if store is not None and consulta_atual:
+        df = store.carregar_pagamentos(competencia=consulta_atual.get("nuParcela"), colunas=colunas,
+                                       municipio=consulta_atual.get("coMunicipio"))
+        if not df.empty:
+            return df
+
+    dados = load_data_from_json()
+    df = pd.DataFrame(dados.get("pagamentos", []) if dados else [])
+    return df[[c for c in colunas if c in df.columns]]
+
 def consultar_api(codigo_ibge: str, competencia: str) -> Optional[Dict[str, Any]]:
     """
     Consulta a API de financiamento da saúde.
@@ -0,0 +1,294 @@
+"""
+Leitura incremental de respostas JSON grandes da API de financiamento.
+
+Em vez de materializar a resposta inteira (response.json()), o parser lê o
+corpo em blocos e entrega os registros de "pagamentos" e
+"resumosPlanosOrcamentarios" um a um. Apenas o registro em decodificação e o
+bloco atual ficam em memória, qualquer que seja o tamanho da resposta.
+"""
+import codecs
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .partitioning import SECOES_REGISTROS, Chave, chave_registro
+
+# Tamanho padrão dos blocos lidos da conexão
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+# Destino dos registros: função chamada com (seção, registro)
+Sink = Callable[[str, Dict[str, Any]], None]
+
+# Arquivos de partição mantidos abertos simultaneamente por ParticaoSink
+MAX_ARQUIVOS_ABERTOS = 64
+
+
+class _StreamBuffer:
+    """Buffer de texto alimentado sob demanda a partir de blocos de bytes ou texto."""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self) -> bool:
+        """Lê o próximo bloco. Retorna False se o fluxo terminou."""
+        if self.exhausted:
+            return False
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                # Descarta o que já foi consumido antes de anexar o novo bloco
+                self.text = self.text[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.text = self.text[self.pos:] + self._decoder.decode(b"", final=True)
+        self.pos = 0
+        self.exhausted = True
+        return False
+
+    def skip_whitespace(self) -> None:
+        """Avança sobre espaços em branco, lendo mais blocos se necessário."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.fill():
+                return
+
+    def peek(self) -> str:
+        """Retorna o próximo caractere significativo sem consumi-lo."""
+        self.skip_whitespace()
+        if self.pos >= len(self.text):
+            raise json.JSONDecodeError("Fim inesperado da resposta", self.text, self.pos)
+        return self.text[self.pos]
+
+    def expect(self, caracteres: str) -> str:
+        """Consome o próximo caractere significativo, que deve estar em caracteres."""
+        char = self.peek()
+        if char not in caracteres:
+            raise json.JSONDecodeError(f"Esperado um de {caracteres!r}", self.text, self.pos)
+        self.pos += 1
+        return char
+
+    def decode_value(self, decoder: json.JSONDecoder) -> Any:
+        """Decodifica um valor JSON completo, lendo blocos até que esteja disponível."""
+        self.skip_whitespace()
+        while True:
+            try:
+                valor, fim = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Um número no fim do buffer pode continuar no próximo bloco
+            if fim == len(self.text) and self.fill():
+                continue
+            self.pos = fim
+            return valor
+
+
+def iterar_json_stream(chunks: Iterable[Union[bytes, str]],
+                       secoes: Tuple[str, ...] = SECOES_REGISTROS,
+                       secoes_vistas: Optional[Set[str]] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Percorre incrementalmente um objeto JSON de resposta da API.
+
+    Args:
+        chunks: Blocos de bytes (UTF-8) ou texto, na ordem em que chegam
+        secoes: Chaves cujas listas devem ser entregues registro a registro
+        secoes_vistas: Conjunto que recebe as seções presentes na resposta,
+            inclusive as vazias (que não produzem nenhum item)
+
+    Yields:
+        Tuple[str, Any]: (seção, registro) para cada item das seções listadas e
+        (campo, valor) para os demais campos do objeto principal
+
+    Raises:
+        json.JSONDecodeError: Se a resposta não for um objeto JSON válido
+    """
+    buffer = _StreamBuffer(chunks)
+    decoder = json.JSONDecoder()
+
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+
+    while True:
+        chave = buffer.decode_value(decoder)
+        if not isinstance(chave, str):
+            raise json.JSONDecodeError("Chave inválida no objeto", buffer.text, buffer.pos)
+        buffer.expect(":")
+
+        if chave in secoes and secoes_vistas is not None:
+            secoes_vistas.add(chave)
+
+        if chave in secoes and buffer.peek() == "[":
+            buffer.pos += 1
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield chave, buffer.decode_value(decoder)
+                    if buffer.expect(",]") == "]":
+                        break
+        else:
+            yield chave, buffer.decode_value(decoder)
+
+        if buffer.expect(",}") == "}":
+            return
+
+
+def processar_json_stream(chunks: Iterable[Union[bytes, str]], sink: Sink,
+                          secoes: Tuple[str, ...] = SECOES_REGISTROS) -> Dict[str, Any]:
+    """
+    Entrega cada registro das seções a um destino fornecido pelo chamador.
+
+    Args:
+        chunks: Blocos da resposta
+        sink: Função chamada com (seção, registro) para cada registro
+        secoes: Seções cujos registros são entregues ao destino
+
+    Returns:
+        Dict: Campos escalares da resposta, a contagem de registros por seção
+            na chave "_contagem" e as seções presentes (mesmo vazias ou nulas)
+            na chave "_secoes"
+    """
+    cabecalho: Dict[str, Any] = {}
+    contagem = {secao: 0 for secao in secoes}
+    vistas: Set[str] = set()
+    for chave, valor in iterar_json_stream(chunks, secoes, vistas):
+        if chave in contagem:
+            # Seções nulas chegam como um único valor em vez de registros
+            if isinstance(valor, dict):
+                sink(chave, valor)
+                contagem[chave] += 1
+        else:
+            cabecalho[chave] = valor
+    cabecalho["_contagem"] = contagem
+    cabecalho["_secoes"] = sorted(vistas)
+    return cabecalho
+
+
+class JsonLinesSink:
+    """Destino que grava cada registro como uma linha JSON em um arquivo."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self) -> "JsonLinesSink":
+        self._file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __call__(self, secao: str, registro: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"secao": secao, "registro": registro}, ensure_ascii=False))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        """Fecha o arquivo de destino."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def iterar_json_lines(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Relê um arquivo gravado por JsonLinesSink, registro a registro."""
+    with open(path, "r", encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                item = json.loads(linha)
+                yield item["secao"], item["registro"]
+
+
+class ParticaoSink:
+    """
+    Destino que grava cada registro no arquivo JSON Lines da sua partição
+    (município, competência...) assim que ele chega.
+
+    Depois de lida a resposta, as partições são remontadas uma a uma por
+    particoes(); a memória fica limitada a uma partição, e não à resposta
+    inteira.
+    """
+
+    def __init__(self, diretorio: str, campos: Tuple[str, ...], max_abertos: int = MAX_ARQUIVOS_ABERTOS):
+        """
+        Args:
+            diretorio: Diretório onde os arquivos das partições são gravados
+            campos: Campos que formam a chave de partição (ex.: ("coMunicipioIbge",))
+            max_abertos: Arquivos mantidos abertos ao mesmo tempo
+        """
+        self.diretorio = diretorio
+        self.campos = campos
+        self.max_abertos = max_abertos
+        self._paths: Dict[Chave, str] = {}
+        self._abertos: "OrderedDict[Chave, IO[str]]" = OrderedDict()
+
+    def __enter__(self) -> "ParticaoSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _arquivo(self, chave: Chave) -> IO[str]:
+        """Retorna o arquivo aberto da partição, fechando o menos recente se necessário."""
+        arquivo = self._abertos.get(chave)
+        if arquivo is not None:
+            self._abertos.move_to_end(chave)
+            return arquivo
+        if len(self._abertos) >= self.max_abertos:
+            _, antigo = self._abertos.popitem(last=False)
+            antigo.close()
+        if chave not in self._paths:
+            self._paths[chave] = os.path.join(self.diretorio, f"{len(self._paths)}.jsonl")
+        arquivo = open(self._paths[chave], "a", encoding="utf-8")
+        self._abertos[chave] = arquivo
+        return arquivo
+
+    def __call__(self, secao: str, registro: Dict[str, Any]) -> None:
+        # Seções nulas chegam como um único valor em vez de registros
+        if not isinstance(registro, dict):
+            return
+        arquivo = self._arquivo(chave_registro(registro, self.campos))
+        arquivo.write(json.dumps({"secao": secao, "registro": registro}, ensure_ascii=False))
+        arquivo.write("\n")
+
+    @property
+    def chaves(self) -> List[Chave]:
+        """Chaves das partições, na ordem em que apareceram."""
+        return list(self._paths)
+
+    def particoes(self, cabecalho: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[Chave, Dict[str, Any]]]:
+        """
+        Remonta cada partição no formato da API, uma de cada vez.
+
+        Args:
+            cabecalho: Campos escalares da resposta replicados em cada partição
+
+        Yields:
+            Tuple: (chave de partição, resposta parcial)
+        """
+        self.close()
+        for chave, path in self._paths.items():
+            dados = dict(cabecalho or {})
+            for nome in SECOES_REGISTROS:
+                dados[nome] = []
+            for secao, registro in iterar_json_lines(path):
+                dados[secao].append(registro)
+            yield chave, dados
+
+    def close(self) -> None:
+        """Fecha os arquivos das partições."""
+        while self._abertos:
+            _, arquivo = self._abertos.popitem()
+            arquivo.close()
@@ -0,0 +1,418 @@
+"""
+Índice de referência dos municípios, compilado do Anexo VI da Portaria 3.493.
+
+O CSV (UF, IBGE, nome, IVS, população, porte e IED) é compilado uma única
+vez em um arquivo binário compacto (municipios.idx): registros de tamanho
+fixo ordenados pelo código IBGE e uma tabela de nomes em UTF-8. O índice é
+carregado uma vez por processo e oferece consultas O(1) por código IBGE
+(6 ou 7 dígitos, inclusive no formato "1200013.0" do pyUFbr e do ied.json)
+e por (UF, nome), substituindo as listas do pyUFbr nas páginas, além de
+uma busca por nome ou código que não diferencia acentos nem maiúsculas.
+
+O arquivo guarda o hash do CSV de origem e é recompilado automaticamente
+quando o CSV muda.
+
+Uso:
+    python -m utils.municipios --build
+"""
+import argparse
+import bisect
+import csv
+import hashlib
+import os
+import re
+import struct
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Lista oficial de municípios (UF;IBGE;Nome;...)
+ANEXO_VI_FILE = "Anexo VI Portaria 3493.csv"
+
+INDEX_FILE = "municipios.idx"
+
+MAGIC = b"PAPMUN1\n"
+
+# Cabeçalho: hash SHA-256 do CSV de origem e número de registros
+_CABECALHO = struct.Struct("<32sI")
+
+# Registro: código IBGE (7 dígitos), UF, IVS, população, porte, IED, posição e tamanho do nome
+_REGISTRO = struct.Struct("<I2sBIBBIH")
+
+# Faixas de porte populacional do Anexo VI
+PORTES = {
+    1: "1-Até 20mil hab.",
+    2: "2-Acima de 20mil até 50mil hab.",
+    3: "3-Acima de 50mil até 100mil hab.",
+    4: "4-Acima de 100mil hab.",
+}
+
+# Municípios cujo dígito verificador não segue a regra do IBGE
+DV_EXCECOES = {
+    "220191": "9", "220198": "8", "220225": "1", "261153": "3", "311783": "6",
+    "315213": "1", "430587": "1", "520393": "9", "520396": "2",
+}
+
+
+def digito_verificador(codigo6: str) -> str:
+    """Dígito verificador do código IBGE de 6 dígitos (pesos 1 e 2, módulo 10)."""
+    if codigo6 in DV_EXCECOES:
+        return DV_EXCECOES[codigo6]
+    soma = 0
+    for posicao, digito in enumerate(codigo6):
+        produto = int(digito) * (1 if posicao % 2 == 0 else 2)
+        soma += produto // 10 + produto % 10
+    return str((10 - soma % 10) % 10)
+
+
+def normalizar_codigo(codigo) -> Optional[str]:
+    """
+    Converte um código IBGE em qualquer formato para 6 dígitos.
+
+    Aceita 6 ou 7 dígitos, números e strings como "1200013.0".
+
+    Returns:
+        Optional[str]: Código de 6 dígitos, ou None se inválido
+    """
+    if codigo is None:
+        return None
+    texto = str(codigo).strip()
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    if not texto.isdigit() or len(texto) not in (6, 7):
+        return None
+    return texto[:6]
+
+
+# Limite de resultados da busca e similaridade mínima por trigramas
+LIMITE_BUSCA = 10
+SIMILARIDADE_MINIMA = 0.5
+
+
+def _chave_nome(nome: str) -> str:
+    return " ".join(nome.split()).upper()
+
+
+def normalizar_texto(texto: str) -> str:
+    """Remove acentos e pontuação e converte para maiúsculas ("São José" -> "SAO JOSE")."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9A-Za-z]+", " ", sem_acentos).split()).upper()
+
+
+def _trigramas(texto: str) -> Set[str]:
+    texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+@dataclass(frozen=True)
+class Municipio:
+    """Dados de referência de um município."""
+    codigo: str
+    uf: str
+    nome: str
+    ivs: int
+    populacao: int
+    porte: int
+    ied: int
+
+    @property
+    def codigo6(self) -> str:
+        """Código IBGE de 6 dígitos, usado pela API."""
+        return self.codigo[:6]
+
+    @property
+    def porte_descricao(self) -> str:
+        return PORTES.get(self.porte, "")
+
+    @property
+    def estrato(self) -> str:
+        """IED no formato de dsFaixaIndiceEquidadeEsfEap ("ESTRATO X")."""
+        return f"ESTRATO {self.ied}"
+
+
+def _inteiro(valor: str) -> int:
+    """Converte números do Anexo VI ("33.507") para int."""
+    valor = valor.strip().replace(".", "")
+    return int(valor) if valor.isdigit() else 0
+
+
+def ler_anexo_vi(path: str = ANEXO_VI_FILE) -> List[Municipio]:
+    """
+    Lê os municípios do Anexo VI.
+
+    Returns:
+        List[Municipio]: Municípios com código IBGE de 7 dígitos
+    """
+    municipios = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader, None)  # Cabeçalho
+        for row in reader:
+            if len(row) < 7 or not row[1].strip().isdigit():
+                continue
+            codigo6 = row[1].strip()[:6]
+            municipios.append(Municipio(
+                codigo=codigo6 + digito_verificador(codigo6), uf=row[0].strip(), nome=row[2].strip(),
+                ivs=_inteiro(row[3]), populacao=_inteiro(row[4]), porte=_inteiro(row[5][:1]),
+                ied=_inteiro(row[6]),
+            ))
+    return municipios
+
+
+class MunicipioIndex:
+    """Índice em memória com consultas O(1) por código e por (UF, nome)."""
+
+    def __init__(self, municipios: Iterable[Municipio], origem: bytes = b""):
+        """
+        Args:
+            municipios: Municípios do índice
+            origem: Hash SHA-256 do CSV de origem
+        """
+        self.origem = origem
+        self._por_codigo: Dict[str, Municipio] = {}
+        self._por_nome: Dict[Tuple[str, str], Municipio] = {}
+        self._por_uf: Dict[str, List[Municipio]] = {}
+        for municipio in sorted(municipios, key=lambda m: m.codigo):
+            self._por_codigo[municipio.codigo6] = municipio
+            self._por_nome[(municipio.uf, _chave_nome(municipio.nome))] = municipio
+            self._por_uf.setdefault(municipio.uf, []).append(municipio)
+        for lista in self._por_uf.values():
+            lista.sort(key=lambda m: m.nome)
+        self._busca = None
+
+    def __len__(self) -> int:
+        return len(self._por_codigo)
+
+    def __contains__(self, codigo) -> bool:
+        return self.get(codigo) is not None
+
+    def get(self, codigo) -> Optional[Municipio]:
+        """Município pelo código IBGE (6 ou 7 dígitos, em qualquer formato)."""
+        return self._por_codigo.get(normalizar_codigo(codigo))
+
+    def por_nome(self, uf: str, nome: str) -> Optional[Municipio]:
+        """Município pelo nome (sem diferenciar maiúsculas) dentro da UF."""
+        return self._por_nome.get((uf.upper(), _chave_nome(nome)))
+
+    def codigo(self, uf: str, nome: str) -> Optional[str]:
+        """Código IBGE de 7 dígitos a partir da UF e do nome."""
+        municipio = self.por_nome(uf, nome)
+        return municipio.codigo if municipio else None
+
+    def ufs(self) -> List[str]:
+        """Siglas das UFs, em ordem alfabética."""
+        return sorted(self._por_uf)
+
+    def municipios(self, uf: Optional[str] = None) -> List[Municipio]:
+        """Municípios da UF (ou todos), em ordem alfabética de nome."""
+        if uf is not None:
+            return list(self._por_uf.get(uf.upper(), []))
+        return [m for sigla in self.ufs() for m in self._por_uf[sigla]]
+
+    def nomes(self, uf: str) -> List[str]:
+        """Nomes dos municípios da UF, em ordem alfabética."""
+        return [m.nome for m in self._por_uf.get(uf.upper(), [])]
+
+    def _indice_busca(self) -> Tuple[List[str], List[Tuple[str, bool]], List[str], Dict[str, List[str]], Dict[str, int]]:
+        """Estruturas da busca, montadas na primeira consulta."""
+        if self._busca is None:
+            sufixos = []
+            trigramas: Dict[str, List[str]] = {}
+            tamanhos: Dict[str, int] = {}
+            for codigo, municipio in self._por_codigo.items():
+                nome = normalizar_texto(municipio.nome)
+                palavras = nome.split()
+                # Cada início de palavra permite buscar "jose" em "SAO JOSE DOS CAMPOS"
+                for posicao in range(len(palavras)):
+                    sufixos.append((" ".join(palavras[posicao:]), posicao == 0, codigo))
+                nome_trigramas = _trigramas(nome)
+                tamanhos[codigo] = len(nome_trigramas)
+                for trigrama in nome_trigramas:
+                    trigramas.setdefault(trigrama, []).append(codigo)
+            sufixos.sort()
+            chaves = [sufixo for sufixo, _, _ in sufixos]
+            entradas = [(codigo, inicio) for _, inicio, codigo in sufixos]
+            codigos = sorted(m.codigo for m in self._por_codigo.values())
+            self._busca = (chaves, entradas, codigos, trigramas, tamanhos)
+        return self._busca
+
+    def buscar(self, termo: str, uf: Optional[str] = None, limite: int = LIMITE_BUSCA) -> List[Municipio]:
+        """
+        Busca municípios por nome ou código IBGE, sem diferenciar acentos e maiúsculas.
+
+        Nomes são buscados pelo prefixo de qualquer palavra ("sao jose",
+        "campos"); sem resultados suficientes, a busca tolera erros de
+        digitação por similaridade de trigramas. Termos numéricos buscam o
+        prefixo do código IBGE.
+
+        Args:
+            termo: Nome, parte do nome ou prefixo do código IBGE
+            uf: Sigla da UF para restringir a busca
+            limite: Número máximo de resultados
+
+        Returns:
+            List[Municipio]: Nome exato primeiro, depois início do nome,
+            início de outra palavra e similares, cada grupo por população
+        """
+        consulta = normalizar_texto(termo)
+        if not consulta:
+            return []
+        uf = uf.upper() if uf else None
+        chaves, entradas, codigos, trigramas, tamanhos = self._indice_busca()
+
+        if consulta.isdigit():
+            resultados = []
+            posicao = bisect.bisect_left(codigos, consulta)
+            while posicao < len(codigos) and codigos[posicao].startswith(consulta) and len(resultados) < limite:
+                municipio = self._por_codigo[codigos[posicao][:6]]
+                if uf is None or municipio.uf == uf:
+                    resultados.append(municipio)
+                posicao += 1
+            return resultados
+
+        pontos: Dict[str, float] = {}
+        posicao = bisect.bisect_left(chaves, consulta)
+        while posicao < len(chaves) and chaves[posicao].startswith(consulta):
+            codigo, inicio = entradas[posicao]
+            ponto = (3.0 if chaves[posicao] == consulta else 2.0) if inicio else 1.0
+            pontos[codigo] = max(pontos.get(codigo, 0.0), ponto)
+            posicao += 1
+        if uf:
+            pontos = {codigo: ponto for codigo, ponto in pontos.items() if self._por_codigo[codigo].uf == uf}
+
+        if len(pontos) < limite:
+            consulta_trigramas = _trigramas(consulta)
+            comuns: Counter = Counter()
+            for trigrama in consulta_trigramas:
+                comuns.update(trigramas.get(trigrama, ()))
+            for codigo, total in comuns.items():
+                similaridade = 2 * total / (len(consulta_trigramas) + tamanhos[codigo])
+                if similaridade >= SIMILARIDADE_MINIMA and codigo not in pontos \
+                        and (uf is None or self._por_codigo[codigo].uf == uf):
+                    pontos[codigo] = similaridade
+
+        ordenados = sorted(pontos, key=lambda c: (-pontos[c], -self._por_codigo[c].populacao, self._por_codigo[c].nome))
+        return [self._por_codigo[codigo] for codigo in ordenados[:limite]]
+
+    def to_bytes(self) -> bytes:
+        """Serializa o índice no formato binário compacto."""
+        municipios = sorted(self._por_codigo.values(), key=lambda m: m.codigo)
+        nomes = bytearray()
+        registros = bytearray()
+        for m in municipios:
+            nome = m.nome.encode("utf-8")
+            registros += _REGISTRO.pack(int(m.codigo), m.uf.encode("ascii"), m.ivs, m.populacao,
+                                        m.porte, m.ied, len(nomes), len(nome))
+            nomes += nome
+        return MAGIC + _CABECALHO.pack(self.origem.ljust(32, b"\0"), len(municipios)) + bytes(registros) + bytes(nomes)
+
+    @classmethod
+    def from_bytes(cls, conteudo: bytes) -> "MunicipioIndex":
+        """
+        Carrega um índice serializado por to_bytes.
+
+        Raises:
+            ValueError: Se o conteúdo não for um índice válido
+        """
+        if not conteudo.startswith(MAGIC):
+            raise ValueError("Arquivo de índice de municípios inválido")
+        try:
+            origem, total = _CABECALHO.unpack_from(conteudo, len(MAGIC))
+            inicio = len(MAGIC) + _CABECALHO.size
+            fim = inicio + total * _REGISTRO.size
+            nomes = conteudo[fim:]
+            municipios = []
+            for codigo, uf, ivs, populacao, porte, ied, posicao, tamanho in _REGISTRO.iter_unpack(conteudo[inicio:fim]):
+                municipios.append(Municipio(
+                    codigo=f"{codigo:07d}", uf=uf.decode("ascii"), nome=nomes[posicao:posicao + tamanho].decode("utf-8"),
+                    ivs=ivs, populacao=populacao, porte=porte, ied=ied,
+                ))
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Arquivo de índice de municípios corrompido: {e}") from e
+        return cls(municipios, origem)
+
+
+def _hash_arquivo(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compilar_indice(csv_path: str = ANEXO_VI_FILE, index_path: str = INDEX_FILE) -> MunicipioIndex:
+    """
+    Compila o CSV do Anexo VI no arquivo de índice (gravação atômica).
+
+    Returns:
+        MunicipioIndex: O índice compilado
+    """
+    indice = MunicipioIndex(ler_anexo_vi(csv_path), _hash_arquivo(csv_path))
+    diretorio = os.path.dirname(os.path.abspath(index_path))
+    fd, tmp_path = tempfile.mkstemp(dir=diretorio, prefix=".municipios.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(indice.to_bytes())
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return indice
+
+
+def carregar_indice(csv_path: str = ANEXO_VI_FILE, index_path: str = INDEX_FILE) -> MunicipioIndex:
+    """
+    Carrega o índice compilado, recompilando-o se ausente ou desatualizado.
+
+    Sem permissão de escrita, o índice é montado apenas em memória.
+    """
+    origem = _hash_arquivo(csv_path)
+    try:
+        with open(index_path, "rb") as f:
+            indice = MunicipioIndex.from_bytes(f.read())
+        if indice.origem == origem:
+            return indice
+    except (OSError, ValueError):
+        pass
+    try:
+        return compilar_indice(csv_path, index_path)
+    except OSError:
+        return MunicipioIndex(ler_anexo_vi(csv_path), origem)
+
+
+# Instância global do índice
+_municipio_index = None
+_index_lock = threading.Lock()
+
+def get_municipio_index() -> MunicipioIndex:
+    """
+    Retorna o índice de municípios do processo, carregado uma única vez.
+
+    Returns:
+        MunicipioIndex: Índice compartilhado entre as sessões
+    """
+    global _municipio_index
+    with _index_lock:
+        if _municipio_index is None:
+            _municipio_index = carregar_indice()
+        return _municipio_index
+
+
+def main() -> None:
+    """Ponto de entrada de linha de comando do índice."""
+    parser = argparse.ArgumentParser(description="Compila o índice de municípios a partir do Anexo VI.")
+    parser.add_argument("--build", action="store_true", help="Recompila o índice mesmo se atualizado")
+    parser.add_argument("--csv", default=ANEXO_VI_FILE)
+    parser.add_argument("--output", default=INDEX_FILE)
+    args = parser.parse_args()
+
+    indice = compilar_indice(args.csv, args.output) if args.build else carregar_indice(args.csv, args.output)
+    print(f"{len(indice)} municípios em {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Particionamento local de respostas agregadas da API de financiamento.
+
+Respostas que cobrem vários municípios (unidadeGeografica=ESTADO) ou várias
+competências (nuParcelaInicio/nuParcelaFim) são divididas aqui em respostas
+parciais no mesmo formato de uma consulta individual, prontas para serem
+gravadas como entradas separadas no cache. Para respostas lidas
+incrementalmente, ver ParticaoSink em utils/json_stream.py.
+"""
+from typing import Dict, Any, Iterable, Tuple, Union
+
+# Seções da resposta que contêm registros por município/competência
+SECOES_REGISTROS = ("resumosPlanosOrcamentarios", "pagamentos")
+
+Chave = Union[str, Tuple[str, ...]]
+
+
+def chave_registro(registro: Dict[str, Any], campos: Tuple[str, ...]) -> Chave:
+    """Extrai a chave de partição de um registro."""
+    valores = tuple(str(registro.get(campo, "")) for campo in campos)
+    return valores[0] if len(valores) == 1 else valores
+
+
+def particionar_registros(registros: Iterable[Tuple[str, Dict[str, Any]]],
+                          campos: Tuple[str, ...],
+                          cabecalho: Dict[str, Any] = None) -> Dict[Chave, Dict[str, Any]]:
+    """
+    Agrupa registros (seção, registro) em respostas parciais.
+
+    Args:
+        registros: Pares (nome da seção, registro) em qualquer ordem
+        campos: Campos que formam a chave de partição (ex.: ("coMunicipioIbge",))
+        cabecalho: Campos escalares da resposta original replicados em cada partição
+
+    Returns:
+        Dict: Chave de partição -> resposta parcial no formato da API
+    """
+    particoes: Dict[Chave, Dict[str, Any]] = {}
+    for secao, registro in registros:
+        chave = chave_registro(registro, campos)
+        if chave not in particoes:
+            particoes[chave] = dict(cabecalho or {})
+            for nome in SECOES_REGISTROS:
+                particoes[chave][nome] = []
+        particoes[chave][secao].append(registro)
+    return particoes
+
+
+def iterar_registros(dados: Dict[str, Any]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    """Percorre os registros de todas as seções de uma resposta da API."""
+    for secao in SECOES_REGISTROS:
+        for registro in dados.get(secao) or []:
+            yield secao, registro
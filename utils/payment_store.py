@@ -0,0 +1,384 @@
+"""
+Armazenamento colunar local (Parquet) dos dados de financiamento.
+
+Os registros de "pagamentos" e "resumosPlanosOrcamentarios" são gravados com
+um esquema tipado fixo, particionados por UF e competência:
+
+    payment_store/uf=PE/competencia=202508/pagamentos.parquet
+    payment_store/uf=PE/competencia=202508/resumos.parquet
+
+Quantidades (qt*) são inteiros, valores monetários (vl*) são inteiros em
+centavos e descrições (ds*) são categóricas. Páginas e relatórios carregam
+apenas as colunas de que precisam, sem decodificar JSON nem converter texto.
+
+Vários processos podem gravar no mesmo diretório: cada partição é mesclada
+sob um lock de arquivo próprio e gravada por um arquivo temporário exclusivo
+seguido de rename.
+
+Requer o pacote opcional pyarrow.
+"""
+import glob
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = None
+    pq = None
+
+from .cache import LOCKS_DIR, FileLock, ResponseCache
+from .partitioning import iterar_registros, particionar_registros
+
+# Diretório padrão do armazenamento colunar
+STORE_DIR = "payment_store"
+
+# Arquivos de cada seção dentro de uma partição
+ARQUIVOS_SECOES = {
+    "pagamentos": "pagamentos.parquet",
+    "resumosPlanosOrcamentarios": "resumos.parquet",
+}
+
+# Campos de identificação (texto) presentes em todos os registros
+CAMPOS_IDENTIFICACAO = (
+    "coUfIbge", "sgUf", "coMunicipioIbge", "noMunicipio", "nuCompCnes", "nuParcela",
+)
+
+# Campos de pagamentos, na ordem em que a API os retorna
+CAMPOS_QT_PAGAMENTOS = (
+    "qtEsfCredenciado", "qtEsfHomologado", "qtEsfTotalPgto", "qtEsf100pcPgto", "qtEsf75pcPgto",
+    "qtEsf50pcPgto", "qtEsf25pcPgto", "qtEapCredenciadas", "qtEapHomologado", "qtEapTotalPgto",
+    "qtEap20hCompletas", "qtEap20hIncompletas", "qtEap30hCompletas", "qtEap30hIncompletas",
+    "qtEmultiCredenciadas", "qtEmultiHomologado", "qtEmultiPagas", "qtEmultiPagamentoAmpliada",
+    "qtEmultiPagamentoIntermunicipal", "qtEmultiPagamentoComplementar",
+    "qtEmultiPagamentoEstrategica", "qtEmultiPagasAtendRemoto", "qtSb40hCredenciada",
+    "qtSb40hDifCredenciada", "qtSb40hHomologado", "qtSbChDifHomologado",
+    "qtSbPagamentoModalidadeI", "qtSbPagamentoModalidadeII", "qtSbPagamentoDifModalidade20Horas",
+    "qtSbPagamentoDifModalidade30Horas", "qtSbEquipeImplantacao", "qtSbEqpQuilombAssentModalI",
+    "qtSbEqpQuilombAssentModalII", "qtUomCredenciada", "qtUomHomologado", "qtUomPgto",
+    "qtCnrCredenciado", "qtCnrHomologado", "qtCnrPagamentoModalidadeI",
+    "qtCnrPagamentoModalidadeII", "qtCnrPagamentoModalidadeIII", "qtRibeirinhaCredenciado",
+    "qtRibeirinhaHomologado", "qtRibeirinhaPagas", "qtEmbarcacaoRibeirinha",
+    "qtUnidadeApoioRibeirinha", "qtMicroscopistaRibeirinha", "qtAuxEnfermagemRibeirinha",
+    "qtAuxSaudeBucalRibeirinha", "qtProfNivelSupRibeirinha", "qtTetoAcs", "qtAcsDiretoCredenciado",
+    "qtAcsDiretoPgto", "qtAcsIndiretoCredenciado", "qtAcsIndiretoPgto", "qtUbsfCredenciado",
+    "qtUbsfHomologado", "qtUbsfPgto", "qtAcsDiretoFluvial", "qtAcsIndiretoFluvial",
+    "qtEmbarcacaoFluvial", "qtUnidadeApoioFluvial", "qtMicroscopistaFluvial",
+    "qtAuxEnfermagemFluvial", "qtAuxSaudeBucalFluvial", "qtProfNivelSupFluvial",
+    "qtMicroscopistaCredenciado", "qtMicroscopistaPgto", "qtResidenteMedicoCredenciado",
+    "qtResidenteEnfermeiroCredenciado", "qtResidenteDentistaCredenciado",
+    "qtResidenteMedicoPagamento", "qtResidenteEnfermeiroPagamento", "qtResidenteDentistaPagamento",
+    "qtPrisionalMunicipalCredenciado", "qtPrisionalMunicipalHomologado",
+    "qtPrisionalMunicipalPagamento", "qtPrisionalEstadualCredenciado",
+    "qtPrisionalEstadualHomologado", "qtPagamentoPrisionalEstadual", "qtIafCredenciado",
+    "qtIafHomologado", "qtIafPgto", "qtAcademiaSaudeCredenciado", "qtAcademiaSaudeHomologado",
+    "qtAcademiaSaudePgto", "qtAcademiaSaudeDescredenciamento", "qtPopulacao", "qtTetoEsf",
+    "qtTetoEap", "qtTetoEmultiAmpliadaIntermunicipal", "qtTetoEmultiAmpliada",
+    "qtTetoEmultiComplementar", "qtTetoEmultiEstrategica", "qtTetoSb40h", "qtTetoSbChDif",
+)
+
+CAMPOS_VL_PAGAMENTOS = (
+    "vlFixoEsf", "vlVinculoEsf", "vlQualidadeEsf", "vlTotalEsf", "vlPagamentoImplantacaoEsf",
+    "vlFixoEap", "vlVinculoEap", "vlQualidadeEap", "vlTotalEap", "vlPagamentoImplantacaoEap",
+    "vlPagamentoEmultiAtendimentoRemoto", "vlPagamentoEmultiCusteio", "vlPagamentoEmultiQualidade",
+    "vlTotalEmulti", "vlPagamentoEmultiImplantacao", "vlPagamentoEsb40h",
+    "vlPagamentoImplantacaoEsb40h", "vlPagamentoEsbChDiferenciada", "vlPagamentoEsb40hQualidade",
+    "vlPagamentoUom", "vlPagamentoUomImplantacao", "vlPagamentoCeoMunicipal",
+    "vlPagamentoCeoEstadual", "vlPagamentoLrpdMunicipal", "vlPagamentoLrpdEstadual",
+    "vlPagamentoSesb", "vlPagamentoCnr", "vlPagamentoEsfrb", "vlPagamentoEsfrbQualidade",
+    "vlPagamentoEsfrVinculo", "vlPagamentoEsfrbImplantacao", "vlPagamentoEsfrbExtra",
+    "vlPagamentoAcsDireto", "vlPagamentoParcelaExtraAcsDireto", "vlTotalAcsDireto",
+    "vlPagamentoAcsIndireto", "vlPagamentoParcelaExtraAcsIndireto", "vlTotalAcsIndireto",
+    "vlPagamentoUbsf", "vlPagamentoUbsfExtra", "vlPagamentoMicroscopista",
+    "vlPagamentoParcelaExtraMicroscopista", "vlTotalMicroscopista", "vlPagamentoResidencia",
+    "vlPagamentoPrisionalMunicipal", "vlPagamentoPrisionalEstadual", "vlPagamentoPnaisari",
+    "vlPagamentoIaf", "vlPagamentoAcademia", "vlPagamentoIncentivoPopulacional",
+    "vlPagamentoManutencaoPgto", "vlPagamentoIncentivoTransicao", "vlPagamentoQualidadeExtraEsf",
+    "vlPagamentoQualidadeExtraEap", "vlPagamentoQualidadeExtraEsb40H",
+    "vlPagamentoQualidadeEmulti", "vlMonitoramentoPse", "vlAdicionalPse", "vlTotalPse",
+)
+
+CAMPOS_DS_PAGAMENTOS = (
+    "dsFaixaIndiceEquidadeEsfEap", "dsClassificacaoVinculoEsfEap",
+    "dsClassificacaoQualidadeEsfEap", "dsClassificacaoQualidadeEmulti", "dsCicloPse",
+)
+
+# Campos numéricos de pagamentos fora da convenção de prefixos
+CAMPOS_NU_PAGAMENTOS = ("nuAnoRefPopulacaoIbge", "nuEscolasPactuadasPse")
+
+CAMPOS_PAGAMENTOS = (CAMPOS_IDENTIFICACAO + CAMPOS_QT_PAGAMENTOS + CAMPOS_VL_PAGAMENTOS
+                     + CAMPOS_DS_PAGAMENTOS + CAMPOS_NU_PAGAMENTOS)
+
+CAMPOS_RESUMOS = CAMPOS_IDENTIFICACAO + (
+    "dsPlanoOrcamentario", "dsEsferaAdministrativa",
+    "vlIntegral", "vlAjuste", "vlDesconto", "vlEfetivoRepasse",
+    "vlImplantacao", "vlAjusteImplantacao", "vlDescontoImplantacao", "vlTotalImplantacao",
+)
+
+CAMPOS_SECOES = {
+    "pagamentos": CAMPOS_PAGAMENTOS,
+    "resumosPlanosOrcamentarios": CAMPOS_RESUMOS,
+}
+
+
+def pyarrow_disponivel() -> bool:
+    """Indica se o pacote opcional pyarrow está instalado."""
+    return pa is not None
+
+
+def _tipo_campo(campo: str):
+    """Tipo Arrow de um campo, definido pelo prefixo do nome."""
+    if campo in CAMPOS_IDENTIFICACAO:
+        return pa.string()
+    if campo.startswith("qt") or campo in CAMPOS_NU_PAGAMENTOS:
+        return pa.int32()
+    if campo.startswith("vl"):
+        return pa.int64()
+    if campo.startswith("ds"):
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def esquema_secao(secao: str):
+    """
+    Retorna o esquema Arrow fixo de uma seção.
+
+    Args:
+        secao: "pagamentos" ou "resumosPlanosOrcamentarios"
+
+    Returns:
+        pyarrow.Schema: Esquema tipado da seção
+    """
+    return pa.schema([pa.field(campo, _tipo_campo(campo)) for campo in CAMPOS_SECOES[secao]])
+
+
+def valor_em_centavos(valor: Any) -> Optional[int]:
+    """Converte um valor monetário (número ou texto no formato brasileiro) em centavos."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, str):
+        valor = valor.replace("R$", "").strip().replace(".", "").replace(",", ".")
+    # Decimal evita erros de arredondamento binário (ex.: 1234.565)
+    centavos = Decimal(str(valor)) * 100
+    return int(centavos.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _converter_valor(campo: str, valor: Any) -> Any:
+    """Normaliza um valor do JSON para o tipo do esquema."""
+    if valor is None:
+        return None
+    if campo in CAMPOS_IDENTIFICACAO:
+        return str(valor)
+    if campo.startswith("vl"):
+        return valor_em_centavos(valor)
+    if campo.startswith("qt") or campo in CAMPOS_NU_PAGAMENTOS:
+        return int(valor)
+    return str(valor)
+
+
+def registros_para_tabela(secao: str, registros: List[Dict[str, Any]]):
+    """
+    Converte registros da API em uma tabela Arrow com o esquema fixo da seção.
+
+    Campos desconhecidos são descartados; campos ausentes ficam nulos.
+    """
+    colunas = {
+        campo: [_converter_valor(campo, registro.get(campo)) for registro in registros]
+        for campo in CAMPOS_SECOES[secao]
+    }
+    return pa.Table.from_pydict(colunas, schema=esquema_secao(secao))
+
+
+class PaymentStore:
+    """Armazenamento colunar de pagamentos e resumos, particionado por UF e competência."""
+
+    def __init__(self, base_dir: str = STORE_DIR):
+        if not pyarrow_disponivel():
+            raise ImportError("O armazenamento colunar requer o pacote 'pyarrow'.")
+        self.base_dir = base_dir
+
+    def _dir_particao(self, uf: str, competencia: str) -> str:
+        return os.path.join(self.base_dir, f"uf={uf}", f"competencia={competencia}")
+
+    def _lock_particao(self, uf: str, competencia: str) -> FileLock:
+        """Lock da partição, compartilhado por todos os processos que usam o diretório."""
+        return FileLock(os.path.join(self.base_dir, LOCKS_DIR, f"uf={uf}_competencia={competencia}.lock"))
+
+    def _gravar_tabela(self, path: str, tabela) -> None:
+        """Grava a tabela de forma atômica (arquivo temporário exclusivo + rename)."""
+        diretorio = os.path.dirname(path)
+        os.makedirs(diretorio, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=diretorio, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(tabela, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _mesclar_secao(self, uf: str, competencia: str, secao: str, registros: List[Dict[str, Any]]) -> None:
+        """Substitui na partição os registros dos municípios recebidos."""
+        path = os.path.join(self._dir_particao(uf, competencia), ARQUIVOS_SECOES[secao])
+        nova = registros_para_tabela(secao, registros)
+        if os.path.exists(path):
+            existente = pq.read_table(path, schema=esquema_secao(secao))
+            municipios = set(nova.column("coMunicipioIbge").to_pylist())
+            manter = [m not in municipios for m in existente.column("coMunicipioIbge").to_pylist()]
+            nova = pa.concat_tables([existente.filter(pa.array(manter, pa.bool_())), nova]).unify_dictionaries()
+        self._gravar_tabela(path, nova)
+
+    def gravar(self, dados: Dict[str, Any]) -> int:
+        """
+        Grava uma resposta da API, substituindo os municípios já presentes nas partições.
+
+        Args:
+            dados: Resposta da API (de um ou vários municípios/competências)
+
+        Returns:
+            int: Número de partições (UF, competência) atualizadas
+        """
+        particoes = particionar_registros(iterar_registros(dados), ("sgUf", "nuParcela"))
+        for (uf, competencia), parcial in particoes.items():
+            # A leitura, a mescla e a gravação da partição formam uma única seção crítica
+            with self._lock_particao(uf, competencia):
+                for secao in ARQUIVOS_SECOES:
+                    if parcial[secao]:
+                        self._mesclar_secao(uf, competencia, secao, parcial[secao])
+        return len(particoes)
+
+    def importar_cache(self, cache: ResponseCache) -> int:
+        """
+        Importa todas as entradas de um cache de respostas (ex.: saída do crawler).
+
+        Returns:
+            int: Número de entradas importadas
+        """
+        importadas = 0
+        for _, entrada in cache.iter_entries():
+            if entrada.get("dados"):
+                self.gravar(entrada["dados"])
+                importadas += 1
+        return importadas
+
+    def particoes(self) -> List[Dict[str, str]]:
+        """Lista as partições existentes como {"uf", "competencia"}."""
+        resultado = []
+        for path in sorted(glob.glob(os.path.join(self.base_dir, "uf=*", "competencia=*"))):
+            dir_uf, dir_competencia = path.split(os.sep)[-2:]
+            resultado.append({"uf": dir_uf[3:], "competencia": dir_competencia[12:]})
+        return resultado
+
+    def carregar(self, secao: str, uf: Optional[str] = None, competencia: Optional[str] = None,
+                 colunas: Optional[Iterable[str]] = None, municipio: Optional[str] = None,
+                 em_reais: bool = True) -> pd.DataFrame:
+        """
+        Carrega registros de uma seção lendo apenas as colunas solicitadas.
+
+        Args:
+            secao: "pagamentos" ou "resumosPlanosOrcamentarios"
+            uf: Sigla da UF (padrão: todas)
+            competencia: Competência AAAAMM (padrão: todas)
+            colunas: Colunas desejadas (padrão: todas); colunas desconhecidas são ignoradas
+            municipio: Código IBGE do município (6 ou 7 dígitos) para filtrar
+            em_reais: Converte os valores monetários de centavos para reais
+
+        Returns:
+            pd.DataFrame: Registros tipados (vazio se não houver partições)
+        """
+        esquema = esquema_secao(secao)
+        if colunas is None:
+            selecionadas = list(esquema.names)
+        else:
+            selecionadas = [c for c in dict.fromkeys(colunas) if c in esquema.names]
+        leitura = list(selecionadas)
+        if municipio and "coMunicipioIbge" not in leitura:
+            leitura.append("coMunicipioIbge")
+
+        padrao = os.path.join(self.base_dir, f"uf={uf or '*'}", f"competencia={competencia or '*'}",
+                              ARQUIVOS_SECOES[secao])
+        filtros = [("coMunicipioIbge", "=", str(municipio)[:6])] if municipio else None
+        tabelas = [pq.read_table(path, columns=leitura, filters=filtros, schema=esquema)
+                   for path in sorted(glob.glob(padrao))]
+        if not tabelas:
+            tabela = esquema.empty_table().select(leitura)
+        else:
+            tabela = pa.concat_tables(tabelas).unify_dictionaries()
+
+        df = tabela.select(selecionadas).to_pandas(types_mapper={
+            pa.int32(): pd.Int32Dtype(),
+            pa.int64(): pd.Int64Dtype(),
+        }.get)
+        if em_reais:
+            for coluna in df.columns:
+                if coluna.startswith("vl"):
+                    df[coluna] = df[coluna] / 100
+        return df
+
+    def carregar_pagamentos(self, **kwargs) -> pd.DataFrame:
+        """Atalho para carregar("pagamentos", ...)."""
+        return self.carregar("pagamentos", **kwargs)
+
+    def carregar_resumos(self, **kwargs) -> pd.DataFrame:
+        """Atalho para carregar("resumosPlanosOrcamentarios", ...)."""
+        return self.carregar("resumosPlanosOrcamentarios", **kwargs)
+
+
+# Instância compartilhada do armazenamento colunar
+_payment_store: Optional[PaymentStore] = None
+_payment_store_lock = threading.Lock()
+
+def get_payment_store() -> Optional[PaymentStore]:
+    """
+    Retorna o armazenamento colunar compartilhado pelo processo.
+
+    Returns:
+        PaymentStore ou None se o pyarrow não estiver instalado
+    """
+    global _payment_store
+    if not pyarrow_disponivel():
+        return None
+    if _payment_store is None:
+        with _payment_store_lock:
+            if _payment_store is None:
+                _payment_store = PaymentStore()
+    return _payment_store
+
+def registrar_resposta(dados: Dict[str, Any]) -> bool:
+    """
+    Grava uma resposta no armazenamento colunar, se disponível.
+
+    Falhas de gravação não interrompem a consulta: o cache JSON continua
+    sendo a fonte principal dos dados.
+
+    Returns:
+        bool: True se os dados foram gravados
+    """
+    store = get_payment_store()
+    if store is None:
+        return False
+    try:
+        store.gravar(dados)
+        return True
+    except (OSError, ValueError, pa.ArrowException):
+        return False
+
+# Gravações feitas fora do caminho da consulta, uma de cada vez
+_gravacao_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payment_store")
+
+def registrar_em_segundo_plano(dados: Dict[str, Any]) -> Future:
+    """
+    Agenda a gravação de uma resposta no armazenamento colunar sem bloquear o chamador.
+
+    Returns:
+        Future: Resultado de registrar_resposta
+    """
+    return _gravacao_executor.submit(registrar_resposta, dados)
@@ -0,0 +1,218 @@
+"""
+Prefetch em segundo plano das consultas prováveis após uma consulta.
+
+Depois de consultar o município X na competência M, o usuário quase sempre
+consulta em seguida M-1 e M-2, ou outros municípios da mesma UF. Essas
+consultas são antecipadas em um pool de threads de baixa prioridade e com
+limite de consultas pendentes, para que o próximo clique em "Consultar" seja
+atendido pelo cache local. As entradas antecipadas ficam na frente da fila
+de descarte do cache até serem lidas, de modo que não expulsam as consultas
+dos usuários.
+
+O prefetch não disputa a API com as consultas do usuário: é suspenso com o
+circuit breaker aberto e usa o mesmo agrupamento de requisições (uma consulta
+do usuário que chegue durante o prefetch aguarda a mesma requisição).
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from .api_client import APIClient, atualizar_se_expirada, deslocar_competencia, get_api_client, montar_parametros
+from .cache import ResponseCache, get_response_cache
+from .circuit_breaker import FECHADO
+from .municipios import get_municipio_index
+
+# Threads dedicadas ao prefetch
+PREFETCH_WORKERS = 2
+
+# Consultas antecipadas aguardando ou em execução; as excedentes são descartadas
+MAX_PENDENTES = 12
+
+# Competências anteriores antecipadas (M-1, M-2)
+COMPETENCIAS_ANTERIORES = 2
+
+# Municípios da mesma UF antecipados na competência consultada
+MAX_VIZINHOS = 4
+
+# Incremento de "nice" das threads de prefetch (Linux)
+PRIORIDADE_PREFETCH = 10
+
+
+def _reduzir_prioridade() -> None:
+    """Reduz a prioridade da thread atual no escalonador, quando suportado."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PRIORIDADE_PREFETCH)
+    except (AttributeError, OSError):
+        pass
+
+
+def municipios_vizinhos(codigo_ibge: str, uf: Optional[str] = None, quantidade: int = MAX_VIZINHOS) -> List[str]:
+    """
+    Municípios da mesma UF próximos ao consultado na lista de seleção.
+
+    Args:
+        codigo_ibge: Código IBGE do município consultado (6 ou 7 dígitos)
+        uf: Sigla da UF (padrão: a UF cujo Anexo VI contém o município)
+        quantidade: Número máximo de municípios
+
+    Returns:
+        List[str]: Códigos IBGE (6 dígitos), alternando antes/depois do consultado
+    """
+    codigo = codigo_ibge[:6]
+    municipio = get_municipio_index().get(codigo)
+    if municipio is None or (uf and uf.upper() != municipio.uf):
+        return []
+    lista = [m.codigo6 for m in get_municipio_index().municipios(municipio.uf)]
+
+    posicao = lista.index(codigo)
+    vizinhos = []
+    distancia = 1
+    while len(vizinhos) < quantidade and distancia < len(lista):
+        for indice in (posicao + distancia, posicao - distancia):
+            if 0 <= indice < len(lista) and len(vizinhos) < quantidade:
+                vizinhos.append(lista[indice])
+        distancia += 1
+    return vizinhos
+
+
+def candidatos_prefetch(codigo_ibge: str, competencia: str, uf: Optional[str] = None,
+                        competencias_anteriores: int = COMPETENCIAS_ANTERIORES,
+                        max_vizinhos: int = MAX_VIZINHOS) -> List[Tuple[str, str]]:
+    """
+    Consultas prováveis após a consulta de um município, em ordem de prioridade.
+
+    Returns:
+        List[Tuple[str, str]]: (código IBGE, competência) — primeiro as
+        competências anteriores do mesmo município, depois os vizinhos
+    """
+    candidatos = [(codigo_ibge[:6], deslocar_competencia(competencia, -meses))
+                  for meses in range(1, competencias_anteriores + 1)]
+    candidatos.extend((vizinho, competencia) for vizinho in municipios_vizinhos(codigo_ibge, uf, max_vizinhos))
+    return candidatos
+
+
+class Prefetcher:
+    """Antecipa consultas em segundo plano, com concorrência e fila limitadas."""
+
+    def __init__(self, cache: Optional[ResponseCache] = None, client: Optional[APIClient] = None,
+                 max_workers: int = PREFETCH_WORKERS, max_pendentes: int = MAX_PENDENTES):
+        """
+        Args:
+            cache: Cache de respostas (padrão: cache compartilhado)
+            client: Cliente HTTP (padrão: cliente compartilhado do processo)
+            max_workers: Consultas antecipadas executadas ao mesmo tempo
+            max_pendentes: Limite de consultas antecipadas aguardando ou em execução
+        """
+        self.cache = cache
+        self.client = client
+        self.max_pendentes = max_pendentes
+        self._pendentes: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._stats = {"agendados": 0, "descartados": 0, "concluidos": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch",
+                                            initializer=_reduzir_prioridade)
+
+    def _circuito_fechado(self) -> bool:
+        client = self.client or get_api_client()
+        return client.breaker.estado == FECHADO
+
+    def agendar(self, codigo_ibge: str, competencia: str) -> Optional[Future]:
+        """
+        Agenda a antecipação de uma consulta, se ainda não estiver no cache.
+
+        Returns:
+            Optional[Future]: Situação da atualização (ver atualizar_se_expirada),
+            ou None se a consulta não foi agendada
+        """
+        cache = self.cache or get_response_cache()
+        params = montar_parametros(codigo_ibge, competencia)
+        chave = (params["coMunicipio"], competencia)
+
+        if cache.get(params["coMunicipio"], competencia, params["tipoRelatorio"]) is not None:
+            return None
+        if not self._circuito_fechado():
+            return None
+        with self._lock:
+            if chave in self._pendentes:
+                return None
+            if len(self._pendentes) >= self.max_pendentes:
+                self._stats["descartados"] += 1
+                return None
+            self._pendentes.add(chave)
+            self._stats["agendados"] += 1
+
+        # Entradas antecipadas são as primeiras descartadas até serem consultadas
+        future = self._executor.submit(atualizar_se_expirada, params, competencia, cache, self.client,
+                                       baixa_prioridade=True)
+        future.add_done_callback(lambda _: self._concluir(chave))
+        return future
+
+    def _concluir(self, chave: Tuple[str, str]) -> None:
+        with self._lock:
+            self._pendentes.discard(chave)
+            self._stats["concluidos"] += 1
+
+    def agendar_apos_consulta(self, codigo_ibge: str, competencia: str, uf: Optional[str] = None) -> List[Future]:
+        """
+        Agenda as consultas prováveis após a consulta de um município.
+
+        Args:
+            codigo_ibge: Código IBGE do município consultado
+            competencia: Competência consultada (AAAAMM)
+            uf: Sigla da UF do município, se conhecida
+
+        Returns:
+            List[Future]: Consultas efetivamente agendadas
+        """
+        futures = []
+        for codigo, comp in candidatos_prefetch(codigo_ibge, competencia, uf):
+            future = self.agendar(codigo, comp)
+            if future is not None:
+                futures.append(future)
+        return futures
+
+    def pendentes(self) -> int:
+        """Número de consultas antecipadas aguardando ou em execução."""
+        with self._lock:
+            return len(self._pendentes)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores de consultas agendadas, descartadas e concluídas."""
+        with self._lock:
+            return dict(self._stats)
+
+
+# Instância global do prefetcher
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher() -> Prefetcher:
+    """
+    Retorna o prefetcher compartilhado do processo.
+
+    Returns:
+        Prefetcher: Prefetcher compartilhado entre as sessões
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
+
+def agendar_prefetch(codigo_ibge: str, competencia: str, uf: Optional[str] = None) -> int:
+    """
+    Antecipa, em segundo plano, as consultas prováveis após uma consulta.
+
+    Falhas são ignoradas: o prefetch é apenas uma otimização.
+
+    Returns:
+        int: Número de consultas agendadas
+    """
+    if not codigo_ibge or len(competencia or "") != 6 or not competencia.isdigit():
+        return 0
+    try:
+        return len(get_prefetcher().agendar_apos_consulta(codigo_ibge, competencia, uf))
+    except (OSError, ValueError):
+        return 0
@@ -0,0 +1,294 @@
+"""
+Camada de consultas SQL (SQLite embutido) sobre os dados em cache.
+
+Os registros de "pagamentos" e "resumosPlanosOrcamentarios" das respostas
+coletadas pelo crawler e das entradas do cache de respostas são indexados em
+um banco SQLite local, com índice em (coUfIbge, coMunicipioIbge, nuParcela). Consultas prontas respondem a
+perguntas como "municípios do ESTRATO 1 em PE cujo vlQualidadeEsf caiu em
+relação ao mês anterior" sem percorrer os arquivos JSON.
+"""
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .api_client import deslocar_competencia
+from .cache import ResponseCache, decode_entry, get_response_cache
+from .crawler import CRAWLER_OUTPUT_DIR, RESULTADOS_DIR
+from .payment_store import CAMPOS_IDENTIFICACAO, CAMPOS_NU_PAGAMENTOS, CAMPOS_SECOES
+
+# Arquivo padrão do banco de consultas
+DB_FILE = "consultas.sqlite"
+
+# Tabela de cada seção da resposta
+TABELAS_SECOES = {
+    "pagamentos": "pagamentos",
+    "resumosPlanosOrcamentarios": "resumos",
+}
+
+# Códigos IBGE das UFs
+CODIGOS_UF = {
+    "RO": "11", "AC": "12", "AM": "13", "RR": "14", "PA": "15", "AP": "16", "TO": "17",
+    "MA": "21", "PI": "22", "CE": "23", "RN": "24", "PB": "25", "PE": "26", "AL": "27",
+    "SE": "28", "BA": "29", "MG": "31", "ES": "32", "RJ": "33", "SP": "35", "PR": "41",
+    "SC": "42", "RS": "43", "MS": "50", "MT": "51", "GO": "52", "DF": "53",
+}
+
+
+@dataclass(frozen=True)
+class ConsultaPronta:
+    """Consulta SQL parametrizada disponível na interface."""
+    nome: str
+    descricao: str
+    sql: str
+    usa_estrato: bool = False
+
+
+def _tipo_sql(campo: str) -> str:
+    """Tipo SQLite de um campo, definido pelo prefixo do nome."""
+    if campo in CAMPOS_IDENTIFICACAO:
+        return "TEXT"
+    if campo.startswith("qt") or campo in CAMPOS_NU_PAGAMENTOS:
+        return "INTEGER"
+    if campo.startswith("vl"):
+        return "REAL"
+    return "TEXT"
+
+
+def _consulta_queda(campo: str, titulo: str) -> ConsultaPronta:
+    """Consulta de municípios cujo valor de um campo caiu em relação à competência anterior."""
+    return ConsultaPronta(
+        nome=f"queda_{campo}",
+        descricao=f"Municípios da UF cujo {titulo} ({campo}) caiu em relação à competência anterior",
+        sql=f"""
+            SELECT a.coMunicipioIbge, a.noMunicipio, a.dsFaixaIndiceEquidadeEsfEap,
+                   b."{campo}" AS valor_anterior, a."{campo}" AS valor_atual,
+                   a."{campo}" - b."{campo}" AS variacao
+            FROM pagamentos a
+            JOIN pagamentos b
+              ON b.coUfIbge = a.coUfIbge
+             AND b.coMunicipioIbge = a.coMunicipioIbge
+             AND b.nuParcela = :competencia_anterior
+            WHERE a.coUfIbge = :co_uf
+              AND a.nuParcela = :competencia
+              AND (:estrato IS NULL OR a.dsFaixaIndiceEquidadeEsfEap = :estrato)
+              AND a."{campo}" < b."{campo}"
+            ORDER BY variacao
+        """,
+        usa_estrato=True,
+    )
+
+
+# Consultas prontas, na ordem em que aparecem na interface
+CONSULTAS_PRONTAS: Dict[str, ConsultaPronta] = {
+    consulta.nome: consulta for consulta in (
+        _consulta_queda("vlQualidadeEsf", "valor de qualidade eSF"),
+        _consulta_queda("vlVinculoEsf", "valor de vínculo eSF"),
+        _consulta_queda("vlTotalEsf", "valor total eSF"),
+        _consulta_queda("vlTotalEmulti", "valor total eMulti"),
+        ConsultaPronta(
+            nome="maiores_repasses",
+            descricao="Municípios da UF com maior repasse efetivo na competência",
+            sql="""
+                SELECT coMunicipioIbge, noMunicipio, SUM(vlEfetivoRepasse) AS total_repasse
+                FROM resumos
+                WHERE coUfIbge = :co_uf AND nuParcela = :competencia
+                GROUP BY coMunicipioIbge, noMunicipio
+                ORDER BY total_repasse DESC
+            """,
+        ),
+        ConsultaPronta(
+            nome="distribuicao_classificacoes",
+            descricao="Quantidade de municípios da UF por estrato e classificações de vínculo e qualidade",
+            sql="""
+                SELECT dsFaixaIndiceEquidadeEsfEap, dsClassificacaoVinculoEsfEap,
+                       dsClassificacaoQualidadeEsfEap, COUNT(*) AS municipios
+                FROM pagamentos
+                WHERE coUfIbge = :co_uf AND nuParcela = :competencia
+                  AND (:estrato IS NULL OR dsFaixaIndiceEquidadeEsfEap = :estrato)
+                GROUP BY 1, 2, 3
+                ORDER BY 1, 2, 3
+            """,
+            usa_estrato=True,
+        ),
+    )
+}
+
+
+class QueryLayer:
+    """Banco SQLite local com os registros das respostas em cache."""
+
+    def __init__(self, db_path: str = DB_FILE):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._criar_esquema()
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão, com commit ao final do bloco."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _criar_esquema(self) -> None:
+        """Cria tabelas e índices, se ainda não existirem."""
+        with self._conexao() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for secao, tabela in TABELAS_SECOES.items():
+                colunas = ", ".join(f'"{campo}" {_tipo_sql(campo)}' for campo in CAMPOS_SECOES[secao])
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({colunas})")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_pagamentos_chave "
+                         "ON pagamentos (coUfIbge, coMunicipioIbge, nuParcela)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_resumos_chave "
+                         "ON resumos (coUfIbge, coMunicipioIbge, nuParcela)")
+            conn.execute("CREATE TABLE IF NOT EXISTS arquivos_indexados "
+                         "(caminho TEXT PRIMARY KEY, mtime_ns INTEGER, hash TEXT)")
+
+    def _inserir(self, conn: sqlite3.Connection, secao: str, registros: List[Dict[str, Any]]) -> None:
+        """Insere registros de uma seção, substituindo os das mesmas chaves."""
+        campos = CAMPOS_SECOES[secao]
+        tabela = TABELAS_SECOES[secao]
+        chaves = {tuple(str(r.get(c, "")) for c in ("coUfIbge", "coMunicipioIbge", "nuParcela"))
+                  for r in registros}
+        conn.executemany(
+            f"DELETE FROM {tabela} WHERE coUfIbge = ? AND coMunicipioIbge = ? AND nuParcela = ?", chaves
+        )
+        colunas = ", ".join(f'"{campo}"' for campo in campos)
+        marcadores = ", ".join("?" for _ in campos)
+        conn.executemany(
+            f"INSERT INTO {tabela} ({colunas}) VALUES ({marcadores})",
+            [tuple(registro.get(campo) for campo in campos) for registro in registros],
+        )
+
+    def registrar(self, dados: Dict[str, Any]) -> None:
+        """
+        Indexa uma resposta da API, substituindo os registros já presentes.
+
+        Args:
+            dados: Resposta da API (de um ou vários municípios/competências)
+        """
+        with self._lock, self._conexao() as conn:
+            for secao in TABELAS_SECOES:
+                registros = [r for r in dados.get(secao) or [] if isinstance(r, dict)]
+                if registros:
+                    self._inserir(conn, secao, registros)
+
+    def sincronizar(self, cache: Optional[ResponseCache] = None,
+                    diretorios: Optional[List[str]] = None) -> int:
+        """
+        Indexa as respostas novas ou alteradas desde a última sincronização.
+
+        Além do cache interativo (limitado a poucas centenas de entradas), são
+        lidas as respostas gravadas pelo crawler, que cobrem todos os
+        municípios coletados. Arquivos com mtime inalterado não são abertos;
+        os demais só são decodificados se o hash do conteúdo mudou (a leitura
+        no cache renova o mtime sem alterar a entrada).
+
+        Args:
+            cache: Cache de respostas (padrão: cache compartilhado)
+            diretorios: Diretórios de respostas do crawler
+                (padrão: crawler_output/<competencia>/municipios)
+
+        Returns:
+            int: Número de respostas indexadas
+        """
+        if diretorios is None:
+            diretorios = sorted(glob.glob(os.path.join(CRAWLER_OUTPUT_DIR, "*", RESULTADOS_DIR)))
+        # O cache interativo vem por último: suas respostas são as mais recentes
+        origens = [ResponseCache(cache_dir=d, max_entries=None, ttl=None) for d in diretorios]
+        origens.append(cache or get_response_cache())
+
+        with self._conexao() as conn:
+            conhecidos = {caminho: (mtime_ns, digest) for caminho, mtime_ns, digest
+                          in conn.execute("SELECT caminho, mtime_ns, hash FROM arquivos_indexados")}
+
+        indexadas = 0
+        for origem in origens:
+            for _, path in origem.arquivos():
+                caminho = str(path.resolve())
+                mtime_anterior, hash_anterior = conhecidos.get(caminho, (None, None))
+                try:
+                    mtime_ns = path.stat().st_mtime_ns
+                    if mtime_ns == mtime_anterior:
+                        continue
+                    conteudo = path.read_bytes()
+                except FileNotFoundError:
+                    continue
+
+                digest = hashlib.sha256(conteudo).hexdigest()
+                if digest != hash_anterior:
+                    try:
+                        dados = decode_entry(conteudo).get("dados")
+                    except ValueError:  # entrada corrompida (CacheCorruptionError) ou ilegível
+                        continue
+                    if dados:
+                        self.registrar(dados)
+                        indexadas += 1
+                with self._lock, self._conexao() as conn:
+                    conn.execute("INSERT OR REPLACE INTO arquivos_indexados (caminho, mtime_ns, hash) "
+                                 "VALUES (?, ?, ?)", (caminho, mtime_ns, digest))
+        return indexadas
+
+    def consultar(self, sql: str, params: Any = ()) -> pd.DataFrame:
+        """Executa uma consulta SQL arbitrária e retorna o resultado como DataFrame."""
+        with self._conexao() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def executar_consulta(self, nome: str, uf: str, competencia: str,
+                          estrato: Optional[str] = None) -> pd.DataFrame:
+        """
+        Executa uma consulta pronta.
+
+        Args:
+            nome: Nome da consulta em CONSULTAS_PRONTAS
+            uf: Sigla da UF
+            competencia: Competência AAAAMM
+            estrato: Faixa do IED (ex.: "ESTRATO 1"), opcional
+
+        Returns:
+            pd.DataFrame: Resultado da consulta
+
+        Raises:
+            ValueError: Se a consulta ou a UF não existirem
+        """
+        if nome not in CONSULTAS_PRONTAS:
+            raise ValueError(f"Consulta desconhecida: {nome}")
+        if uf.upper() not in CODIGOS_UF:
+            raise ValueError(f"UF inválida: {uf}")
+        params = {
+            "co_uf": CODIGOS_UF[uf.upper()],
+            "competencia": competencia,
+            "competencia_anterior": deslocar_competencia(competencia, -1),
+            "estrato": estrato or None,
+        }
+        return self.consultar(CONSULTAS_PRONTAS[nome].sql, params)
+
+    def competencias(self) -> List[Tuple[str, int]]:
+        """Lista as competências indexadas com a quantidade de municípios de cada uma."""
+        with self._conexao() as conn:
+            return conn.execute(
+                "SELECT nuParcela, COUNT(*) FROM pagamentos GROUP BY nuParcela ORDER BY nuParcela"
+            ).fetchall()
+
+
+# Instância compartilhada da camada de consultas
+_query_layer: Optional[QueryLayer] = None
+_query_layer_lock = threading.Lock()
+
+def get_query_layer() -> QueryLayer:
+    """Retorna a camada de consultas compartilhada pelo processo."""
+    global _query_layer
+    if _query_layer is None:
+        with _query_layer_lock:
+            if _query_layer is None:
+                _query_layer = QueryLayer()
+    return _query_layer
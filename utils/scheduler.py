@@ -0,0 +1,246 @@
+"""
+Atualização agendada dos municípios acompanhados (watchlist) a cada nova parcela.
+
+O processo roda ao lado do aplicativo e verifica periodicamente se a API já
+publicou a parcela seguinte à última conhecida, consultando o primeiro
+município da watchlist. Quando a parcela aparece, todos os municípios são
+consultados em paralelo, gravados no cache de respostas e no armazenamento
+colunar, e o horário de conclusão de cada atualização é registrado no
+arquivo de estado, junto com os municípios alterados (ver change_detection).
+Municípios que falharem são tentados novamente nos ciclos seguintes.
+
+Formato da watchlist (JSON):
+    {"municipios": ["2611606", "2607208"], "intervalo_minutos": 60}
+
+Uso:
+    python -m utils.scheduler --watchlist watchlist.json
+    python -m utils.scheduler --watchlist watchlist.json --uma-vez
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from requests.exceptions import RequestException
+
+from .api_client import APIClient, atualizar_entrada, deslocar_competencia, montar_parametros
+from .async_client import DEFAULT_CONCURRENCY, consultar_em_paralelo
+from .cache import ResponseCache, get_response_cache
+from .change_detection import FingerprintStore
+
+WATCHLIST_FILE = "watchlist.json"
+
+SCHEDULER_STATE_FILE = "scheduler_state.json"
+
+# Intervalo padrão entre verificações (segundos)
+DEFAULT_INTERVALO = 3600
+
+# Meses anteriores ao atual examinados quando ainda não há parcela conhecida
+BUSCA_INICIAL_MESES = 3
+
+
+def carregar_watchlist(path: str = WATCHLIST_FILE) -> Dict[str, Any]:
+    """
+    Lê a watchlist de municípios acompanhados.
+
+    Returns:
+        Dict: Chaves "municipios" (códigos IBGE) e "intervalo" (segundos)
+
+    Raises:
+        ValueError: Se o arquivo não tiver uma lista de municípios
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    municipios = [str(codigo).strip() for codigo in config.get("municipios", []) if str(codigo).strip()]
+    if not municipios:
+        raise ValueError(f"A watchlist {path} não contém municípios.")
+    intervalo = float(config.get("intervalo_minutos", DEFAULT_INTERVALO / 60)) * 60
+    return {"municipios": municipios, "intervalo": intervalo}
+
+
+def _agora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class WatchlistScheduler:
+    """Detecta novas parcelas e atualiza os municípios da watchlist."""
+
+    def __init__(self, municipios: List[str], state_path: str = SCHEDULER_STATE_FILE,
+                 cache: Optional[ResponseCache] = None, client: Optional[APIClient] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, intervalo: float = DEFAULT_INTERVALO):
+        """
+        Args:
+            municipios: Códigos IBGE dos municípios acompanhados
+            state_path: Arquivo de estado (última parcela e horários das atualizações)
+            cache: Cache de respostas (padrão: cache compartilhado)
+            client: Cliente HTTP (padrão: cliente compartilhado do processo)
+            concurrency: Número máximo de consultas simultâneas
+            intervalo: Intervalo entre verificações em segundos
+        """
+        if not municipios:
+            raise ValueError("A watchlist deve conter ao menos um município.")
+        self.municipios = [codigo[:6] for codigo in municipios]
+        self.state_path = Path(state_path)
+        self.cache = cache or get_response_cache()
+        self.client = client
+        self.concurrency = concurrency
+        self.intervalo = intervalo
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Carrega o estado salvo, se existir."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"ultima_parcela": None, "ultima_verificacao": None, "atualizacoes": {}}
+
+    def _save_state(self) -> None:
+        """Grava o estado de forma atômica (arquivo temporário + rename)."""
+        if self.state_path.parent != Path():
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _parcela_publicada(self, competencia: str) -> bool:
+        """Consulta o primeiro município da watchlist para saber se a parcela já tem dados."""
+        params = montar_parametros(self.municipios[0], competencia)
+        entrada = self.cache.get_entry(params["coMunicipio"], competencia, allow_expired=True)
+        if entrada and entrada["dados"].get("pagamentos"):
+            return True
+        status, _ = atualizar_entrada(params, competencia, entrada, self.cache, self.client)
+        return status in ("atualizado", "nao_modificado")
+
+    def verificar_nova_parcela(self) -> Optional[str]:
+        """
+        Verifica se há uma parcela mais recente que a última conhecida.
+
+        Sem parcela conhecida, examina o mês atual e os BUSCA_INICIAL_MESES anteriores.
+
+        Returns:
+            Optional[str]: A nova competência (AAAAMM) ou None
+        """
+        ultima = self.state.get("ultima_parcela")
+        if ultima:
+            candidatas = [deslocar_competencia(ultima, 1)]
+        else:
+            atual = datetime.now().strftime("%Y%m")
+            candidatas = [deslocar_competencia(atual, -meses) for meses in range(BUSCA_INICIAL_MESES + 1)]
+
+        self.state["ultima_verificacao"] = _agora()
+        for competencia in candidatas:
+            if self._parcela_publicada(competencia):
+                return competencia
+        return None
+
+    def pendentes(self) -> List[str]:
+        """Municípios ainda não atualizados na última parcela conhecida."""
+        ultima = self.state.get("ultima_parcela")
+        atualizacoes = self.state["atualizacoes"]
+        return [codigo for codigo in self.municipios
+                if atualizacoes.get(codigo, {}).get("nuParcela") != ultima]
+
+    def atualizar(self, competencia: str, municipios: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Consulta e grava os municípios em uma competência.
+
+        Returns:
+            Dict: Resumo com a competência, os atualizados, os sem pagamentos
+            (que continuam pendentes), as falhas e o
+            changeset (municípios e campos alterados desde a coleta anterior)
+        """
+        municipios = municipios if municipios is not None else self.municipios
+        resultados = consultar_em_paralelo(municipios, [competencia], self.concurrency, self.cache, self.client)
+
+        atualizados, sem_dados, falhas, respostas = [], [], {}, []
+        for (codigo, _), resultado in resultados.items():
+            if not resultado.ok:
+                falhas[codigo] = str(resultado.erro)
+                continue
+            if not resultado.dados.get("pagamentos"):
+                # Sem pagamentos o município ainda não foi publicado: continua pendente
+                sem_dados.append(codigo)
+                continue
+            respostas.append(resultado.dados)
+            self.state["atualizacoes"][codigo] = {"nuParcela": competencia, "concluido_em": _agora()}
+            atualizados.append(codigo)
+
+        # Apenas os municípios alterados precisam ter cálculos e relatórios refeitos
+        changeset = FingerprintStore(cache=self.cache).registrar(respostas)
+        self.state["ultimo_changeset"] = {"competencia": competencia, "concluido_em": _agora(),
+                                          "municipios": changeset.municipios}
+        self._save_state()
+        return {"competencia": competencia, "atualizados": sorted(atualizados), "sem_dados": sorted(sem_dados),
+                "falhas": falhas, "changeset": changeset.to_dict()}
+
+    def executar_ciclo(self) -> Optional[Dict[str, Any]]:
+        """
+        Executa uma verificação: atualiza todos os municípios se houver nova
+        parcela, ou apenas os pendentes da última.
+
+        Returns:
+            Optional[Dict]: Resumo da atualização, ou None se nada foi feito
+        """
+        try:
+            nova = self.verificar_nova_parcela()
+        except (RequestException, ValueError):
+            nova = None
+
+        if nova:
+            self.state["ultima_parcela"] = nova
+            return self.atualizar(nova)
+
+        pendentes = self.pendentes() if self.state.get("ultima_parcela") else []
+        if pendentes:
+            return self.atualizar(self.state["ultima_parcela"], pendentes)
+        self._save_state()
+        return None
+
+    def run(self, parar: Optional[threading.Event] = None) -> None:
+        """
+        Executa ciclos até que o evento seja sinalizado.
+
+        Args:
+            parar: Evento que encerra o laço (padrão: executa indefinidamente)
+        """
+        parar = parar or threading.Event()
+        while not parar.is_set():
+            inicio = time.monotonic()
+            resumo = self.executar_ciclo()
+            if resumo:
+                print(json.dumps({"concluido_em": _agora(), **resumo}, ensure_ascii=False), flush=True)
+            parar.wait(max(0.0, self.intervalo - (time.monotonic() - inicio)))
+
+
+def main() -> None:
+    """Ponto de entrada de linha de comando do agendador."""
+    parser = argparse.ArgumentParser(description="Atualiza a watchlist de municípios a cada nova parcela.")
+    parser.add_argument("--watchlist", default=WATCHLIST_FILE, help="Arquivo JSON da watchlist")
+    parser.add_argument("--state", default=SCHEDULER_STATE_FILE, help="Arquivo de estado")
+    parser.add_argument("--intervalo", type=float, help="Minutos entre verificações (sobrepõe a watchlist)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--uma-vez", action="store_true", help="Executa um único ciclo e encerra")
+    args = parser.parse_args()
+
+    watchlist = carregar_watchlist(args.watchlist)
+    intervalo = args.intervalo * 60 if args.intervalo else watchlist["intervalo"]
+    scheduler = WatchlistScheduler(watchlist["municipios"], args.state, concurrency=args.concurrency,
+                                   intervalo=intervalo)
+
+    if args.uma_vez:
+        print(json.dumps(scheduler.executar_ciclo(), ensure_ascii=False, indent=2))
+        return
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
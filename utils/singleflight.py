@@ -0,0 +1,71 @@
+"""
+Agrupamento de chamadas concorrentes idênticas (single-flight).
+
+Quando várias sessões pedem os mesmos dados ao mesmo tempo, apenas a
+primeira executa a chamada; as demais aguardam o mesmo Future e recebem o
+mesmo resultado (ou a mesma exceção).
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Mapping, Tuple
+
+
+def chave_parametros(params: Mapping[str, Any], *extras: Any) -> Tuple:
+    """
+    Monta uma chave estável a partir de parâmetros de consulta.
+
+    Args:
+        params: Parâmetros da requisição (a ordem não importa)
+        extras: Valores adicionais que distinguem a chamada (ex.: validadores HTTP)
+
+    Returns:
+        Tuple: Chave utilizável em SingleFlight.do
+    """
+    return tuple(sorted((str(k), str(v)) for k, v in params.items())) + tuple(extras)
+
+
+class SingleFlight:
+    """Executa no máximo uma chamada em andamento por chave."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[Hashable, Future] = {}
+
+    def do(self, chave: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Executa fn, ou aguarda a execução já em andamento para a mesma chave.
+
+        Args:
+            chave: Identificação da chamada
+            fn: Função sem argumentos que produz o resultado
+
+        Returns:
+            Tuple[Any, bool]: (resultado, compartilhado), onde compartilhado indica
+            que o resultado veio da chamada de outro solicitante
+
+        Raises:
+            Exception: A mesma exceção levantada por fn
+        """
+        with self._lock:
+            future = self._em_andamento.get(chave)
+            lider = future is None
+            if lider:
+                future = Future()
+                self._em_andamento[chave] = future
+
+        if not lider:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+        return future.result(), False
+
+    def em_andamento(self) -> int:
+        """Número de chamadas em andamento."""
+        with self._lock:
+            return len(self._em_andamento)
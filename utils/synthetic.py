@@ -0,0 +1,323 @@
+"""
+Gerador de dados sintéticos de pagamentos para os 5.570 municípios.
+
+Para testes de carga das calculadoras, dos armazenamentos e dos relatórios
+em escala nacional. Cada município do Anexo VI da Portaria 3.493 recebe um
+perfil plausível derivado da população, do porte e do IED (número de
+equipes, classificações de vínculo e qualidade, ACS), e os valores são
+calculados com as tarifas do config.json. Os registros têm exatamente os
+campos do data_cache.json; campos não modelados ficam zerados.
+
+A geração é determinística: a mesma semente produz os mesmos dados, e cada
+(município, competência) pode ser gerado isoladamente, sem gerar os demais.
+
+Uso:
+    python -m utils.synthetic --inicio 202501 --fim 202512 --json sinteticos.json
+    python -m utils.synthetic --inicio 202501 --fim 202503 --uf PE BA --parquet
+"""
+import argparse
+import json
+import math
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .api_client import DATA_FILE, deslocar_competencia, listar_competencias
+from .municipios import ANEXO_VI_FILE, ler_anexo_vi
+from .partitioning import SECOES_REGISTROS
+from .payment_store import STORE_DIR, PaymentStore, valor_em_centavos
+
+CONFIG_FILE = "config.json"
+
+# Habitantes por equipe de Saúde da Família (média) e teto de cobertura
+HABITANTES_POR_ESF = 3000
+HABITANTES_TETO_ESF = 2000
+
+# Habitantes por Agente Comunitário de Saúde (média) e teto
+HABITANTES_POR_ACS = 350
+HABITANTES_TETO_ACS = 400
+
+# Repasse mensal por ACS e valor per capita anual
+VALOR_ACS = 3036.0
+VALOR_PER_CAPITA_ANUAL = 5.95
+
+# Classificações de vínculo e qualidade e seus pesos
+CLASSIFICACOES = ("ÓTIMO", "BOM", "SUFICIENTE", "REGULAR")
+PESOS_CLASSIFICACAO = (0.25, 0.40, 0.25, 0.10)
+
+# Probabilidade de mudança de classificação entre competências
+TAXA_RECLASSIFICACAO = 0.05
+
+# Planos orçamentários dos resumos, na ordem da API
+PLANO_ESF = "Equipes de Saúde da Família - eSF e equipes de Atenção Primária - eAP"
+PLANO_BUCAL = "Atenção à Saúde Bucal"
+PLANO_EMULTI = "Equipes Multiprofissionais - eMulti"
+PLANO_ACS = "Agentes Comunitários de Saúde"
+PLANO_DEMAIS = "Demais programas, serviços e equipes da Atenção Primária à Saúde"
+PLANO_PER_CAPITA = "Componente per capita de base populacional"
+PLANOS = (PLANO_ESF, PLANO_BUCAL, PLANO_EMULTI, PLANO_ACS, PLANO_DEMAIS, PLANO_PER_CAPITA)
+
+
+def _reais(valor: Any) -> float:
+    return valor_em_centavos(valor) / 100
+
+
+class GeradorPagamentos:
+    """Gera respostas sintéticas da API, determinísticas por semente."""
+
+    def __init__(self, semente: int = 0, anexo_path: str = ANEXO_VI_FILE, modelo_path: str = DATA_FILE,
+                 config_path: str = CONFIG_FILE):
+        """
+        Args:
+            semente: Semente da geração
+            anexo_path: CSV do Anexo VI da Portaria 3.493
+            modelo_path: Resposta da API usada como modelo dos campos (data_cache.json)
+            config_path: Configuração com as tarifas (config.json)
+        """
+        self.semente = semente
+        self.municipios = {m.codigo6: m for m in ler_anexo_vi(anexo_path) if m.ied}
+
+        with open(modelo_path, "r", encoding="utf-8") as f:
+            modelo = json.load(f)
+        self._modelos = {secao: self._zerar(modelo[secao][0]) for secao in SECOES_REGISTROS}
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self._fixos = {estrato: {servico: _reais(valor) for servico, valor in valores.items()}
+                       for estrato, valores in config["fixed_component_values"].items()}
+        self._qualidade = config["quality_values"]
+        self._valores = {servico: _reais(item.get("valor")) for servico, item in config["data"].items()
+                         if isinstance(item, dict) and str(item.get("valor", "")).startswith("R$")}
+
+    @staticmethod
+    def _zerar(registro: Dict[str, Any]) -> Dict[str, Any]:
+        """Modelo de registro com os mesmos campos e valores neutros."""
+        return {campo: 0 if isinstance(valor, (int, float)) else valor for campo, valor in registro.items()}
+
+    def _rng(self, *partes: str) -> random.Random:
+        return random.Random(":".join((str(self.semente),) + partes))
+
+    def _valor_qualidade(self, servico: str, classificacao: str) -> float:
+        return float(self._qualidade.get(servico, {}).get(classificacao.capitalize(), 0))
+
+    def perfil(self, co_municipio: str, competencia: str) -> Optional[Dict[str, Any]]:
+        """
+        Perfil do município na competência: equipes, classificações e ACS.
+
+        O perfil base depende apenas da semente e do município; cada
+        competência aplica pequenas variações determinísticas.
+        """
+        municipio = self.municipios.get(co_municipio[:6])
+        if municipio is None:
+            return None
+        populacao = max(municipio.populacao, 1000)
+        base = self._rng(municipio.codigo6)
+        mes = self._rng(municipio.codigo6, competencia)
+
+        teto_esf = max(1, math.ceil(populacao / HABITANTES_TETO_ESF))
+        esf = round(populacao / HABITANTES_POR_ESF * base.uniform(0.6, 1.1)) + mes.choice((-1, 0, 0, 0, 1))
+        esf = min(teto_esf, max(1, esf))
+        eap = base.choice((0, 0, 0, 1, 2)) if populacao > 5000 else 0
+
+        classificacoes = {}
+        for chave in ("vinculo", "qualidade_esf", "qualidade_emulti"):
+            classificacao = base.choices(CLASSIFICACOES, PESOS_CLASSIFICACAO)[0]
+            if mes.random() < TAXA_RECLASSIFICACAO:
+                classificacao = mes.choice(CLASSIFICACOES)
+            classificacoes[chave] = classificacao
+
+        acs_teto = max(1, math.ceil(populacao / HABITANTES_TETO_ACS))
+        acs = max(1, round(populacao / HABITANTES_POR_ACS * base.uniform(0.8, 1.2)))
+
+        return {
+            "municipio": municipio,
+            "estrato": str(municipio.ied),
+            "esf": esf,
+            "teto_esf": teto_esf,
+            "eap": eap,
+            "emulti": base.randint(0, max(1, populacao // 30000)),
+            "esb": round(esf * base.uniform(0.5, 1.0)),
+            "acs": acs,
+            "acs_teto": acs_teto,
+            "populacao": populacao,
+            **classificacoes,
+        }
+
+    def _pagamento(self, perfil: Dict[str, Any], competencia: str) -> Dict[str, Any]:
+        municipio = perfil["municipio"]
+        fixos = self._fixos.get(perfil["estrato"], {})
+        esf, eap, emulti, esb, acs = perfil["esf"], perfil["eap"], perfil["emulti"], perfil["esb"], perfil["acs"]
+
+        registro = dict(self._modelos["pagamentos"])
+        registro.update({
+            "coUfIbge": municipio.codigo6[:2], "sgUf": municipio.uf, "noMunicipio": municipio.nome,
+            "coMunicipioIbge": municipio.codigo6, "nuCompCnes": deslocar_competencia(competencia, -2),
+            "nuParcela": competencia, "dsFaixaIndiceEquidadeEsfEap": f"ESTRATO {perfil['estrato']}",
+            "dsClassificacaoVinculoEsfEap": perfil["vinculo"],
+            "dsClassificacaoQualidadeEsfEap": perfil["qualidade_esf"],
+            "dsClassificacaoQualidadeEmulti": perfil["qualidade_emulti"],
+            "qtPopulacao": perfil["populacao"], "nuAnoRefPopulacaoIbge": int(competencia[:4]) - 1,
+        })
+
+        # eSF e eAP
+        vl_fixo_esf = esf * fixos.get("eSF", 0)
+        vl_vinculo_esf = esf * self._valor_qualidade("eSF", perfil["vinculo"])
+        vl_qualidade_esf = esf * self._valor_qualidade("eSF", perfil["qualidade_esf"])
+        vl_fixo_eap = eap * fixos.get("eAP 30h", 0)
+        vl_vinculo_eap = eap * self._valor_qualidade("eAP 30h", perfil["vinculo"])
+        vl_qualidade_eap = eap * self._valor_qualidade("eAP 30h", perfil["qualidade_esf"])
+        registro.update({
+            "qtEsfCredenciado": esf, "qtEsfHomologado": esf, "qtEsfTotalPgto": esf, "qtEsf100pcPgto": esf,
+            "vlFixoEsf": vl_fixo_esf, "vlVinculoEsf": vl_vinculo_esf, "vlQualidadeEsf": vl_qualidade_esf,
+            "vlTotalEsf": vl_fixo_esf + vl_vinculo_esf + vl_qualidade_esf,
+            "qtEapCredenciadas": eap, "qtEapHomologado": eap, "qtEapTotalPgto": eap, "qtEap30hCompletas": eap,
+            "vlFixoEap": vl_fixo_eap, "vlVinculoEap": vl_vinculo_eap, "vlQualidadeEap": vl_qualidade_eap,
+            "vlTotalEap": vl_fixo_eap + vl_vinculo_eap + vl_qualidade_eap,
+            "qtTetoEsf": perfil["teto_esf"], "qtTetoEap": perfil["teto_esf"] * 2,
+        })
+
+        # eMulti
+        vl_custeio = emulti * self._valores.get("eMULTI Ampl.", 0)
+        vl_qualidade_emulti = emulti * self._valor_qualidade("eMULTI Ampl.", perfil["qualidade_emulti"])
+        registro.update({
+            "qtEmultiCredenciadas": emulti, "qtEmultiHomologado": emulti, "qtEmultiPagas": emulti,
+            "qtEmultiPagamentoAmpliada": emulti, "vlPagamentoEmultiCusteio": vl_custeio,
+            "vlPagamentoEmultiQualidade": vl_qualidade_emulti, "vlTotalEmulti": vl_custeio + vl_qualidade_emulti,
+            "qtTetoEmultiAmpliada": max(1, emulti),
+        })
+
+        # Saúde bucal
+        registro.update({
+            "qtSb40hCredenciada": esb, "qtSb40hHomologado": esb, "qtSbPagamentoModalidadeI": esb,
+            "vlPagamentoEsb40h": esb * self._valores.get("eSB Comum I", 0),
+            "vlPagamentoEsb40hQualidade": esb * self._valor_qualidade("eSB Comum I", perfil["qualidade_esf"]),
+            "qtTetoSb40h": perfil["teto_esf"],
+        })
+
+        # ACS e per capita
+        vl_acs = acs * VALOR_ACS
+        registro.update({
+            "qtTetoAcs": perfil["acs_teto"], "qtAcsDiretoCredenciado": acs, "qtAcsDiretoPgto": acs,
+            "vlPagamentoAcsDireto": vl_acs, "vlTotalAcsDireto": vl_acs,
+            "vlPagamentoIncentivoPopulacional": round(perfil["populacao"] * VALOR_PER_CAPITA_ANUAL / 12, 2),
+        })
+        return registro
+
+    def _resumos(self, pagamento: Dict[str, Any]) -> List[Dict[str, Any]]:
+        valores = {
+            PLANO_ESF: pagamento["vlTotalEsf"] + pagamento["vlTotalEap"],
+            PLANO_BUCAL: pagamento["vlPagamentoEsb40h"] + pagamento["vlPagamentoEsb40hQualidade"],
+            PLANO_EMULTI: pagamento["vlTotalEmulti"],
+            PLANO_ACS: pagamento["vlTotalAcsDireto"],
+            PLANO_DEMAIS: 0,
+            PLANO_PER_CAPITA: pagamento["vlPagamentoIncentivoPopulacional"],
+        }
+        resumos = []
+        for plano in PLANOS:
+            resumo = dict(self._modelos["resumosPlanosOrcamentarios"])
+            resumo.update({campo: pagamento[campo] for campo in
+                           ("sgUf", "coUfIbge", "coMunicipioIbge", "noMunicipio", "nuCompCnes", "nuParcela")})
+            valor = round(valores[plano], 2)
+            resumo.update({"dsPlanoOrcamentario": plano, "dsEsferaAdministrativa": "MUNICIPAL",
+                           "vlIntegral": valor, "vlEfetivoRepasse": valor})
+            resumos.append(resumo)
+        return resumos
+
+    def gerar(self, co_municipio: str, competencia: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Gera os registros de um município em uma competência.
+
+        Compatível com o gerador do servidor local (utils/api_stub.py).
+
+        Returns:
+            Optional[Dict]: Registros por seção, ou None se o município não estiver no Anexo VI
+        """
+        perfil = self.perfil(co_municipio, competencia)
+        if perfil is None:
+            return None
+        pagamento = self._pagamento(perfil, competencia)
+        return {"resumosPlanosOrcamentarios": self._resumos(pagamento), "pagamentos": [pagamento]}
+
+    def codigos(self, ufs: Optional[Iterable[str]] = None) -> List[str]:
+        """Códigos IBGE (6 dígitos) dos municípios, opcionalmente filtrados por UF."""
+        ufs = {uf.upper() for uf in ufs} if ufs else None
+        return [codigo for codigo, m in sorted(self.municipios.items()) if ufs is None or m.uf in ufs]
+
+    def iterar(self, inicio: str, fim: str, ufs: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Gera os registros de cada município e competência do intervalo."""
+        codigos = self.codigos(ufs)
+        for competencia in listar_competencias(inicio, fim):
+            for codigo in codigos:
+                yield self.gerar(codigo, competencia)
+
+    def salvar_json(self, path: str, inicio: str, fim: str, ufs: Optional[Iterable[str]] = None) -> int:
+        """
+        Grava uma resposta no formato do data_cache.json, registro a registro.
+
+        Cada seção é gerada em uma passagem própria (a geração é
+        determinística), sem manter todos os registros em memória.
+
+        Returns:
+            int: Número de registros de pagamentos gravados
+        """
+        total = 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"data": f"01/{fim[4:]}/{fim[:4]}"}, ensure_ascii=False)[:-1])
+            for secao in ("resumosPlanosOrcamentarios", "pagamentos"):
+                f.write(f', "{secao}": [')
+                primeiro = True
+                for dados in self.iterar(inicio, fim, ufs):
+                    for registro in dados[secao]:
+                        f.write(("" if primeiro else ", ") + json.dumps(registro, ensure_ascii=False))
+                        primeiro = False
+                        if secao == "pagamentos":
+                            total += 1
+                f.write("]")
+            f.write("}")
+        return total
+
+    def salvar_parquet(self, base_dir: str, inicio: str, fim: str, ufs: Optional[Iterable[str]] = None) -> int:
+        """
+        Grava os registros no armazenamento colunar (uma gravação por UF e competência).
+
+        Returns:
+            int: Número de registros de pagamentos gravados
+        """
+        store = PaymentStore(base_dir)
+        total = 0
+        ufs = sorted({uf.upper() for uf in ufs} if ufs else {m.uf for m in self.municipios.values()})
+        for competencia in listar_competencias(inicio, fim):
+            for uf in ufs:
+                lote = {secao: [] for secao in SECOES_REGISTROS}
+                for codigo in self.codigos([uf]):
+                    dados = self.gerar(codigo, competencia)
+                    for secao in SECOES_REGISTROS:
+                        lote[secao].extend(dados[secao])
+                store.gravar(lote)
+                total += len(lote["pagamentos"])
+        return total
+
+
+def main() -> None:
+    """Ponto de entrada de linha de comando do gerador."""
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de pagamentos para os municípios.")
+    parser.add_argument("--inicio", required=True, help="Competência inicial (AAAAMM)")
+    parser.add_argument("--fim", help="Competência final (padrão: a inicial)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--uf", nargs="*", help="Restringe a geração às UFs (siglas)")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--json", metavar="ARQUIVO", help="Arquivo JSON no formato do data_cache.json")
+    destino.add_argument("--parquet", nargs="?", const=STORE_DIR, metavar="DIR",
+                         help="Armazenamento colunar de destino (padrão: %(const)s)")
+    args = parser.parse_args()
+
+    gerador = GeradorPagamentos(args.semente)
+    fim = args.fim or args.inicio
+    if args.json:
+        total = gerador.salvar_json(args.json, args.inicio, fim, args.uf)
+    else:
+        total = gerador.salvar_parquet(args.parquet, args.inicio, fim, args.uf)
+    print(json.dumps({"registros_pagamentos": total}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
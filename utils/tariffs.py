@@ -0,0 +1,173 @@
+"""
+Tabelas de tarifas do PAP compiladas a partir do config.json.
+
+As tarifas do config.json ("fixed_component_values", "data[*].valor" e
+"implantacao_values") são strings em formato brasileiro ("R$ 18.000,00").
+Elas são convertidas uma única vez em matrizes NumPy densas, indexadas por
+(serviço, estrato), (serviço, classificação) e (serviço, vínculo); cada
+consulta de tarifa é um acesso por posição, sem processamento de strings.
+
+Valores ausentes ou inválidos valem 0 nas tabelas e ficam registrados em
+``erros``, para que as calculadoras possam informá-los ao usuário.
+"""
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Níveis de classificação de qualidade e de vínculo, na ordem das tabelas
+CLASSIFICACOES = ("Ótimo", "Bom", "Suficiente", "Regular")
+
+# Serviços cujo componente fixo depende do estrato (IED)
+SERVICOS_POR_ESTRATO = ("eSF", "eAP 30h", "eAP 20h")
+
+# Serviços eMulti, cujo componente fixo vem de data[servico]["valor"]
+SERVICOS_EMULTI = ("eMULTI Ampl.", "eMULTI Compl.", "eMULTI Estrat.")
+
+# Chaves de implantacao_values com nome diferente do serviço
+IMPLANTACAO_ALIASES = {
+    "eMULTI Ampl.": "eMulti Ampliada",
+    "eMULTI Compl.": "eMulti Complementar",
+    "eMULTI Estrat.": "eMulti Estratégica",
+}
+
+
+def _tarifa(valor: Any) -> Optional[float]:
+    """Converte uma tarifa do config.json; "Sem cálculo" vale 0 e valores inválidos, None."""
+    if valor is None or valor == "Sem cálculo":
+        return 0.0
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if isinstance(valor, str):
+        try:
+            return float(valor.replace("R$", "").strip().replace(".", "").replace(",", "."))
+        except ValueError:
+            return None
+    return None
+
+
+class TabelasTarifas:
+    """
+    Tarifas do config.json em tabelas numéricas densas.
+
+    Atributos (linhas na ordem de ``servicos``):
+        fixo: Componente fixo por (serviço, estrato)
+        qualidade: Componente de qualidade por (serviço, classificação)
+        vinculo: Componente de vínculo por (serviço, vínculo)
+        valor: Valor unitário de data[servico]["valor"]
+        implantacao: Valor de implantação por serviço
+        erros: Tarifas ausentes ou inválidas por (serviço, tabela), com a
+            origem no config.json
+    """
+
+    def __init__(self, config: Mapping[str, Any], vinculo_values: Optional[Mapping[str, Mapping[str, float]]] = None):
+        """
+        Args:
+            config: Conteúdo do config.json
+            vinculo_values: Valores de vínculo por serviço e classificação
+        """
+        data = config.get("data", {})
+        quality_values = config.get("quality_values", {})
+        fixed_component_values = config.get("fixed_component_values", {})
+        implantacao_values = config.get("implantacao_values", {})
+        vinculo_values = vinculo_values or {}
+
+        servicos = list(data)
+        for fonte in (quality_values, vinculo_values, implantacao_values, SERVICOS_POR_ESTRATO, SERVICOS_EMULTI):
+            servicos.extend(s for s in fonte if s not in servicos)
+        self.servicos: Tuple[str, ...] = tuple(servicos)
+        self.estratos: Tuple[str, ...] = tuple(sorted(fixed_component_values))
+        self.indice_servico: Dict[str, int] = {s: i for i, s in enumerate(self.servicos)}
+        self.indice_estrato: Dict[str, int] = {e: j for j, e in enumerate(self.estratos)}
+        self.indice_classificacao: Dict[str, int] = {c: k for k, c in enumerate(CLASSIFICACOES)}
+
+        total = len(self.servicos)
+        self.valor = np.zeros(total)
+        self.implantacao = np.zeros(total)
+        self.fixo = np.zeros((total, len(self.estratos)))
+        self.qualidade = np.zeros((total, len(CLASSIFICACOES)))
+        self.vinculo = np.zeros((total, len(CLASSIFICACOES)))
+        self.erros: Dict[Tuple[str, str], str] = {}
+
+        for i, servico in enumerate(self.servicos):
+            info = data.get(servico)
+            if isinstance(info, dict) and "valor" in info:
+                self.valor[i] = self._converter(servico, "valor", info["valor"], f'data["{servico}"]["valor"]')
+            else:
+                self.erros[(servico, "valor")] = f'data["{servico}"]["valor"] ausente'
+            chave = servico if servico in implantacao_values else IMPLANTACAO_ALIASES.get(servico)
+            if chave in implantacao_values:
+                self.implantacao[i] = self._converter(servico, "implantacao", implantacao_values[chave],
+                                                      f'implantacao_values["{chave}"]')
+            for nome, tabela, fonte, niveis in (
+                ("qualidade", self.qualidade, "quality_values", quality_values.get(servico, {})),
+                ("vinculo", self.vinculo, "vinculo_values", vinculo_values.get(servico, {})),
+            ):
+                for classificacao, valor in niveis.items():
+                    if classificacao in self.indice_classificacao:
+                        tabela[i, self.indice_classificacao[classificacao]] = self._converter(
+                            servico, nome, valor, f'{fonte}["{servico}"]["{classificacao}"]')
+
+        for j, estrato in enumerate(self.estratos):
+            for servico in SERVICOS_POR_ESTRATO:
+                self.fixo[self.indice_servico[servico], j] = self._converter(
+                    servico, "fixo", fixed_component_values[estrato].get(servico),
+                    f'fixed_component_values["{estrato}"]["{servico}"]')
+        for servico in SERVICOS_EMULTI:
+            linha = self.indice_servico[servico]
+            self.fixo[linha, :] = self.valor[linha]
+
+    def _converter(self, servico: str, tabela: str, valor: Any, origem: str) -> float:
+        """Converte uma tarifa, registrando em ``erros`` os valores inválidos (que valem 0)."""
+        convertido = _tarifa(valor)
+        if convertido is None:
+            self.erros[(servico, tabela)] = f"{origem} inválido: {valor!r}"
+            return 0.0
+        return convertido
+
+    def erro(self, servico: str, tabela: str) -> Optional[str]:
+        """
+        Tarifa ausente ou inválida do serviço em uma tabela, se houver.
+
+        Args:
+            servico: Nome do serviço
+            tabela: "valor", "implantacao", "fixo", "qualidade" ou "vinculo"
+
+        Returns:
+            Optional[str]: Origem e valor no config.json, ou None se a tarifa é válida
+        """
+        return self.erros.get((servico, tabela))
+
+    def valor_fixo(self, servico: str, estrato: str) -> float:
+        """Componente fixo do serviço no estrato (0 se ausente)."""
+        i = self.indice_servico.get(servico)
+        j = self.indice_estrato.get(estrato)
+        if i is None:
+            return 0.0
+        if j is None:
+            # O custeio das eMulti não depende do estrato
+            return float(self.valor[i]) if servico in SERVICOS_EMULTI else 0.0
+        return float(self.fixo[i, j])
+
+    def valor_servico(self, servico: str) -> float:
+        """Valor unitário de data[servico]["valor"] (0 se "Sem cálculo")."""
+        i = self.indice_servico.get(servico)
+        return float(self.valor[i]) if i is not None else 0.0
+
+    def valor_implantacao(self, servico: str) -> float:
+        """Valor de implantação do serviço (0 se ausente)."""
+        i = self.indice_servico.get(servico)
+        return float(self.implantacao[i]) if i is not None else 0.0
+
+    def valor_qualidade(self, servico: str, classificacao: str) -> float:
+        """Componente de qualidade do serviço na classificação (0 se ausente)."""
+        i = self.indice_servico.get(servico)
+        k = self.indice_classificacao.get(classificacao)
+        return float(self.qualidade[i, k]) if i is not None and k is not None else 0.0
+
+    def valor_vinculo(self, servico: str, vinculo: str) -> float:
+        """Componente de vínculo do serviço na classificação (0 se ausente)."""
+        i = self.indice_servico.get(servico)
+        k = self.indice_classificacao.get(vinculo)
+        return float(self.vinculo[i, k]) if i is not None and k is not None else 0.0